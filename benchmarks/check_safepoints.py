@@ -0,0 +1,72 @@
+#!python
+
+# Checks the gc vs non-gc split of the safepoints against logs from
+# generate_logs.py, whose G1 remarks and cleanups and CMS initial marks and
+# final remarks are gc stops like the young and full gcs, and whose only
+# other stops are the odd ones between collections that follow an
+# "Application time" line. Parses each log serially and in parallel.
+#
+#   python benchmarks/check_safepoints.py --size 4M --jobs 2
+
+import sys
+import os
+import argparse
+import tempfile
+import shutil
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchmarks_dir, '..'))
+sys.path.insert(0, benchmarks_dir)
+from gc_log_visualizer import LogParser
+from generate_logs import generators, generate, parse_size
+
+def expected_gc_stops(path):
+  """Whether each stop in the log is for gc, going by the line before it."""
+  expected = []
+  previous = ''
+  with open(path) as f:
+    for line in f:
+      if 'threads were stopped' in line:
+        expected.append('Application time: ' not in previous)
+      previous = line
+  return expected
+
+def parsed_gc_stops(path, jobs):
+  logParser = LogParser(path)
+  try:
+    logParser.determine_gc_alg()
+    if jobs > 1:
+      logParser.parse_log_parallel(jobs)
+    else:
+      logParser.parse_log()
+    return [bool(gc) for gc in logParser.store.safepoints.column('gc')]
+  finally:
+    logParser.cleanup()
+
+def main():
+  parser = argparse.ArgumentParser(description='Check which safepoints are attributed to gc in generated logs')
+  parser.add_argument('--size', default='4M', help='size of each log')
+  parser.add_argument('--collectors', default='g1,cms,parallel', help='comma separated, of %s' % ', '.join(sorted(generators)))
+  parser.add_argument('--jobs', type=int, default=2, help='processes for the parallel parse')
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  work_dir = tempfile.mkdtemp(prefix='gc_log_visualizer_safepoints.')
+  failed = False
+  try:
+    for collector in args.collectors.split(','):
+      path = os.path.join(work_dir, '%s.log' % collector)
+      generate(collector, parse_size(args.size), path, args.seed)
+      expected = expected_gc_stops(path)
+      for jobs in sorted(set([1, args.jobs])):
+        parsed = parsed_gc_stops(path, jobs)
+        wrong = sum(1 for gc, expected_gc in zip(parsed, expected) if gc != expected_gc) + abs(len(parsed) - len(expected))
+        print("%-9s jobs %d: %d stops, %d gc, %d non-gc, %d misattributed" % (
+            collector, jobs, len(parsed), sum(parsed), len(parsed) - sum(parsed), wrong))
+        failed = failed or wrong > 0
+  finally:
+    shutil.rmtree(work_dir)
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,51 @@
+#!python
+
+# Micro-benchmark of derived_metrics over a synthetic store of gc events,
+# the rates and predictions behind the rates and headroom charts.
+#
+#   python benchmarks/derived_metrics.py <optional number of gcs>
+
+import sys
+import os
+import time
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gc_log_visualizer import EventStore, derived_metrics, derivedFields
+
+def fill(series, columns):
+  for column, values in zip(series.columns, columns):
+    column.fromstring(values.astype(column_type(column)).tostring())
+
+def column_type(column):
+  return numpy.float64 if column.typecode == 'd' else numpy.dtype('i%d' % column.itemsize)
+
+def synthetic_store(count, seed=1):
+  """count gcs about two seconds apart on an 8GB heap, the old gen filling
+  up until every 500th gc, which is a full gc."""
+  random = numpy.random.RandomState(seed)
+  timestamps = 1462000000000.0 + numpy.cumsum(random.randint(500, 3500, count))
+  young = random.randint(200, 400, count)
+  old = 2000 + numpy.arange(count) % 500 * 10
+  full = numpy.arange(count) % 500 == 499
+  pre_total = old + young
+  post_total = numpy.where(full, 2000, old + 10)
+
+  store = EventStore()
+  fill(store.young, (timestamps, young, numpy.full(count, 400), old, pre_total, numpy.full(count, 10), full))
+  fill(store.gc, (timestamps[~full], pre_total[~full], post_total[~full]))
+  fill(store.full_gc, (timestamps[full], pre_total[full], post_total[full]))
+  return store
+
+def main():
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+  store = synthetic_store(count)
+  for g1 in (True, False):
+    start = time.time()
+    metrics = derived_metrics(store, g1, 3686, 8192)
+    elapsed = time.time() - start
+    assert all(len(metrics[field]) == count for field in derivedFields)
+    print("%-8s %10d gcs %8.3f secs %12.0f gcs/sec" % ('g1' if g1 else 'other', count, elapsed, count / elapsed))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,379 @@
+#!python
+
+# Writes synthetic gc logs in the formats LogParser understands, for
+# benchmarking. The same collector, size and seed always give the same log.
+#
+#   python benchmarks/generate_logs.py g1|cms|parallel <size, e.g. 500M or 20G> <output file or -> [seed]
+
+import sys
+import time
+import random
+
+class LogGenerator:
+  """Models a heap well enough that the charts look like a real JVM's:
+  eden filling between young collections, promotion into the old
+  generation and the collector's old generation cleanup when it fills."""
+
+  startTime = 1461996000  # 2016-04-30T06:00:00Z
+
+  def __init__(self, seed=1):
+    self.random = random.Random(seed)
+    self.uptime = 100.0
+    self.second = None
+    self.second_prefix = None
+
+  def stamp(self, uptime=None):
+    """The date and uptime stamps a line starts with."""
+    if uptime is None:
+      uptime = self.uptime
+    millis = int(uptime * 1000)
+    second = LogGenerator.startTime + millis // 1000
+    if second != self.second:
+      self.second = second
+      self.second_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+    return "%s.%03d+0000: %.3f: " % (self.second_prefix, millis % 1000, uptime)
+
+  def pause_time(self, base):
+    # mostly short with a long tail
+    return base + self.random.expovariate(1 / (base * 0.6)) + (self.random.random() < 0.01 and self.random.uniform(0.2, 1.5) or 0)
+
+  def stopped(self, pause):
+    self.uptime += pause
+    return "%sTotal time for which application threads were stopped: %.7f seconds, Stopping threads took: %.7f seconds\n" % \
+        (self.stamp(), pause + self.random.uniform(0.00005, 0.0005), self.random.uniform(0.00001, 0.0003))
+
+  def mutator(self, seconds):
+    """Application time up to the next collection, with the odd non-gc
+    safepoint (bias revocation, deoptimization) in between."""
+    lines = []
+    while self.random.random() < 0.3:
+      run = self.random.uniform(0, seconds)
+      seconds -= run
+      self.uptime += run
+      lines.append("%sApplication time: %.7f seconds\n" % (self.stamp(), run))
+      lines.append(self.stopped(self.random.uniform(0.00005, 0.002)))
+    self.uptime += seconds
+    lines.append("%sApplication time: %.7f seconds\n" % (self.stamp(), seconds))
+    return ''.join(lines)
+
+  def write(self, out, size):
+    """Writes events until at least size bytes have been written."""
+    written = 0
+    for text in self.events():
+      out.write(text)
+      written += len(text)
+      if written >= size:
+        break
+    return written
+
+class G1LogGenerator(LogGenerator):
+  maxHeap = 8192
+  ihopPct = 45
+
+  def __init__(self, seed=1):
+    LogGenerator.__init__(self, seed)
+    self.old = 1500.0
+    self.survivors = 40
+    self.eden_target = 760
+    self.mixed_left = 0
+    self.mark_pending = False
+
+  def header(self):
+    return "Java HotSpot(TM) 64-Bit Server VM (25.66-b17) for linux-amd64 JRE\n" \
+        "CommandLine flags: -XX:G1HeapRegionSize=4194304 -XX:InitiatingHeapOccupancyPercent=%d -XX:MaxHeapSize=%d " \
+        "-XX:+PrintAdaptiveSizePolicy -XX:+PrintGCApplicationConcurrentTime -XX:+PrintGCApplicationStoppedTime " \
+        "-XX:+PrintGCDateStamps -XX:+PrintGCDetails -XX:+UseG1GC \n" % (G1LogGenerator.ihopPct, G1LogGenerator.maxHeap << 20)
+
+  def events(self):
+    yield self.header()
+    while True:
+      yield self.mutator(self.random.uniform(0.5, 12))
+      while self.random.random() < 0.05:
+        yield self.humongous_request()
+      yield self.pause()
+      if self.mark_pending:
+        yield self.concurrent_cycle()
+
+  def humongous_request(self):
+    self.uptime += self.random.uniform(0.001, 0.5)
+    size = int(min(64 << 20, self.random.lognormvariate(15, 1.2)) + (2 << 20))
+    occupancy = int((self.old + self.eden_target / 2) * 1048576)
+    return " %.3f: [G1Ergonomics (Concurrent Cycles) request concurrent cycle initiation, reason: occupancy higher than threshold, " \
+        "occupancy: %d bytes, allocation request: %d bytes, threshold: %d bytes (%d.00 %%), source: concurrent humongous allocation]\n" % \
+        (self.uptime, occupancy, size, self.threshold(), G1LogGenerator.ihopPct)
+
+  def threshold(self):
+    return (G1LogGenerator.maxHeap << 20) * G1LogGenerator.ihopPct // 100
+
+  def pause(self):
+    r = self.random
+    mixed = self.mixed_left > 0
+    eden = r.randint(self.eden_target // 2, self.eden_target)
+    pre_total = self.old + eden + self.survivors
+    exhausted = pre_total > G1LogGenerator.maxHeap * 0.93
+    if exhausted and r.random() < 0.25:
+      # evacuation failed outright, the whole heap is collected
+      return self.full_gc(eden, pre_total)
+    pause = self.pause_time(0.03 + eden * 0.00006 + (mixed and 0.04 or 0)) + (exhausted and r.uniform(0.5, 3) or 0)
+    uptime = self.uptime
+    lines = ["%s[GC pause (G1 Evacuation Pause) (%s)%s %.3f: [G1Ergonomics (CSet Construction) start choosing CSet, _pending_cards: %d, "
+             "predicted base time: %.2f ms, remaining time: %.2f ms, target pause time: 200.00 ms]\n" %
+             (self.stamp(), mixed and 'mixed' or 'young', exhausted and ' (to-space exhausted)' or '', uptime, r.randint(1000, 90000), r.uniform(5, 40), r.uniform(100, 190))]
+    lines.append(" %.3f: [G1Ergonomics (CSet Construction) add young regions to CSet, eden: %d regions, survivors: %d regions, predicted young region time: %.2f ms]\n" %
+                 (uptime, eden // 4, self.survivors // 4, r.uniform(20, 150)))
+    promoted = r.uniform(0.01, 0.08) * eden
+    if r.random() < 0.004:
+      # a burst of long lived allocation, what fills the heap up to
+      # to-space exhaustion now and then
+      promoted += r.uniform(1000, 4000)
+    self.old = min(self.old + promoted, G1LogGenerator.maxHeap - self.eden_target - 100)
+    if mixed:
+      freed = r.uniform(150, 450)
+      self.old = max(800.0, self.old - freed)
+      self.mixed_left -= 1
+      reclaimable = self.old * r.uniform(0.02, 0.2)
+      pct = reclaimable * 100 / G1LogGenerator.maxHeap
+      if self.mixed_left > 0 and pct > 5:
+        lines.append(" %.3f: [G1Ergonomics (Mixed GCs) continue mixed GCs, reason: candidate old regions available, candidate old regions: %d regions, "
+                     "reclaimable: %d bytes (%.2f %%), threshold: 5.00 %%]\n" % (uptime + pause, reclaimable // 4, int(reclaimable * 1048576), pct))
+      else:
+        self.mixed_left = 0
+        lines.append(" %.3f: [G1Ergonomics (Mixed GCs) do not continue mixed GCs, reason: reclaimable percentage not over threshold, candidate old regions: %d regions, "
+                     "reclaimable: %d bytes (%.2f %%), threshold: 5.00 %%]\n" % (uptime + pause, reclaimable // 4, int(reclaimable * 1048576), min(pct, 4.99)))
+    elif self.mixed_left < 0:
+      # the first young collection after marking starts the mixed ones
+      self.mixed_left = r.randint(3, 8)
+      reclaimable = self.old * r.uniform(0.1, 0.3)
+      lines.append(" %.3f: [G1Ergonomics (Mixed GCs) start mixed GCs, reason: candidate old regions available, candidate old regions: %d regions, "
+                   "reclaimable: %d bytes (%.2f %%), threshold: 5.00 %%]\n" % (uptime + pause, reclaimable // 4, int(reclaimable * 1048576), reclaimable * 100 / G1LogGenerator.maxHeap))
+    post_survivors = r.choice((self.survivors, 48, 40, 56))
+    post_total = self.old + post_survivors
+    if not self.mark_pending and self.mixed_left == 0 and post_total * 1048576 > self.threshold():
+      self.mark_pending = True
+      lines.append(" %.3f: [G1Ergonomics (Concurrent Cycles) request concurrent cycle initiation, reason: occupancy higher than threshold, "
+                   "occupancy: %d bytes, allocation request: 0 bytes, threshold: %d bytes (%d.00 %%), source: end of GC]\n" %
+                   (uptime + pause, int(post_total * 1048576), self.threshold(), G1LogGenerator.ihopPct))
+    lines.append(", %.7f secs]\n" % pause)
+    lines.append("   [Parallel Time: %.1f ms, GC Workers: 23]\n" % (pause * 900))
+    lines.append("      [GC Worker Start (ms): Min: %.1f, Avg: %.1f, Max: %.1f, Diff: 0.4]\n" % (uptime * 1000, uptime * 1000 + 0.2, uptime * 1000 + 0.4))
+    for term, scale in (('Ext Root Scanning', 0.1), ('Update RS', 0.15)):
+      avg = pause * 1000 * scale
+      lines.append("      [%s (ms): Min: %.1f, Avg: %.1f, Max: %.1f, Diff: %.1f, Sum: %.1f]\n" % (term, avg * 0.5, avg, avg * 1.4, avg * 0.9, avg * 23))
+    lines.append("         [Processed Buffers: Min: 10, Avg: 20.5, Max: 40, Diff: 30, Sum: 471]\n")
+    for term, scale in (('Scan RS', 0.05), ('Code Root Scanning', 0.01), ('Object Copy', 0.55), ('Termination', 0.05)):
+      avg = pause * 1000 * scale
+      lines.append("      [%s (ms): Min: %.1f, Avg: %.1f, Max: %.1f, Diff: %.1f, Sum: %.1f]\n" % (term, avg * 0.5, avg, avg * 1.4, avg * 0.9, avg * 23))
+    lines.append("         [Termination Attempts: Min: 1, Avg: 1.0, Max: 1, Diff: 0, Sum: 23]\n")
+    lines.append("      [GC Worker Other (ms): Min: 0.0, Avg: 0.1, Max: 0.3, Diff: 0.3, Sum: 2.0]\n")
+    lines.append("      [GC Worker Total (ms): Min: %.1f, Avg: %.1f, Max: %.1f, Diff: 0.4, Sum: 1336.2]\n" % (pause * 880, pause * 890, pause * 900))
+    lines.append("   [Code Root Fixup: 0.1 ms]\n   [Code Root Purge: 0.0 ms]\n   [Clear CT: 0.4 ms]\n")
+    lines.append("   [Other: %.1f ms]\n      [Choose CSet: 0.0 ms]\n      [Ref Proc: %.1f ms]\n      [Free CSet: 0.3 ms]\n" % (pause * 100, pause * 40))
+    lines.append("   [Eden: %d.0M(%d.0M)->0.0B(%d.0M) Survivors: %d.0M->%d.0M Heap: %.1fM(%d.0M)->%.1fM(%d.0M)]\n" %
+                 (eden, self.eden_target, self.eden_target, self.survivors, post_survivors, pre_total, G1LogGenerator.maxHeap, post_total, G1LogGenerator.maxHeap))
+    lines.append(" [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" % (pause * 20, pause * 0.5, pause))
+    self.survivors = post_survivors
+    lines.append(self.stopped(pause))
+    return ''.join(lines)
+
+  def full_gc(self, eden, pre_total):
+    r = self.random
+    pause = self.pause_time(4)
+    self.old = max(800.0, self.old * r.uniform(0.4, 0.6))
+    self.mixed_left = 0
+    lines = ["%s[Full GC (Allocation Failure)  %dM->%dM(%dM), %.7f secs]\n" % (self.stamp(), pre_total, self.old, G1LogGenerator.maxHeap, pause)]
+    lines.append("   [Eden: %d.0M(%d.0M)->0.0B(%d.0M) Survivors: %d.0M->0.0B Heap: %.1fM(%d.0M)->%.1fM(%d.0M)], [Metaspace: 60000K->60000K(1103872K)]\n" %
+                 (eden, self.eden_target, self.eden_target, self.survivors, pre_total, G1LogGenerator.maxHeap, self.old, G1LogGenerator.maxHeap))
+    lines.append(" [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" % (pause * 20, pause * 0.1, pause))
+    self.survivors = 0
+    lines.append(self.stopped(pause))
+    return ''.join(lines)
+
+  def concurrent_cycle(self):
+    r = self.random
+    self.mark_pending = False
+    self.mixed_left = -1
+    lines = []
+    self.uptime += r.uniform(0.001, 0.01)
+    lines.append("%s[GC concurrent-root-region-scan-start]\n" % self.stamp())
+    scan = r.uniform(0.005, 0.1)
+    self.uptime += scan
+    lines.append("%s[GC concurrent-root-region-scan-end, %.7f secs]\n" % (self.stamp(), scan))
+    lines.append("%s[GC concurrent-mark-start]\n" % self.stamp())
+    mark = r.uniform(0.5, 6)
+    self.uptime += mark
+    lines.append("%s[GC concurrent-mark-end, %.7f secs]\n" % (self.stamp(), mark))
+    remark = self.pause_time(0.02)
+    lines.append("%s[GC remark %s[Finalize Marking, 0.0010000 secs] %s[GC ref-proc, 0.0050000 secs] %s[Unloading, 0.0100000 secs], %.7f secs]\n" %
+                 (self.stamp(), self.stamp(), self.stamp(), self.stamp(), remark))
+    lines.append(" [Times: user=0.30 sys=0.00, real=%.2f secs] \n" % remark)
+    lines.append(self.stopped(remark))
+    cleanup = r.uniform(0.002, 0.02)
+    lines.append("%s[GC cleanup %dM->%dM(%dM), %.7f secs]\n" % (self.stamp(), self.old + 300, self.old + 250, G1LogGenerator.maxHeap, cleanup))
+    lines.append(" [Times: user=0.05 sys=0.00, real=%.2f secs] \n" % cleanup)
+    lines.append(self.stopped(cleanup))
+    lines.append("%s[GC concurrent-cleanup-start]\n" % self.stamp())
+    self.uptime += 0.0001
+    lines.append("%s[GC concurrent-cleanup-end, 0.0001000 secs]\n" % self.stamp())
+    return ''.join(lines)
+
+class CmsLogGenerator(LogGenerator):
+  maxHeap = 30 << 20  # K
+  youngMax = 996800
+  occupancyFraction = 75
+
+  def __init__(self, seed=1):
+    LogGenerator.__init__(self, seed)
+    self.old = 12000000.0
+
+  def header(self):
+    return "Java HotSpot(TM) 64-Bit Server VM (25.66-b17) for linux-amd64 JRE\n" \
+        "CommandLine flags: -XX:CMSInitiatingOccupancyFraction=%d -XX:MaxHeapSize=%d -XX:+PrintGCApplicationConcurrentTime " \
+        "-XX:+PrintGCApplicationStoppedTime -XX:+PrintGCDateStamps -XX:+PrintGCDetails -XX:+UseConcMarkSweepGC -XX:+UseParNewGC \n" % \
+        (CmsLogGenerator.occupancyFraction, CmsLogGenerator.maxHeap << 10)
+
+  def events(self):
+    yield self.header()
+    while True:
+      yield self.mutator(self.random.uniform(0.5, 12))
+      yield self.young()
+      if self.old > CmsLogGenerator.maxHeap * CmsLogGenerator.occupancyFraction / 100.0:
+        if self.random.random() < 0.1:
+          # the concurrent cycle started too late, a concurrent mode failure
+          yield self.full_gc()
+        else:
+          yield self.concurrent_cycle()
+
+  def young(self):
+    r = self.random
+    young_pre = r.randint(CmsLogGenerator.youngMax * 8 // 10, CmsLogGenerator.youngMax * 9 // 10)
+    young_post = r.randint(40000, 110000)
+    promoted = young_pre * r.uniform(0.01, 0.06)
+    pre_total = self.old + young_pre
+    self.old += promoted
+    pause = self.pause_time(0.02 + young_pre * 0.00000005)
+    stamp = self.stamp()
+    line = "%s[GC (Allocation Failure) %s[ParNew: %dK->%dK(%dK), %.7f secs] %dK->%dK(%dK), %.7f secs] [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" % \
+        (stamp, stamp, young_pre, young_post, CmsLogGenerator.youngMax, pause, pre_total, self.old + young_post, CmsLogGenerator.maxHeap, pause,
+         pause * 20, pause * 0.5, pause)
+    return line + self.stopped(pause)
+
+  def concurrent_cycle(self):
+    r = self.random
+    lines = []
+    initial = self.pause_time(0.01)
+    lines.append("%s[GC (CMS Initial Mark) [1 CMS-initial-mark: %dK(%dK)] %dK(%dK), %.7f secs] [Times: user=0.05 sys=0.00, real=%.2f secs] \n" %
+                 (self.stamp(), self.old, CmsLogGenerator.maxHeap - CmsLogGenerator.youngMax, self.old + 300000, CmsLogGenerator.maxHeap, initial, initial))
+    lines.append(self.stopped(initial))
+    lines.append("%s[CMS-concurrent-mark-start]\n" % self.stamp())
+    mark = r.uniform(0.5, 4)
+    self.uptime += mark
+    lines.append("%s[CMS-concurrent-mark: %.3f/%.3f secs] [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" % (self.stamp(), mark, mark, mark * 8, mark * 0.6, mark))
+    lines.append("%s[CMS-concurrent-preclean-start]\n" % self.stamp())
+    self.uptime += 0.05
+    lines.append("%s[CMS-concurrent-preclean: 0.050/0.050 secs] [Times: user=0.10 sys=0.00, real=0.05 secs] \n" % self.stamp())
+    rescan = r.uniform(0.03, 0.3)
+    remark = rescan + r.uniform(0.01, 0.06)
+    stamp = self.stamp()
+    lines.append("%s[GC (CMS Final Remark) [YG occupancy: %d K (%d K)]%s[Rescan (parallel) , %.7f secs]%s[weak refs processing, 0.0010000 secs]"
+                 "[1 CMS-remark: %dK(%dK)] %dK(%dK), %.7f secs] [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" %
+                 (stamp, r.randint(300000, 900000), CmsLogGenerator.youngMax, stamp, rescan, stamp, self.old, CmsLogGenerator.maxHeap - CmsLogGenerator.youngMax,
+                  self.old + 600000, CmsLogGenerator.maxHeap, remark, remark * 8, remark * 0.5, remark))
+    lines.append(self.stopped(remark))
+    lines.append("%s[CMS-concurrent-sweep-start]\n" % self.stamp())
+    sweep = r.uniform(1, 8)
+    self.uptime += sweep
+    lines.append("%s[CMS-concurrent-sweep: %.3f/%.3f secs] [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" % (self.stamp(), sweep, sweep, sweep * 2, sweep * 0.1, sweep))
+    lines.append("%s[CMS-concurrent-reset-start]\n" % self.stamp())
+    self.uptime += 0.03
+    lines.append("%s[CMS-concurrent-reset: 0.030/0.030 secs] [Times: user=0.03 sys=0.00, real=0.03 secs] \n" % self.stamp())
+    self.old *= r.uniform(0.4, 0.6)
+    return ''.join(lines)
+
+  def full_gc(self):
+    r = self.random
+    pause = self.pause_time(3)
+    young = r.randint(100000, CmsLogGenerator.youngMax // 2)
+    old_post = self.old * r.uniform(0.4, 0.6)
+    stamp = self.stamp()
+    line = "%s[Full GC (Allocation Failure) %s[CMS: %dK->%dK(%dK), %.7f secs] %dK->%dK(%dK), [Metaspace: 60000K->60000K(1103872K)], %.7f secs] " \
+        "[Times: user=%.2f sys=%.2f, real=%.2f secs] \n" % \
+        (stamp, stamp, self.old, old_post, CmsLogGenerator.maxHeap - CmsLogGenerator.youngMax, pause, self.old + young, old_post, CmsLogGenerator.maxHeap,
+         pause, pause * 2, pause * 0.1, pause)
+    self.old = old_post
+    return line + self.stopped(pause)
+
+class ParallelLogGenerator(LogGenerator):
+  maxHeap = 2010112  # K
+  youngMax = 611840
+  oldMax = 1398272
+
+  def __init__(self, seed=1):
+    LogGenerator.__init__(self, seed)
+    self.old = 300000.0
+    self.collection = 0
+
+  def header(self):
+    return "Java HotSpot(TM) 64-Bit Server VM (25.66-b17) for linux-amd64 JRE\n" \
+        "CommandLine flags: -XX:MaxHeapSize=%d -XX:+PrintAdaptiveSizePolicy -XX:+PrintGCApplicationConcurrentTime " \
+        "-XX:+PrintGCApplicationStoppedTime -XX:+PrintGCDateStamps -XX:+PrintGCDetails -XX:+UseParallelGC \n" % (ParallelLogGenerator.maxHeap << 10)
+
+  def events(self):
+    yield self.header()
+    while True:
+      yield self.mutator(self.random.uniform(0.5, 12))
+      yield self.collect()
+
+  def collect(self):
+    r = self.random
+    young_pre = r.randint(ParallelLogGenerator.youngMax * 8 // 10, ParallelLogGenerator.youngMax * 9 // 10)
+    pre_total = self.old + young_pre
+    self.collection += 1
+    full = self.old > ParallelLogGenerator.oldMax * 0.9
+    lines = []
+    if full:
+      pause = self.pause_time(0.4)
+      old_post = self.old * r.uniform(0.3, 0.5)
+      lines.append("%s[Full GC (Ergonomics) AdaptiveSizeStart: %.3f collection: %d \n" % (self.stamp(), self.uptime, self.collection))
+      lines.append("AdaptiveSizeStop: collection: %d \n" % self.collection)
+      lines.append("[PSYoungGen: %dK->0K(%dK)] [ParOldGen: %dK->%dK(%dK)] %dK->%dK(%dK), [Metaspace: 60000K->60000K(1103872K)], %.7f secs] "
+                   "[Times: user=%.2f sys=%.2f, real=%.2f secs] \n" %
+                   (young_pre, ParallelLogGenerator.youngMax, self.old, old_post, ParallelLogGenerator.oldMax, pre_total, old_post, ParallelLogGenerator.maxHeap,
+                    pause, pause * 8, pause * 0.1, pause))
+      self.old = old_post
+    else:
+      pause = self.pause_time(0.015 + young_pre * 0.00000008)
+      young_post = r.randint(20000, 60000)
+      self.old += young_pre * r.uniform(0.01, 0.05)
+      lines.append("%s[GC (Allocation Failure) AdaptiveSizeStart: %.3f collection: %d \n" % (self.stamp(), self.uptime, self.collection))
+      lines.append("AdaptiveSizeStop: collection: %d \n" % self.collection)
+      lines.append("[PSYoungGen: %dK->%dK(%dK)] %dK->%dK(%dK), %.7f secs] [Times: user=%.2f sys=%.2f, real=%.2f secs] \n" %
+                   (young_pre, young_post, ParallelLogGenerator.youngMax, pre_total, self.old + young_post, ParallelLogGenerator.maxHeap,
+                    pause, pause * 8, pause * 0.1, pause))
+    lines.append(self.stopped(pause))
+    return ''.join(lines)
+
+generators = {'g1': G1LogGenerator, 'cms': CmsLogGenerator, 'parallel': ParallelLogGenerator}
+
+def parse_size(size):
+  """Bytes for a size like 500M, 20G or a plain byte count."""
+  units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+  if size[-1:].upper() in units:
+    return int(float(size[:-1]) * units[size[-1:].upper()])
+  return int(size)
+
+def generate(collector, size, path, seed=1):
+  generator = generators[collector](seed)
+  if path == '-':
+    return generator.write(sys.stdout, size)
+  with open(path, 'w') as f:
+    return generator.write(f, size)
+
+def main():
+  if len(sys.argv) < 4 or sys.argv[1] not in generators:
+    sys.stderr.write("usage: %s g1|cms|parallel <size> <output file or -> [seed]\n" % sys.argv[0])
+    sys.exit(1)
+  seed = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+  generate(sys.argv[1], parse_size(sys.argv[2]), sys.argv[3], seed)
+
+if __name__ == '__main__':
+  main()
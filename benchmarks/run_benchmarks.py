@@ -0,0 +1,174 @@
+#!python
+
+# Parse and render benchmarks over logs from generate_logs.py. Each case
+# runs in a process of its own so the peak RSS reported is the case's, and
+# results are appended to a json lines file so runs can be compared.
+#
+#   python benchmarks/run_benchmarks.py --size 200M --collectors g1,cms --jobs 1,4 --render --label my-change
+#   python benchmarks/run_benchmarks.py --baseline master
+
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+import shutil
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchmarks_dir, '..'))
+sys.path.insert(0, benchmarks_dir)
+from gc_log_visualizer import LogParser
+from generate_logs import generators, generate, parse_size
+
+def peak_rss_mb(who):
+  rss = resource.getrusage(who).ru_maxrss
+  # kilobytes on linux, bytes on os x
+  return rss / (1048576.0 if sys.platform == 'darwin' else 1024.0)
+
+def measure(case):
+  """Runs one case in this process, returning its measurements."""
+  logParser = LogParser(case['path'])
+  start = time.time()
+  logParser.determine_gc_alg()
+  if case['jobs'] > 1:
+    logParser.parse_log_parallel(case['jobs'])
+  else:
+    logParser.parse_log()
+  parse_secs = time.time() - start
+
+  render_secs = None
+  if case['render']:
+    outdir = tempfile.mkdtemp(prefix='gc_log_visualizer_bench.')
+    try:
+      start = time.time()
+      logParser.gnuplot(os.path.join(outdir, 'bench'), None, None, case['render_jobs'], verbose=False)
+      render_secs = time.time() - start
+    finally:
+      shutil.rmtree(outdir)
+      logParser.cleanup()
+
+  with open(case['path']) as f:
+    lines = sum(1 for line in f)
+  size = os.path.getsize(case['path'])
+  return {
+    'lines': lines,
+    'parse_secs': parse_secs,
+    'mb_per_sec': size / 1048576.0 / parse_secs,
+    'lines_per_sec': lines / parse_secs,
+    # the pool's workers hold most of the memory of a parallel parse
+    'peak_rss_mb': max(peak_rss_mb(resource.RUSAGE_SELF), peak_rss_mb(resource.RUSAGE_CHILDREN)),
+    'render_secs': render_secs,
+  }
+
+def run_case(case, repeat):
+  """Best of repeat runs of a case, each in a fresh process."""
+  best = None
+  for i in range(repeat):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--measure', json.dumps(case)])
+    result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    if best is None or result['parse_secs'] < best['parse_secs']:
+      best = result
+  return best
+
+def log_path(data_dir, collector, size, seed):
+  """Generates the log for a case the first time it is needed."""
+  path = os.path.join(data_dir, '%s-%d-seed%d.log' % (collector, size, seed))
+  if not os.path.exists(path):
+    if not os.path.isdir(data_dir):
+      os.makedirs(data_dir)
+    sys.stderr.write("generating %s\n" % path)
+    generate(collector, size, path + '.tmp', seed)
+    os.rename(path + '.tmp', path)
+  return path
+
+def revision():
+  try:
+    with open(os.devnull, 'w') as devnull:
+      return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=benchmarks_dir, stderr=devnull).decode('utf-8').strip()
+  except (OSError, subprocess.CalledProcessError), e:
+    return None
+
+def load_results(path):
+  if not os.path.exists(path):
+    return []
+  with open(path) as f:
+    return [json.loads(line) for line in f if line.strip()]
+
+def case_key(result):
+  return (result['collector'], result['size'], result['jobs'], result['render'])
+
+def baseline_for(result, previous, label):
+  """The latest earlier result for the same case, from the run labelled
+  label when one is given."""
+  for candidate in reversed(previous):
+    if case_key(candidate) == case_key(result) and (label is None or candidate.get('label') == label):
+      return candidate
+  return None
+
+def change(new, old):
+  if new is None or not old:
+    return ''
+  return "%+.1f%%" % ((new - old) * 100.0 / old)
+
+def report(results, previous, label):
+  print("%-9s %8s %5s %10s %12s %9s %9s %9s %8s %9s %9s" % ('collector', 'size', 'jobs', 'MB/sec', 'lines/sec', 'change', 'rss(MB)', 'change', 'render', 'change', 'baseline'))
+  for result in results:
+    base = baseline_for(result, previous, label) or {}
+    print("%-9s %7.0fM %5d %10.1f %12.0f %9s %9.1f %9s %8s %9s %9s" % (
+        result['collector'], result['size'] / 1048576.0, result['jobs'], result['mb_per_sec'], result['lines_per_sec'],
+        change(result['lines_per_sec'], base.get('lines_per_sec')), result['peak_rss_mb'], change(result['peak_rss_mb'], base.get('peak_rss_mb')),
+        result['render_secs'] is None and '-' or "%.2fs" % result['render_secs'], change(result['render_secs'], base.get('render_secs')),
+        base.get('label') or base.get('revision') or '-'))
+
+def main():
+  if len(sys.argv) == 3 and sys.argv[1] == '--measure':
+    print(json.dumps(measure(json.loads(sys.argv[2]))))
+    return
+
+  parser = argparse.ArgumentParser(description='Benchmark parsing and rendering of generated gc logs')
+  parser.add_argument('--size', default='100M', help='log size per collector, e.g. 500M or 20G')
+  parser.add_argument('--collectors', default='g1,cms,parallel', help='comma separated, of %s' % ', '.join(sorted(generators)))
+  parser.add_argument('--jobs', default='1', help='comma separated parse process counts to run each log with')
+  parser.add_argument('--render', action='store_true', help='also time rendering the charts, needs gnuplot')
+  parser.add_argument('--render-jobs', type=int, default=1)
+  parser.add_argument('--repeat', type=int, default=1, help='keep the best of this many runs of each case')
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--label', help='name for this run, to compare later runs against with --baseline')
+  parser.add_argument('--baseline', help='compare against the run with this label rather than the previous run')
+  parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'gc_log_visualizer_bench'), help='where the generated logs are kept')
+  parser.add_argument('--results', default=os.path.join(benchmarks_dir, 'results.jsonl'), help='json lines file the results are appended to')
+  args = parser.parse_args()
+
+  collectors = args.collectors.split(',')
+  for collector in collectors:
+    if collector not in generators:
+      parser.error('unknown collector %s' % collector)
+  size = parse_size(args.size)
+  previous = load_results(args.results)
+  run = {
+    'run': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    'label': args.label,
+    'revision': revision(),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+  }
+
+  results = []
+  for collector in collectors:
+    path = log_path(args.data_dir, collector, size, args.seed)
+    for jobs in [int(jobs) for jobs in args.jobs.split(',')]:
+      case = {'path': path, 'jobs': jobs, 'render': args.render, 'render_jobs': args.render_jobs}
+      result = dict(run, collector=collector, size=size, jobs=jobs, render=args.render, seed=args.seed)
+      result.update(run_case(case, args.repeat))
+      results.append(result)
+      with open(args.results, 'a') as f:
+        f.write(json.dumps(result, sort_keys=True) + '\n')
+
+  report(results, previous, args.baseline)
+
+if __name__ == '__main__':
+  main()
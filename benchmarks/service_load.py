@@ -0,0 +1,158 @@
+#!python
+
+# Load test of the serve subcommand: many clients uploading logs at once,
+# a share of them the same log so that deduplication is exercised, each
+# waiting for its report. The service is started on a free port with a
+# root of its own unless --url points at one already running.
+#
+#   python benchmarks/service_load.py --clients 32 --submissions 200 --distinct 20 --size 2M
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import signal
+import argparse
+import httplib
+import urlparse
+import threading
+import subprocess
+import tempfile
+import shutil
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, benchmarks_dir)
+from generate_logs import generators, generate, parse_size
+
+def request(url, method='GET', body=None):
+  """The status, headers and json body of a request to the service."""
+  parts = urlparse.urlparse(url)
+  connection = httplib.HTTPConnection(parts.hostname, parts.port, timeout=600)
+  try:
+    connection.request(method, parts.path + (parts.query and '?' + parts.query), body)
+    response = connection.getresponse()
+    return response.status, dict(response.getheaders()), json.loads(response.read())
+  finally:
+    connection.close()
+
+class Client(threading.Thread):
+  """Submits logs taken from a shared list until it is empty, waiting
+  for each report."""
+
+  def __init__(self, url, submissions, logs, poll):
+    threading.Thread.__init__(self)
+    self.daemon = True
+    self.url = url
+    self.submissions = submissions
+    self.logs = logs
+    self.poll = poll
+    self.results = []
+
+  def run(self):
+    while True:
+      try:
+        log = self.submissions.pop()
+      except IndexError:
+        return
+      self.results.append(self.submit(log))
+
+  def submit(self, log):
+    start = time.time()
+    rejected = 0
+    while True:
+      status, headers, job = request(self.url + '/jobs', 'POST', self.logs[log])
+      if status != 503:
+        break
+      rejected += 1
+      time.sleep(float(headers.get('retry-after', 1)))
+    if status not in (200, 202):
+      return {'log': log, 'error': job.get('error'), 'secs': time.time() - start, 'rejected': rejected}
+    duplicate = job['duplicate']
+    while job['status'] == 'pending':
+      time.sleep(self.poll)
+      status, headers, job = request(self.url + job['url'])
+    summary = [path for path in job['files'] if path.endswith('summary.json')]
+    if job['status'] == 'done' and summary:
+      request(self.url + summary[0])
+    return {'log': log, 'id': job['id'], 'status': job['status'], 'error': job['error'], 'duplicate': duplicate,
+            'secs': time.time() - start, 'rejected': rejected}
+
+def start_service(args, root):
+  command = [sys.executable, os.path.join(benchmarks_dir, '..', 'gc_log_visualizer.py'), 'serve', '--port', '0',
+             '--root', root, '--jobs', str(args.jobs), '--queue', str(args.queue)]
+  if not args.charts:
+    command.append('--no-charts')
+  process = subprocess.Popen(command, stderr=subprocess.PIPE)
+  line = process.stderr.readline()
+  m = re.search('(http://[^/]+)', line)
+  if not m:
+    process.kill()
+    raise RuntimeError('the service did not start: %s' % line.strip())
+  return process, m.group(1)
+
+def percentile(values, pct):
+  values = sorted(values)
+  return values[max(0, int(round(pct / 100.0 * len(values))) - 1)] if values else 0
+
+def main():
+  parser = argparse.ArgumentParser(description='Drive concurrent log submissions against the serve subcommand')
+  parser.add_argument('--url', help='a running service, e.g. http://127.0.0.1:8421, rather than starting one')
+  parser.add_argument('--clients', type=int, default=32, help='submissions in flight at once')
+  parser.add_argument('--submissions', type=int, default=200)
+  parser.add_argument('--distinct', type=int, default=20, help='different logs among the submissions, the rest repeat them')
+  parser.add_argument('--size', default='2M', help='size of each log')
+  parser.add_argument('--collector', choices=sorted(generators), default='g1')
+  parser.add_argument('--jobs', type=int, default=4, help='worker processes of the started service')
+  parser.add_argument('--queue', type=int, default=16, help='pending jobs the started service takes before turning submissions away')
+  parser.add_argument('--charts', action='store_true', help='have the started service render pngs too, needs gnuplot')
+  parser.add_argument('--poll', type=float, default=0.2, help='secs between status requests')
+  args = parser.parse_args()
+
+  work_dir = tempfile.mkdtemp(prefix='gc_log_visualizer_load.')
+  process = None
+  try:
+    logs = []
+    size = parse_size(args.size)
+    for seed in range(1, args.distinct + 1):
+      path = os.path.join(work_dir, 'gc-%d.log' % seed)
+      generate(args.collector, size, path, seed)
+      with open(path, 'rb') as f:
+        logs.append(f.read())
+    url = args.url
+    if url is None:
+      process, url = start_service(args, os.path.join(work_dir, 'service'))
+
+    # every log at least once, then repeats in no particular order
+    submissions = [i % args.distinct for i in range(args.submissions)]
+    random.Random(1).shuffle(submissions)
+    clients = [Client(url, submissions, logs, args.poll) for i in range(args.clients)]
+    start = time.time()
+    for client in clients:
+      client.start()
+    for client in clients:
+      client.join()
+    elapsed = time.time() - start
+  finally:
+    if process is not None:
+      # as ^C would, so it takes its workers down with it
+      process.send_signal(signal.SIGINT)
+      process.wait()
+    shutil.rmtree(work_dir)
+
+  results = [result for client in clients for result in client.results]
+  secs = [result['secs'] for result in results]
+  failed = [result for result in results if result.get('status') != 'done']
+  print("%d submissions of %d logs of %s from %d clients in %.2f secs, %.1f submissions/sec" % (
+      len(results), args.distinct, args.size, args.clients, elapsed, len(results) / elapsed))
+  print("jobs run %d, deduplicated %d, turned away and retried %d, failed %d" % (
+      len(set(result.get('id') for result in results if not result.get('duplicate'))),
+      sum(1 for result in results if result.get('duplicate')), sum(result['rejected'] for result in results), len(failed)))
+  print("secs to report: p50 %.2f, p90 %.2f, p99 %.2f, max %.2f" % (percentile(secs, 50), percentile(secs, 90), percentile(secs, 99), max(secs)))
+  for result in failed[:5]:
+    print("failed: %s" % (result.get('error')))
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,51 @@
+#!python
+
+# Micro-benchmark of log timestamp parsing, the cached TimestampParser
+# against the dateutil.parser.parse + strftime it replaced.
+#
+#   python benchmarks/timestamp_parsing.py <optional number of timestamps>
+
+import sys
+import os
+import time
+import datetime
+import dateutil.parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gc_log_visualizer import TimestampParser, timestamp_string
+
+def timestamps(count, lines_per_second):
+  start = datetime.datetime(2016, 4, 30, 6, 11, 3)
+  for i in range(count):
+    ts = start + datetime.timedelta(seconds=i / lines_per_second, milliseconds=i % 1000)
+    yield ts.strftime("%Y-%m-%dT%H:%M:%S.") + "%03d+0000" % (ts.microsecond / 1000)
+
+def dateutil_parse(tokens):
+  for t in tokens:
+    dateutil.parser.parse(t).strftime("%Y-%m-%d:%H:%M:%S")
+
+def cached_parse(tokens):
+  parser = TimestampParser()
+  for t in tokens:
+    parser.parse(t)
+
+def timed(name, fn, tokens):
+  start = time.time()
+  fn(tokens)
+  elapsed = time.time() - start
+  print("%-10s %8.3f secs %10.0f timestamps/sec" % (name, elapsed, len(tokens) / elapsed))
+  return elapsed
+
+def main():
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+  # a busy G1 log writes about 20 timestamped lines per second
+  tokens = list(timestamps(count, 20))
+  for t in tokens[:1000]:
+    assert timestamp_string(TimestampParser().parse(t)) == dateutil.parser.parse(t).strftime("%Y-%m-%d:%H:%M:%S")
+
+  slow = timed('dateutil', dateutil_parse, tokens)
+  fast = timed('cached', cached_parse, tokens)
+  print("speedup %.1fx" % (slow / fast))
+
+if __name__ == '__main__':
+  main()
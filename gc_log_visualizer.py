@@ -4,7 +4,41 @@ import sys
 import re
 import tempfile
 import os
+import argparse
+import multiprocessing
+import subprocess
+import threading
+import Queue
+import time
+import datetime
+import calendar
+import shutil
+import array
+import glob
+import math
+import contextlib
+import json
+import hashlib
+import bisect
+import mmap
+import gzip
+import cStringIO
+import cgi
+import struct
+import zipfile
+import socket
+import signal
+import mimetypes
+import urlparse
+import base64
+import BaseHTTPServer
+import SocketServer
+from itertools import izip, islice, imap
 import dateutil.parser
+try:
+  import numpy
+except ImportError:
+  numpy = None
 
 class StwSubTimings:
   def __init__(self):
@@ -24,39 +58,1433 @@ class StwSubTimings:
     else:
       return 0
 
+class TimestampParser:
+  """Parses leading log timestamps into milliseconds since the epoch of the
+  wall-clock time as logged, its utc offset is not applied. The JVM's
+  2016-04-30T06:11:03.626+0000 format is handled directly, with the
+  seconds cached for the second it falls in. Anything else goes through
+  dateutil."""
+
+  isoPattern = re.compile('([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})\.[0-9]{3}[+-][0-9]{4}$')
+
+  def __init__(self):
+    self.second = None
+    self.second_millis = None
+
+  def parse(self, t):
+    # most lines are logged in the same second as the one before
+    if len(t) == 28 and t[:19] == self.second and t[20:23].isdigit():
+      return self.second_millis + int(t[20:23])
+
+    m = TimestampParser.isoPattern.match(t)
+    if m:
+      fields = [int(field) for field in m.groups()]
+      try:
+        # reject the same out of range fields dateutil would
+        datetime.datetime(*fields)
+      except ValueError, e:
+        return None
+      self.second = t[:19]
+      self.second_millis = calendar.timegm(fields) * 1000
+      return self.second_millis + int(t[20:23])
+
+    try:
+      ts = dateutil.parser.parse(t)
+    except (ValueError, AttributeError), e:
+      return None
+    return calendar.timegm(ts.timetuple()) * 1000 + ts.microsecond // 1000
+
+def timestamp_string(millis):
+  return time.strftime("%Y-%m-%d:%H:%M:%S", time.gmtime(millis // 1000))
+
+def timestamp_millis(s):
+  """The inverse of timestamp_string, for the start/end arguments."""
+  return calendar.timegm(time.strptime(s, "%Y-%m-%d:%H:%M:%S")) * 1000
+
+def min_max_rows(timestamps, columns, buckets):
+  """Indices of the rows holding the smallest and largest value of each
+  column in each of buckets equal slices of time, so spikes survive.
+  Every row falls in exactly one slice even when timestamps step back."""
+  first, last = timestamps[0], timestamps[-1]
+  width = (last - first) / float(buckets)
+  rows = set([0, len(timestamps) - 1])
+  lo = 0
+  for bucket in range(1, buckets + 1):
+    if bucket == buckets:
+      hi = len(timestamps)
+    else:
+      hi = max(lo, bisect.bisect_left(timestamps, first + bucket * width, lo))
+    if hi > lo:
+      for column in columns:
+        values = column[lo:hi]
+        rows.add(lo + values.index(min(values)))
+        rows.add(lo + values.index(max(values)))
+    lo = hi
+  return rows
+
+def lttb_rows(timestamps, column, threshold):
+  """Indices of the threshold rows Largest-Triangle-Three-Buckets picks to
+  keep the shape of a line: the first and last rows, and from each bucket
+  between the row making the largest triangle with the row picked from
+  the bucket before and the average of the bucket after."""
+  count = len(column)
+  if threshold >= count or threshold < 3:
+    return set(range(count))
+  every = (count - 2) / float(threshold - 2)
+  rows = set([0, count - 1])
+  a = 0
+  for bucket in range(threshold - 2):
+    lo = int(bucket * every) + 1
+    hi = int((bucket + 1) * every) + 1
+    next_lo, next_hi = hi, min(int((bucket + 2) * every) + 1, count)
+    if bucket == threshold - 3:
+      next_lo, next_hi = count - 1, count
+    cx = math.fsum(timestamps[next_lo:next_hi]) / (next_hi - next_lo)
+    cy = math.fsum(column[next_lo:next_hi]) / (next_hi - next_lo)
+    ax, ay = timestamps[a], column[a]
+    # twice the triangle's area is |dx*(y - ay) - (x - ax)*dy|, only the
+    # ordering matters so the constant terms are folded together
+    dx, dy = cx - ax, cy - ay
+    offset = dy * ax - dx * ay
+    areas = [abs(dx * y - dy * x + offset) for x, y in izip(timestamps[lo:hi], column[lo:hi])]
+    a = lo + areas.index(max(areas))
+    rows.add(a)
+  return rows
+
+class Series:
+  """One output of the parser held column-wise, a wall-clock millis
+  timestamp column followed by typed value columns. Series plotted as
+  lines are decimated with LTTB, the rest keep each slice's extremes."""
+
+  def __init__(self, filename, fields, line_format, lines=False):
+    self.filename = filename
+    self.fields = ('timestamp',) + tuple(name for name, typecode in fields)
+    self.columns = [array.array('d')] + [array.array(typecode) for name, typecode in fields]
+    self.line_format = line_format
+    self.lines = lines
+
+  def __len__(self):
+    return len(self.columns[0])
+
+  def append(self, *values):
+    for column, value in izip(self.columns, values):
+      column.append(value)
+
+  def column(self, field):
+    return self.columns[self.fields.index(field)]
+
+  def trim(self, start, end):
+    """Drops the rows stamped before start or at or after end millis."""
+    rows = [i for i, timestamp in enumerate(self.columns[0]) if start <= timestamp < end]
+    if len(rows) == len(self):
+      return
+    if not rows or rows[-1] - rows[0] + 1 == len(rows):
+      # in order, as a log whose clock never steps back is
+      first, last = rows and (rows[0], rows[-1] + 1) or (0, 0)
+      self.columns = [column[first:last] for column in self.columns]
+    else:
+      self.columns = [array.array(column.typecode, (column[i] for i in rows)) for column in self.columns]
+
+  def decimate(self, max_points, width):
+    """Sorted indices of at most about max_points rows that chart the same
+    as the whole series at width pixels, or None to keep every row."""
+    if not max_points or len(self) <= max_points:
+      return None
+    timestamps, columns = self.columns[0], self.columns[1:]
+    if self.lines:
+      threshold = max(3, min(max_points // len(columns), 2 * width))
+      rows = set()
+      for column in columns:
+        rows.update(lttb_rows(timestamps, column, threshold))
+    else:
+      # one bucket per pixel is all a png can show
+      rows = min_max_rows(timestamps, columns, max(1, min(max_points // (2 * len(columns)), width)))
+    return sorted(rows)
+
+  def write_dat(self, path, first=0, rows=None):
+    """Writes the whitespace separated text gnuplot reads, appending the
+    rows from first on when first is given, or only the rows whose indices
+    are given."""
+    second = None
+    with open(path, 'a' if first else 'w') as f:
+      if rows is None:
+        selected = islice(izip(*self.columns), first, None)
+      else:
+        selected = (tuple(column[i] for column in self.columns) for i in rows)
+      for row in selected:
+        if row[0] // 1000 != second:
+          second = row[0] // 1000
+          second_string = timestamp_string(row[0])
+        f.write(self.line_format % ((second_string,) + row[1:]))
+
+  def tofile(self, f):
+    for column in self.columns:
+      column.tofile(f)
+
+  def fromfile(self, f, count):
+    for column in self.columns:
+      column.fromfile(f, count)
+
+class Event(object):
+  """A parsed gc event, timestamp in wall-clock millis. The fields of each
+  kind are its __slots__, which keeps the records small."""
+
+  __slots__ = ('timestamp',)
+  fields = __slots__
+
+  def __repr__(self):
+    return "%s(%s)" % (self.__class__.__name__, ', '.join("%s=%r" % (field, getattr(self, field)) for field in self.fields))
+
+class PauseEvent(Event):
+  """A stop the world pause of pause secs. mixed is whether it fell in a
+  G1 mixed gc run and full_gc whether it was a full gc, the sub-timings are
+  G1's, in millis."""
+
+  __slots__ = ('pause', 'mixed', 'ext_root_scan', 'update_rs', 'scan_rs', 'object_copy', 'termination', 'other', 'unknown', 'full_gc')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, pause, mixed, ext_root_scan, update_rs, scan_rs, object_copy, termination, other, unknown, full_gc=False):
+    self.timestamp = timestamp
+    self.pause = pause
+    self.mixed = mixed
+    self.ext_root_scan = ext_root_scan
+    self.update_rs = update_rs
+    self.scan_rs = scan_rs
+    self.object_copy = object_copy
+    self.termination = termination
+    self.other = other
+    self.unknown = unknown
+    self.full_gc = full_gc
+
+class HeapSnapshot(Event):
+  """Heap sizes in MB, before the gc and after it for the total."""
+
+  __slots__ = ('full_gc', 'pre_gc_young', 'pre_gc_young_target', 'pre_gc_total', 'post_gc_total', 'tenured_delta')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, full_gc, pre_gc_young, pre_gc_young_target, pre_gc_total, post_gc_total, tenured_delta):
+    self.timestamp = timestamp
+    self.full_gc = full_gc
+    self.pre_gc_young = pre_gc_young
+    self.pre_gc_young_target = pre_gc_young_target
+    self.pre_gc_total = pre_gc_total
+    self.post_gc_total = post_gc_total
+    self.tenured_delta = tenured_delta
+
+  @property
+  def pre_gc_tenured(self):
+    return self.pre_gc_total - self.pre_gc_young
+
+class MixedCycle(Event):
+  """A G1 mixed gc run, from the first mixed gc to the last, duration in
+  millis and count the gcs in it."""
+
+  __slots__ = ('duration', 'count')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, duration, count):
+    self.timestamp = timestamp
+    self.duration = duration
+    self.count = count
+
+class ConcurrentMarkCycle(Event):
+  """A G1 concurrent mark cycle from root region scan start, duration in
+  millis."""
+
+  __slots__ = ('duration',)
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, duration):
+    self.timestamp = timestamp
+    self.duration = duration
+
+class HumongousAlloc(Event):
+  """An allocation request of size bytes that started a concurrent cycle."""
+
+  __slots__ = ('size',)
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, size):
+    self.timestamp = timestamp
+    self.size = size
+
+class ToSpaceExhaustion(Event):
+  __slots__ = ()
+
+  def __init__(self, timestamp):
+    self.timestamp = timestamp
+
+class Reclaimable(Event):
+  """Bytes reclaimable by a mixed gc run, when over the waste threshold."""
+
+  __slots__ = ('reclaimable',)
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, reclaimable):
+    self.timestamp = timestamp
+    self.reclaimable = reclaimable
+
+class CmsPhase(Event):
+  """A CMS concurrent mark or final remark rescan, duration in secs."""
+
+  __slots__ = ('phase', 'duration')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, phase, duration):
+    self.timestamp = timestamp
+    self.phase = phase
+    self.duration = duration
+
+class PausePercentiles(Event):
+  """Pause percentiles in millis over the window starting at timestamp,
+  and the percent of the window spent paused."""
+
+  __slots__ = ('count', 'p50', 'p90', 'p99', 'p999', 'max', 'pct_in_gc')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, count, p50, p90, p99, p999, max, pct_in_gc):
+    self.timestamp = timestamp
+    self.count = count
+    self.p50 = p50
+    self.p90 = p90
+    self.p99 = p99
+    self.p999 = p999
+    self.max = max
+    self.pct_in_gc = pct_in_gc
+
+class SafepointStop(Event):
+  """A stop of the application threads, for a GC pause or any other
+  safepoint, in secs, with the secs taken to bring the threads to the
+  safepoint, 0 when not logged."""
+
+  __slots__ = ('stopped', 'time_to_safepoint', 'gc')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, stopped, time_to_safepoint, gc):
+    self.timestamp = timestamp
+    self.stopped = stopped
+    self.time_to_safepoint = time_to_safepoint
+    self.gc = gc
+
+class SafepointWindow(Event):
+  """The stops in the window starting at timestamp, the percent of the
+  window stopped in all, in GC pauses and in other safepoints, and the
+  longest time to safepoint in millis."""
+
+  __slots__ = ('count', 'gc_count', 'stopped_pct', 'gc_pct', 'non_gc_pct', 'max_time_to_safepoint')
+  fields = Event.fields + __slots__
+
+  def __init__(self, timestamp, count, gc_count, stopped_pct, gc_pct, non_gc_pct, max_time_to_safepoint):
+    self.timestamp = timestamp
+    self.count = count
+    self.gc_count = gc_count
+    self.stopped_pct = stopped_pct
+    self.gc_pct = gc_pct
+    self.non_gc_pct = non_gc_pct
+    self.max_time_to_safepoint = max_time_to_safepoint
+
+class EventStore:
+  """The series produced by a LogParser, recorded from its events."""
+
+  recorders = {
+    PauseEvent: 'record_pause',
+    HeapSnapshot: 'record_heap',
+    MixedCycle: 'record_mixed_cycle',
+    ConcurrentMarkCycle: 'record_concurrent_mark',
+    HumongousAlloc: 'record_humongous',
+    ToSpaceExhaustion: 'record_exhaustion',
+    Reclaimable: 'record_reclaimable',
+    CmsPhase: 'record_cms_phase',
+    PausePercentiles: 'record_pause_percentiles',
+    SafepointStop: 'record_safepoint',
+    SafepointWindow: 'record_safepoint_window',
+  }
+
+  def __init__(self):
+    self.pause = Series('pause.dat', (('pause', 'd'), ('ext_root_scan', 'l'), ('update_rs', 'l'), ('scan_rs', 'l'), ('object_copy', 'l'), ('termination', 'l'), ('other', 'l'), ('unknown', 'l')), "%s %.6f %d %d %d %d %d %d %d\n")
+    self.young_pause = Series('young-pause.dat', (('pause', 'd'),), "%s %.6f\n")
+    self.mixed_pause = Series('mixed-pause.dat', (('pause', 'd'),), "%s %.6f\n")
+    self.full_pause = Series('full-pause.dat', (('pause', 'd'),), "%s %.6f\n")
+    self.pause_percentiles = Series('pause_percentiles.dat', (('count', 'l'), ('p50', 'd'), ('p90', 'd'), ('p99', 'd'), ('p999', 'd'), ('max', 'd'), ('pct_in_gc', 'd')), "%s %d %.3f %.3f %.3f %.3f %.3f %.4f\n", lines=True)
+    self.full_gc = Series('full_gc.dat', (('pre_gc_total', 'l'), ('post_gc_total', 'l')), "%s %s %s\n")
+    self.gc = Series('gc.dat', (('pre_gc_total', 'l'), ('post_gc_total', 'l')), "%s %s %s\n")
+    self.young = Series('young.dat', (('pre_gc_young', 'l'), ('pre_gc_young_target', 'l'), ('pre_gc_tenured', 'l'), ('pre_gc_total', 'l'), ('tenured_delta', 'l'), ('full_gc', 'l')), "%s %s %s %s %s %s %d\n", lines=True)
+    self.root_scan = Series('rootscan.dat', (('duration', 'l'),), "%s %s\n")
+    self.cms_mark = Series('cms_mark.dat', (('pause', 'd'),), "%s %.6f\n")
+    self.cms_rescan = Series('cms_rescan.dat', (('pause', 'd'),), "%s %.6f\n")
+    self.mixed_duration = Series('mixed_duration.dat', (('duration', 'l'), ('count', 'l')), "%s %s %s\n")
+    self.exhaustion = Series('exhaustion.dat', (('marker', 'l'),), "%s %s\n")
+    self.humongous_objects = Series('humongous_objects.dat', (('size_kb', 'l'),), "%s %s\n")
+    self.reclaimable = Series('reclaimable.dat', (('reclaimable', 'l'),), "%s %d\n")
+    self.safepoints = Series('safepoints.dat', (('stopped', 'd'), ('time_to_safepoint', 'd'), ('gc', 'l')), "%s %.6f %.6f %d\n")
+    self.safepoint_windows = Series('safepoint_windows.dat', (('count', 'l'), ('gc_count', 'l'), ('stopped_pct', 'd'), ('gc_pct', 'd'), ('non_gc_pct', 'd'), ('max_time_to_safepoint', 'd')), "%s %d %d %.4f %.4f %.4f %.3f\n", lines=True)
+
+  def record(self, event):
+    getattr(self, EventStore.recorders[type(event)])(event)
+
+  def record_pause(self, event):
+    if event.full_gc:
+      self.full_pause.append(event.timestamp, event.pause)
+    elif event.mixed:
+      self.mixed_pause.append(event.timestamp, event.pause)
+    else:
+      self.young_pause.append(event.timestamp, event.pause)
+    self.pause.append(event.timestamp, event.pause, event.ext_root_scan, event.update_rs, event.scan_rs, event.object_copy,
+                      event.termination, event.other, event.unknown)
+
+  def record_heap(self, event):
+    self.young.append(event.timestamp, event.pre_gc_young, event.pre_gc_young_target, event.pre_gc_tenured, event.pre_gc_total, event.tenured_delta,
+                      event.full_gc)
+    # clean this up, full_gc's should probably graph
+    # in the same chart as regular gc events if possible
+    if event.full_gc:
+      self.full_gc.append(event.timestamp, event.pre_gc_total, event.post_gc_total)
+    else:
+      self.gc.append(event.timestamp, event.pre_gc_total, event.post_gc_total)
+
+  def record_mixed_cycle(self, event):
+    self.mixed_duration.append(event.timestamp, event.duration, event.count)
+
+  def record_concurrent_mark(self, event):
+    self.root_scan.append(event.timestamp, event.duration)
+
+  def record_humongous(self, event):
+    self.humongous_objects.append(event.timestamp, event.size / 1024)
+
+  def record_exhaustion(self, event):
+    self.exhaustion.append(event.timestamp, 100)
+
+  def record_reclaimable(self, event):
+    self.reclaimable.append(event.timestamp, event.reclaimable / 1048576)
+
+  def record_cms_phase(self, event):
+    if event.phase == 'mark':
+      self.cms_mark.append(event.timestamp, event.duration)
+    else:
+      self.cms_rescan.append(event.timestamp, event.duration)
+
+  def record_pause_percentiles(self, event):
+    self.pause_percentiles.append(event.timestamp, event.count, event.p50, event.p90, event.p99, event.p999, event.max, event.pct_in_gc)
+
+  def record_safepoint(self, event):
+    self.safepoints.append(event.timestamp, event.stopped, event.time_to_safepoint, event.gc)
+
+  def record_safepoint_window(self, event):
+    self.safepoint_windows.append(event.timestamp, event.count, event.gc_count, event.stopped_pct, event.gc_pct, event.non_gc_pct, event.max_time_to_safepoint)
+
+  def all_series(self):
+    return [self.pause, self.young_pause, self.mixed_pause, self.full_pause, self.pause_percentiles, self.full_gc, self.gc, self.young,
+            self.root_scan, self.cms_mark, self.cms_rescan, self.mixed_duration, self.exhaustion,
+            self.humongous_objects, self.reclaimable, self.safepoints, self.safepoint_windows]
+
+class GnuplotSession:
+  """A long running gnuplot process that charts are streamed to over a
+  pipe, instead of starting gnuplot once per chart."""
+
+  chartOutputPattern = re.compile('.*set output "([^"]*)"')
+  marker = '__chart_done__'
+
+  def __init__(self):
+    self.process = None
+    self.start_error = None
+
+  def start(self):
+    """Starts gnuplot, returning False, having reported why once, if it
+    can't be, say because it isn't installed."""
+    if self.start_error is None:
+      try:
+        self.process = subprocess.Popen(['gnuplot'], stdin=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        return True
+      except EnvironmentError, e:
+        self.start_error = e
+        sys.stderr.write("could not start gnuplot: %s\n" % e)
+    return False
+
+  def close(self):
+    if self.process:
+      try:
+        self.process.stdin.close()
+      except EnvironmentError, e:
+        pass
+      self.process.wait()
+      self.process = None
+
+  def render(self, chart):
+    """Runs the commands for one chart and returns the wall-clock seconds
+    it took, or None if gnuplot failed on it."""
+    if self.process is None and not self.start():
+      return None
+
+    start = time.time()
+    try:
+      # reset so one chart's settings don't leak into the next, closing
+      # the output writes out the png. The marker is printed to stderr on
+      # its own line so that it is still reached when the chart errors.
+      self.process.stdin.write("reset\n%s\nset output\nset print\nprint \"%s\"\n" % (chart, GnuplotSession.marker))
+      self.process.stdin.flush()
+      for line in iter(self.process.stderr.readline, ''):
+        if line.rstrip() == GnuplotSession.marker:
+          return time.time() - start
+        sys.stderr.write(line)
+    except EnvironmentError, e:
+      pass
+
+    # gnuplot exits on some errors, start a new one for the next chart
+    self.close()
+    return None
+
+class ChartRenderer:
+  """Renders gnuplot chart commands over up to jobs gnuplot sessions as
+  they are added, so the charts whose data is written out are rendered
+  while the data of the rest is still being written. join() waits for
+  them all."""
+
+  def __init__(self, jobs=1, verbose=True):
+    self.jobs = max(1, jobs)
+    self.verbose = verbose
+    self.pending = Queue.Queue()
+    self.workers = []
+    self.timings = []
+    self.count = 0
+    self.start = time.time()
+
+  def append(self, chart):
+    self.count += 1
+    self.pending.put(chart)
+    if len(self.workers) < self.jobs:
+      worker = threading.Thread(target=self.work)
+      # a failure writing the data of a later chart mustn't leave the
+      # workers waiting on it
+      worker.daemon = True
+      worker.start()
+      self.workers.append(worker)
+
+  def work(self):
+    session = GnuplotSession()
+    try:
+      for chart in iter(self.pending.get, None):
+        m = GnuplotSession.chartOutputPattern.match(chart)
+        self.timings.append((m.group(1) if m else chart[:40], session.render(chart)))
+    finally:
+      session.close()
+
+  def join(self):
+    """Waits for the charts to render, reporting the wall-clock time taken
+    by each chart when verbose. Returns the (chart name, secs) of each
+    chart, secs None for a failed one."""
+    for worker in self.workers:
+      self.pending.put(None)
+    for worker in self.workers:
+      worker.join()
+    elapsed = time.time() - self.start
+
+    if self.verbose:
+      # slowest first
+      for chart_name, secs in sorted(self.timings, key=lambda timing: timing[1] or 0, reverse=True):
+        if secs is None:
+          print("%-40s failed" % chart_name)
+        else:
+          print("%-40s %.3f secs" % (chart_name, secs))
+      rendered = sum(1 for chart_name, secs in self.timings if secs is not None)
+      if rendered == self.count:
+        print("rendered %d charts in %.3f secs" % (rendered, elapsed))
+      else:
+        print("rendered %d of %d charts in %.3f secs, %d failed" % (rendered, self.count, elapsed, self.count - rendered))
+    return self.timings
+
+def summarize_pauses(histogram, span, exhaustion, humongous):
+  """Headline numbers from a pause histogram covering span secs."""
+  p50, p90, p99, p999, max_pause = histogram.percentiles([50, 90, 99, 99.9, 100])
+  return {
+    'pauses': histogram.count,
+    'p50_ms': p50 / 1000.0,
+    'p90_ms': p90 / 1000.0,
+    'p99_ms': p99 / 1000.0,
+    'p999_ms': p999 / 1000.0,
+    'max_ms': max_pause / 1000.0,
+    'span_secs': span,
+    'gc_pct': histogram.total / (span * 10000.0) if span else 0,
+    'exhaustion': exhaustion,
+    'humongous': humongous,
+  }
+
+class PauseHistogram:
+  """Log-linear (HDR style) histogram of pause times in microseconds.
+  Pauses under subBuckets micros are counted exactly, longer ones in
+  buckets 1/halfBuckets of their magnitude wide, so percentiles are within
+  1.6% and the buckets used stay few. Histograms merge by adding counts."""
+
+  subBucketBits = 7
+  subBuckets = 1 << subBucketBits
+  halfBuckets = subBuckets // 2
+
+  def __init__(self):
+    # sparse, bucket index -> count
+    self.counts = {}
+    self.count = 0
+    self.total = 0
+    self.max = 0
+
+  def record(self, pause_time):
+    value = int(round(pause_time * 1000000))
+    index = self.bucket(value)
+    self.counts[index] = self.counts.get(index, 0) + 1
+    self.count += 1
+    self.total += value
+    if value > self.max:
+      self.max = value
+
+  def bucket(self, value):
+    if value < PauseHistogram.subBuckets:
+      return value
+    shift = value.bit_length() - PauseHistogram.subBucketBits
+    return shift * PauseHistogram.halfBuckets + (value >> shift)
+
+  def highest_in_bucket(self, index):
+    if index < PauseHistogram.subBuckets:
+      return index
+    shift = index // PauseHistogram.halfBuckets - 1
+    return ((index - shift * PauseHistogram.halfBuckets + 1) << shift) - 1
+
+  def merge(self, other):
+    for index, count in other.counts.items():
+      self.counts[index] = self.counts.get(index, 0) + count
+    self.count += other.count
+    self.total += other.total
+    self.max = max(self.max, other.max)
+
+  def percentiles(self, pcts):
+    """Micros at each of the ascending percentiles pcts, the highest value
+    of the bucket the nearest rank falls in and never more than the max."""
+    values = []
+    if not self.count:
+      return [0] * len(pcts)
+    ranks = [max(1, int(math.ceil(pct / 100.0 * self.count))) for pct in pcts]
+    seen = 0
+    for index, count in sorted(self.counts.items()):
+      seen += count
+      while ranks and seen >= ranks[0]:
+        values.append(min(self.highest_in_bucket(index), self.max))
+        ranks.pop(0)
+    return values + [self.max] * len(ranks)
+
+  def state(self):
+    return {'counts': sorted(self.counts.items()), 'count': self.count, 'total': self.total, 'max': self.max}
+
+  def restore(self, state):
+    self.counts = dict((index, count) for index, count in state['counts'])
+    self.count = state['count']
+    self.total = state['total']
+    self.max = state['max']
+
+def histogram_from_state(state):
+  histogram = PauseHistogram()
+  histogram.restore(state)
+  return histogram
+
+class Profiler:
+  """Opt-in counts and timings of the parse handlers and of the phases of
+  a run. Handlers are only wrapped, on the LogParser given to instrument(),
+  when enabled, so a disabled profiler costs nothing per line."""
+
+  def __init__(self, enabled=False):
+    self.enabled = enabled
+    # handler name -> [calls, matched, secs]
+    self.handlers = {}
+    self.transitions = {}
+    self.transition_count = 0
+    self.phases = []
+
+  @contextlib.contextmanager
+  def phase(self, name):
+    start = time.time()
+    try:
+      yield
+    finally:
+      if self.enabled:
+        self.phases.append((name, time.time() - start))
+
+  def instrument(self, logParser):
+    """Wraps the handlers of logParser to count the lines each one sees and
+    matches, where a match is a state transition or a true result."""
+    if not self.enabled:
+      return
+    for name in LogParser.transitions:
+      setattr(logParser, name, self.counted(name, getattr(logParser, name)))
+    for name in LogParser.handlers:
+      setattr(logParser, name, self.timed(name, getattr(logParser, name)))
+
+  def counted(self, name, transition):
+    def counted_transition(*args):
+      self.transition_count += 1
+      self.transitions[name] = self.transitions.get(name, 0) + 1
+      return transition(*args)
+    return counted_transition
+
+  def timed(self, name, handler):
+    stats = self.handlers.setdefault(name, [0, 0, 0.0])
+    def timed_handler(line):
+      transition_count = self.transition_count
+      start = time.time()
+      result = handler(line)
+      stats[2] += time.time() - start
+      stats[0] += 1
+      if result or self.transition_count != transition_count:
+        stats[1] += 1
+      return result
+    return timed_handler
+
+  def stats(self):
+    return {
+      'handlers': dict((name, {'calls': calls, 'matched': matched, 'secs': secs}) for name, (calls, matched, secs) in self.handlers.items()),
+      'transitions': dict(self.transitions),
+      'phases': [{'name': name, 'secs': secs} for name, secs in self.phases],
+    }
+
+  def merge(self, stats):
+    """Adds in the stats() of a profiler from another process."""
+    for name, handler in stats['handlers'].items():
+      totals = self.handlers.setdefault(name, [0, 0, 0.0])
+      totals[0] += handler['calls']
+      totals[1] += handler['matched']
+      totals[2] += handler['secs']
+    for name, count in stats['transitions'].items():
+      self.transitions[name] = self.transitions.get(name, 0) + count
+
+  def report(self):
+    lines = ["%-40s %10s" % ('phase', 'secs')]
+    for name, secs in self.phases:
+      lines.append("%-40s %10.3f" % (name, secs))
+    lines.append('')
+    lines.append("%-40s %10s %10s %10s %11s" % ('handler', 'calls', 'matched', 'secs', 'usecs/call'))
+    for name, (calls, matched, secs) in sorted(self.handlers.items(), key=lambda handler: handler[1][2], reverse=True):
+      lines.append("%-40s %10d %10d %10.3f %11.2f" % (name, calls, matched, secs, secs * 1000000 / calls if calls else 0))
+    lines.append('')
+    lines.append("%-40s %10s" % ('transition', 'count'))
+    for name, count in sorted(self.transitions.items(), key=lambda transition: transition[1], reverse=True):
+      lines.append("%-40s %10d" % (name, count))
+    return '\n'.join(lines) + '\n'
+
+class ParseCache:
+  """Parsed series and parser state kept on disk between runs, one entry
+  per log. An entry is reused as is when the log is unchanged, and as a
+  starting point when the log has only been appended to since."""
+
+  version = 7
+  headBytes = 64 << 10
+  tailBytes = 64 << 10
+  maxBytes = 1 << 30
+
+  def __init__(self, cache_dir=None, max_bytes=None):
+    if cache_dir is None:
+      cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'gc_log_visualizer')
+    self.cache_dir = cache_dir
+    self.max_bytes = max_bytes or ParseCache.maxBytes
+
+  def entry_path(self, input_file):
+    return os.path.join(self.cache_dir, hashlib.sha1(os.path.abspath(input_file)).hexdigest() + '.cache')
+
+  def digest(self, input_file, start, length):
+    with open(input_file, 'rb') as f:
+      f.seek(start)
+      return hashlib.sha1(f.read(length)).hexdigest()
+
+  def itemsizes(self, store):
+    return [[column.itemsize for column in series.columns] for series in store.all_series()]
+
+  def load(self, logParser):
+    """Restores logParser from the cache entry of its log, returning the
+    byte offset parsing carries on from, or None without a usable entry."""
+    path = self.entry_path(logParser.input_file)
+    try:
+      with open(path, 'rb') as f:
+        header = json.loads(f.readline())
+        if header['version'] != ParseCache.version or header['itemsizes'] != self.itemsizes(logParser.store):
+          return None
+        if header['state']['percentile_window'] != logParser.percentile_window:
+          return None
+        stat = os.stat(logParser.input_file)
+        if self.digest(logParser.input_file, 0, header['head_length']) != header['head_digest']:
+          return None
+        unchanged = stat.st_size == header['size'] and stat.st_mtime == header['mtime']
+        appended = header['resumable'] and stat.st_size >= header['size'] and \
+                   self.digest(logParser.input_file, header['tail_start'], header['size'] - header['tail_start']) == header['tail_digest']
+        if not (unchanged or appended):
+          return None
+        store = EventStore()
+        for series, count in izip(store.all_series(), header['lengths']):
+          series.fromfile(f, count)
+    except (IOError, OSError, ValueError, KeyError, EOFError):
+      return None
+    logParser.store = store
+    logParser.restore(header['state'])
+    logParser.parsed_bytes = header['size']
+    # entries are evicted least recently used first
+    os.utime(path, None)
+    return header['size']
+
+  def load_entry(self, entry):
+    """A LogParser restored from the cache entry file entry as is, without
+    the log it was parsed from, which may be gone by now."""
+    with open(entry, 'rb') as f:
+      header = json.loads(f.readline())
+      logParser = LogParser(header['path'])
+      if header.get('version') != ParseCache.version or header['itemsizes'] != self.itemsizes(logParser.store):
+        raise ValueError("%s is not a parse cache entry of this version" % entry)
+      for series, count in izip(logParser.store.all_series(), header['lengths']):
+        series.fromfile(f, count)
+    logParser.restore(header['state'])
+    logParser.parsed_bytes = header['size']
+    return logParser
+
+  def save(self, logParser):
+    """Writes the cache entry for what logParser has parsed so far, then
+    evicts entries beyond the size bound."""
+    input_file = logParser.input_file
+    size = logParser.parsed_bytes
+    stat = os.stat(input_file)
+    with open(input_file, 'rb') as f:
+      # a partial last line gets parsed again once it is complete, so
+      # only a parse ending on a line boundary can be carried on from
+      f.seek(max(size - 1, 0))
+      resumable = size > 0 and f.read(1) == b'\n'
+    tail_start = max(size - ParseCache.tailBytes, 0)
+    header = {
+      'version': ParseCache.version,
+      'path': os.path.abspath(input_file),
+      'size': size,
+      'mtime': stat.st_mtime if stat.st_size == size else None,
+      'head_length': min(size, ParseCache.headBytes),
+      'head_digest': self.digest(input_file, 0, min(size, ParseCache.headBytes)),
+      'tail_start': tail_start,
+      'tail_digest': self.digest(input_file, tail_start, size - tail_start),
+      'resumable': resumable,
+      'state': logParser.checkpoint(),
+      'itemsizes': self.itemsizes(logParser.store),
+      'lengths': [len(series) for series in logParser.store.all_series()],
+    }
+    if not os.path.isdir(self.cache_dir):
+      os.makedirs(self.cache_dir)
+    path = self.entry_path(input_file)
+    fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(json.dumps(header) + '\n')
+        for series in logParser.store.all_series():
+          series.tofile(f)
+      os.rename(tmp_path, path)
+    except:
+      os.remove(tmp_path)
+      raise
+    self.evict(path)
+
+  def checkpoint(self, logParser):
+    """Saves logParser, warning rather than failing when the cache cannot
+    be written."""
+    try:
+      self.save(logParser)
+    except (IOError, OSError), e:
+      sys.stderr.write("could not write the parse cache: %s\n" % e)
+
+  def evict(self, keep):
+    entries = []
+    for name in os.listdir(self.cache_dir):
+      if name.endswith('.cache'):
+        path = os.path.join(self.cache_dir, name)
+        try:
+          stat = os.stat(path)
+        except OSError, e:
+          # evicted by another run in the meantime
+          continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for mtime, size, path in entries)
+    for mtime, size, path in sorted(entries):
+      if total <= self.max_bytes:
+        break
+      if path != keep:
+        try:
+          os.remove(path)
+        except OSError, e:
+          pass
+        total -= size
+
+def series_name(series):
+  return os.path.splitext(series.filename)[0].replace('-', '_')
+
+def export_columns(series):
+  """The fields and columns of a series as exported, the timestamps as
+  integer epoch millis."""
+  return [(series.fields[0], array.array('l', imap(int, series.columns[0])))] + zip(series.fields[1:], series.columns[1:])
+
+def column_dtype(column):
+  """The numpy dtype string of an array.array."""
+  return '%s%s%d' % ('<' if sys.byteorder == 'little' else '>', 'f' if column.typecode == 'd' else 'i', column.itemsize)
+
+def npy_bytes(column):
+  """An array.array in the .npy format numpy.save writes."""
+  header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (column_dtype(column), len(column))
+  # magic, version, length and header are padded out to 64 bytes
+  header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+  return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header + column.tostring()
+
+def export_npz(store, basefilename):
+  """Writes every series to a single <basefilename>.npz, an array per
+  column named series/field, the way numpy.savez_compressed would. numpy
+  is only needed to read it."""
+  path = '%s.npz' % basefilename
+  with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+    for series in store.all_series():
+      for field, column in export_columns(series):
+        archive.writestr('%s/%s.npy' % (series_name(series), field), npy_bytes(column))
+  return [path]
+
+def export_parquet(store, basefilename):
+  """Writes each series to <basefilename>-<series>.parquet with pyarrow.
+  Snappy is used over the denser codecs as it decodes the fastest."""
+  import pyarrow
+  import pyarrow.parquet
+  paths = []
+  for series in store.all_series():
+    fields, arrays = [], []
+    for field, column in export_columns(series):
+      fields.append(field)
+      arrays.append(pyarrow.array(numpy_column(column)))
+    path = '%s-%s.parquet' % (basefilename, series_name(series))
+    pyarrow.parquet.write_table(pyarrow.Table.from_arrays(arrays, fields), path, compression='snappy')
+    paths.append(path)
+  return paths
+
+def numpy_column(column):
+  """An array.array as a numpy array over the same memory, so only to be
+  held on to while the column isn't appended to."""
+  if not column:
+    return numpy.zeros(0, column_dtype(column))
+  return numpy.frombuffer(column, column_dtype(column))
+
+# see derived_metrics()
+derivedFields = ('allocation_rate', 'promotion_rate', 'old_fill_rate', 'threshold_headroom', 'secs_to_threshold', 'secs_to_full')
+
+def derived_metrics(store, g1, occupancy_threshold=None, max_heap=None, window=5 * 60 * 1000):
+  """Rates and predictions worked out from the heap series with whole
+  array numpy operations, a row per gc, as a dict of numpy arrays. Sizes
+  are in MB and rates in MB/sec, NaN where a row has no value.
+
+    allocation_rate     heap growth from after the gc before to before this
+                        one, over the time between them
+    promotion_rate      what this gc moved to the old gen over the same time,
+                        the tenured delta on g1, otherwise how much the old
+                        gen grew by the next gc
+    old_fill_rate       old gen growth over the window millis up to this gc
+    threshold_headroom  MB to go to occupancy_threshold (IHOP or IOF)
+    secs_to_threshold   until the old gen reaches occupancy_threshold at
+                        old_fill_rate
+    secs_to_full        until the old gen fills max_heap at old_fill_rate,
+                        when a full gc is due
+  """
+  young = store.young
+  timestamps = numpy_column(young.column('timestamp'))
+  old = numpy_column(young.column('pre_gc_tenured')).astype(numpy.float64)
+  pre_total = numpy_column(young.column('pre_gc_total')).astype(numpy.float64)
+  count = len(timestamps)
+
+  # each young row has a gc or a full_gc row, in the order they were
+  # parsed, which the young row's flag says, whatever the timestamps do
+  full = numpy_column(young.column('full_gc')) != 0
+  post_total = numpy.empty(count)
+  post_total[full] = numpy_column(store.full_gc.column('post_gc_total'))
+  post_total[~full] = numpy_column(store.gc.column('post_gc_total'))
+
+  # whole array arithmetic, in place where it saves a copy of a column
+  with numpy.errstate(divide='ignore', invalid='ignore'):
+    # secs since the gc before, none when the clock stood still or stepped back
+    elapsed = numpy.empty(count)
+    elapsed[:1] = numpy.nan
+    numpy.subtract(timestamps[1:], timestamps[:-1], elapsed[1:])
+    elapsed /= 1000.0
+    elapsed[elapsed <= 0] = numpy.nan
+
+    allocation_rate = numpy.empty(count)
+    allocation_rate[:1] = numpy.nan
+    numpy.subtract(pre_total[1:], post_total[:-1], allocation_rate[1:])
+    allocation_rate /= elapsed
+
+    if g1:
+      promotion_rate = numpy_column(young.column('tenured_delta')) / elapsed
+      # a full gc empties the old gen rather than promoting into it
+      promotion_rate[full] = numpy.nan
+    else:
+      promotion_rate = numpy.empty(count)
+      promotion_rate[-1:] = numpy.nan
+      numpy.subtract(old[1:], old[:-1], promotion_rate[:-1])
+      # the old gen shrinks over an old gen collection, which isn't promotion
+      promotion_rate[promotion_rate < 0] = numpy.nan
+      promotion_rate /= elapsed
+
+    # the old gen window millis back, between the gcs either side of then
+    old_fill_rate = old - numpy.interp(timestamps - window, timestamps, old)
+    old_fill_rate /= numpy.minimum(timestamps - timestamps[:1], window) / 1000.0
+    stalled = ~(old_fill_rate > 0)
+
+    nan = numpy.full(count, numpy.nan)
+    threshold_headroom, secs_to_threshold, secs_to_full = nan, nan, nan
+    if occupancy_threshold:
+      threshold_headroom = occupancy_threshold - old
+      secs_to_threshold = numpy.maximum(threshold_headroom, 0)
+      secs_to_threshold /= old_fill_rate
+      secs_to_threshold[stalled] = numpy.nan
+    if max_heap:
+      secs_to_full = numpy.maximum(max_heap - old, 0)
+      secs_to_full /= old_fill_rate
+      secs_to_full[stalled] = numpy.nan
+
+  return {
+    'timestamp': timestamps.copy(),
+    'allocation_rate': allocation_rate,
+    'promotion_rate': promotion_rate,
+    'old_fill_rate': old_fill_rate,
+    'threshold_headroom': threshold_headroom,
+    'secs_to_threshold': secs_to_threshold,
+    'secs_to_full': secs_to_full,
+  }
+
+def derived_series(metrics):
+  """The derived metrics as a series to chart."""
+  series = Series('derived.dat', [(field, 'd') for field in derivedFields], "%s %.3f %.3f %.3f %.1f %.1f %.1f\n")
+  for column, field in izip(series.columns, series.fields):
+    column.fromstring(metrics[field].astype(numpy.float64).tostring())
+  return series
+
+def bucket_bounds(timestamps, width):
+  """The start millis and the first and past the last row of each width
+  millis bucket a timestamp column has rows in."""
+  bounds = []
+  start, first = None, 0
+  for i, timestamp in enumerate(timestamps):
+    bucket = timestamp - timestamp % width
+    if bucket != start:
+      if start is not None:
+        bounds.append((start, first, i))
+      start, first = bucket, i
+  if start is not None:
+    bounds.append((start, first, len(timestamps)))
+  return bounds
+
+def reduce_buckets(bounds, column, reduce):
+  return array.array('d', [column[first] if last - first == 1 else reduce(column[first:last]) for start, first, last in bounds])
+
+class TilePyramid:
+  """The count, min, max and mean of each column of a series over 1s,
+  10s, 1m, 10m and 1h buckets, each level built from the one below. The
+  buckets of a level are cut into tiles of up to tileBuckets, for the html
+  report to load only the ones in view."""
+
+  levels = (1000, 10000, 60000, 600000, 3600000)
+  levelNames = ('1s', '10s', '1m', '10m', '1h')
+  tileBuckets = 1024
+
+  def __init__(self, series):
+    self.name = series_name(series)
+    self.fields = series.fields[1:]
+    # per level, the bucket starts, counts and the mins, maxes and sums of
+    # each column
+    self.pyramid = []
+    timestamps, counts = series.columns[0], None
+    stats = [(column, column, column) for column in series.columns[1:]]
+    for width in TilePyramid.levels:
+      bounds = bucket_bounds(timestamps, width)
+      timestamps = array.array('d', (start for start, first, last in bounds))
+      if counts is None:
+        counts = array.array('l', (last - first for start, first, last in bounds))
+      elif len(bounds) < len(counts):
+        counts = array.array('l', (sum(counts[first:last]) for start, first, last in bounds))
+      # the buckets of sparse series hold a row each until the coarser
+      # levels, those keep the stats of the level below
+      if len(bounds) < len(stats[0][0]):
+        stats = [(reduce_buckets(bounds, mins, min), reduce_buckets(bounds, maxes, max), reduce_buckets(bounds, sums, sum))
+                 for mins, maxes, sums in stats]
+      self.pyramid.append((timestamps, counts, stats))
+
+  def write(self, f):
+    """Writes the tiles to f, returning for each level the [first bucket
+    start, last bucket end, byte offset, bucket count] of its tiles. A tile
+    is the float64 bucket starts, uint32 counts, then the float32 min, max
+    and mean of each column in turn, little-endian, padded to 8 bytes."""
+    index = []
+    for width, (timestamps, counts, stats) in izip(TilePyramid.levels, self.pyramid):
+      tiles = []
+      for first in range(0, len(timestamps), TilePyramid.tileBuckets):
+        last = min(first + TilePyramid.tileBuckets, len(timestamps))
+        arrays = [array.array('d', timestamps[first:last]), array.array('I', counts[first:last])]
+        for mins, maxes, sums in stats:
+          arrays.append(array.array('f', mins[first:last]))
+          arrays.append(array.array('f', maxes[first:last]))
+          arrays.append(array.array('f', (total / count for total, count in izip(sums[first:last], counts[first:last]))))
+        tiles.append([min(timestamps[first:last]), max(timestamps[first:last]) + width, f.tell(), last - first])
+        for column in arrays:
+          if sys.byteorder == 'big':
+            column.byteswap()
+          f.write(column.tostring())
+        f.write(b'\0' * (-f.tell() % 8))
+      index.append(tiles)
+    return index
+
+def export_html(store, basefilename):
+  """Writes <basefilename>.html, a zoomable report of every series with
+  the TilePyramid of each inlined, base64 encoded, so the page opens from
+  a file. It decodes only the tiles of the level and time range in view."""
+  title = os.path.basename(basefilename)
+  index = {'levels': TilePyramid.levels, 'levelNames': TilePyramid.levelNames, 'series': []}
+  tiles = cStringIO.StringIO()
+  for series in store.all_series():
+    if len(series):
+      pyramid = TilePyramid(series)
+      index['series'].append({'name': pyramid.name, 'fields': pyramid.fields, 'levels': pyramid.write(tiles)})
+  index['start'] = min([entry['levels'][-1][0][0] for entry in index['series']] or [0])
+  index['end'] = max([entry['levels'][-1][-1][1] for entry in index['series']] or [0])
+  path = '%s.html' % basefilename
+  # nothing in the index may close the script element, base64 can't
+  head, tail = reportTemplate.replace('__TITLE__', cgi.escape(title)).replace('__INDEX__', json.dumps(index).replace('</', '<\\/')).split('__TILES__')
+  with open(path, 'w') as f:
+    f.write(head)
+    f.write(base64.b64encode(tiles.getvalue()))
+    f.write(tail)
+  return [path]
+
+reportTemplate = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__ gc report</title>
+<style>
+  body { font-family: sans-serif; margin: 1em; }
+  h3 { font-size: 1em; margin: 1em 0 0.3em; }
+  canvas { border: 1px solid #ccc; cursor: crosshair; }
+  #status { color: #666; }
+</style>
+</head>
+<body>
+<h2>__TITLE__</h2>
+<p id="status">scroll to zoom, drag to pan, double click to zoom back out</p>
+<div id="charts"></div>
+<script id="tiles" type="application/octet-stream">__TILES__</script>
+<script>
+var index = __INDEX__;
+var view = [index.start, index.end];
+// every tile, decoded from base64 once
+var buffer = (function () {
+  var text = atob(document.getElementById('tiles').textContent);
+  var bytes = new Uint8Array(text.length);
+  for (var i = 0; i < text.length; i++) {
+    bytes[i] = text.charCodeAt(i);
+  }
+  return bytes.buffer;
+})();
+// decoded tiles by series/level/tile
+var tiles = {};
+var charts = [];
+var width = 1000, height = 240, left = 70, bottom = 20;
+
+function decode(buffer, offset, count, fields) {
+  var tile = {time: new Float64Array(buffer, offset, count), count: new Uint32Array(buffer, offset + 8 * count, count), columns: []};
+  var at = offset + 12 * count;
+  for (var i = 0; i < fields; i++) {
+    tile.columns.push({min: new Float32Array(buffer, at, count), max: new Float32Array(buffer, at + 4 * count, count),
+                       mean: new Float32Array(buffer, at + 8 * count, count)});
+    at += 12 * count;
+  }
+  return tile;
+}
+
+function tile(series, level, t) {
+  var key = series.name + '/' + level + '/' + t;
+  if (!(key in tiles)) {
+    var info = series.levels[level][t];
+    tiles[key] = decode(buffer, info[2], info[3], series.fields.length);
+  }
+  return tiles[key];
+}
+
+// the finest level with no more buckets in view than there are pixels
+function level() {
+  for (var l = 0; l < index.levels.length - 1; l++) {
+    if ((view[1] - view[0]) / index.levels[l] <= width - left) {
+      return l;
+    }
+  }
+  return index.levels.length - 1;
+}
+
+function timeString(millis) {
+  return new Date(millis).toISOString().replace('T', ' ').substring(0, 19);
+}
+
+function Chart(series) {
+  var heading = document.createElement('h3');
+  var select = document.createElement('select');
+  series.fields.forEach(function (field, i) {
+    var option = document.createElement('option');
+    option.value = i;
+    option.textContent = field;
+    select.appendChild(option);
+  });
+  select.onchange = redraw;
+  heading.appendChild(document.createTextNode(series.name + ' '));
+  heading.appendChild(select);
+  this.canvas = document.createElement('canvas');
+  this.canvas.width = width;
+  this.canvas.height = height;
+  document.getElementById('charts').appendChild(heading);
+  document.getElementById('charts').appendChild(this.canvas);
+  this.series = series;
+  this.select = select;
+  interact(this.canvas);
+}
+
+Chart.prototype.draw = function () {
+  var series = this.series, column = +this.select.value, l = level();
+  var ctx = this.canvas.getContext('2d');
+  var loaded = [], lo = Infinity, hi = -Infinity, buckets = 0;
+  series.levels[l].forEach(function (info, t) {
+    if (info[1] < view[0] || info[0] > view[1]) {
+      return;
+    }
+    var decoded = tile(series, l, t);
+    loaded.push(decoded);
+    var stats = decoded.columns[column];
+    for (var i = 0; i < decoded.time.length; i++) {
+      if (decoded.time[i] >= view[0] && decoded.time[i] <= view[1]) {
+        lo = Math.min(lo, stats.min[i]);
+        hi = Math.max(hi, stats.max[i]);
+        buckets++;
+      }
+    }
+  });
+  if (lo == hi) {
+    lo -= 1;
+    hi += 1;
+  }
+  var plotWidth = width - left, plotHeight = height - bottom;
+  var x = function (t) { return left + (t - view[0]) / (view[1] - view[0]) * plotWidth; };
+  var y = function (v) { return (hi - v) / (hi - lo) * (plotHeight - 10) + 5; };
+
+  ctx.clearRect(0, 0, width, height);
+  ctx.fillStyle = '#000';
+  ctx.font = '11px sans-serif';
+  if (buckets) {
+    [lo, (lo + hi) / 2, hi].forEach(function (v) { ctx.fillText(+v.toPrecision(4), 2, y(v) + 4); });
+  }
+  ctx.fillText(timeString(view[0]), left, height - 5);
+  var end = timeString(view[1]);
+  ctx.fillText(end, width - ctx.measureText(end).width - 2, height - 5);
+  var caption = index.levelNames[l] + ' buckets, ' + buckets + ' in view';
+  ctx.fillText(caption, (width - ctx.measureText(caption).width) / 2, height - 5);
+
+  ctx.save();
+  ctx.beginPath();
+  ctx.rect(left, 0, plotWidth, plotHeight);
+  ctx.clip();
+  loaded.forEach(function (decoded) {
+    var stats = decoded.columns[column];
+    ctx.strokeStyle = '#9ecae1';
+    ctx.beginPath();
+    for (var i = 0; i < decoded.time.length; i++) {
+      var px = Math.round(x(decoded.time[i])) + 0.5;
+      ctx.moveTo(px, y(stats.min[i]) + 1);
+      ctx.lineTo(px, y(stats.max[i]) - 1);
+    }
+    ctx.stroke();
+    ctx.fillStyle = '#08519c';
+    for (var i = 0; i < decoded.time.length; i++) {
+      ctx.fillRect(x(decoded.time[i]) - 1, y(stats.mean[i]) - 1, 2, 2);
+    }
+  });
+  ctx.restore();
+};
+
+var pending = false;
+function redraw() {
+  if (!pending) {
+    pending = true;
+    requestAnimationFrame(function () {
+      pending = false;
+      charts.forEach(function (chart) { chart.draw(); });
+    });
+  }
+}
+
+function setView(start, end) {
+  var span = Math.min(Math.max(end - start, 10 * index.levels[0]), index.end - index.start);
+  start = Math.max(index.start, Math.min(start, index.end - span));
+  view = [start, start + span];
+  redraw();
+}
+
+function interact(canvas) {
+  var dragging = null;
+  var at = function (event) {
+    var bounds = canvas.getBoundingClientRect();
+    return view[0] + (event.clientX - bounds.left - left) / (width - left) * (view[1] - view[0]);
+  };
+  canvas.addEventListener('wheel', function (event) {
+    event.preventDefault();
+    var t = at(event), scale = event.deltaY > 0 ? 1.25 : 0.8;
+    setView(t - (t - view[0]) * scale, t + (view[1] - t) * scale);
+  });
+  canvas.addEventListener('mousedown', function (event) {
+    dragging = {x: event.clientX, view: view.slice()};
+  });
+  window.addEventListener('mousemove', function (event) {
+    if (dragging) {
+      var shift = (dragging.x - event.clientX) / (width - left) * (dragging.view[1] - dragging.view[0]);
+      setView(dragging.view[0] + shift, dragging.view[1] + shift);
+    }
+  });
+  window.addEventListener('mouseup', function () { dragging = null; });
+  canvas.addEventListener('dblclick', function () { setView(index.start, index.end); });
+}
+
+index.series.forEach(function (series) { charts.push(new Chart(series)); });
+redraw();
+</script>
+</body>
+</html>
+"""
+
+exporters = {'npz': export_npz, 'parquet': export_parquet, 'html': export_html}
+
+class MappedLog:
+  """A gc log mapped into memory, lines are sliced straight out of the
+  mapping rather than read through a file object. The mapping is a
+  snapshot, what is appended to the log after it was made is not seen."""
+
+  def __init__(self, path):
+    with open(path, 'rb') as f:
+      self.size = os.fstat(f.fileno()).st_size
+      # an empty file can't be mapped
+      self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+  def close(self):
+    if self.size:
+      self.data.close()
+
+  def line_end(self, offset):
+    """The offset just past the end of the line holding offset."""
+    return self.data.find(b'\n', offset) + 1 or self.size
+
+  def range_end(self, start, end=None):
+    """Where the lines starting from start up to end finish, the whole of
+    a line straddling end included."""
+    if start >= self.size or (end is not None and end <= start):
+      return start
+    if end is None or end >= self.size:
+      return self.size
+    return self.line_end(end - 1)
+
+  def lines(self, start=0, end=None):
+    """An iterator over the lines starting from start up to
+    range_end(start, end). They are read with the mapping's own readline,
+    which moves its position, so one iterator at a time."""
+    stop = self.range_end(start, end)
+    if stop == start:
+      return iter(())
+    self.data.seek(start)
+    if stop == self.size:
+      # no bound to check, the iteration stays in C
+      return iter(self.data.readline, b'')
+    return self.lines_to(stop)
+
+  def lines_to(self, stop):
+    while self.data.tell() < stop:
+      yield self.data.readline()
+
 class LogParser:
-  heapG1GCPattern = '\s*\[Eden: ([0-9.]+)([BKMG])\(([0-9.]+)([BKMG])\)->[0-9.BKMG()]+ Survivors: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG]) Heap: ([0-9.]+)([BKMG])\([0-9.BKMG]+\)->([0-9.]+)([BKMG])\([0-9.BKMG]+\)'
-  parallelPattern = '\s*\[PSYoungGen: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.MKBG]+\)\] ([0-9.]+)([MKBG])->([0-9.]+)([MKBG])\([0-9.MKBG]+\),'
-  parallelFullPattern = '\s*\[PSYoungGen: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.MKBG]+\)\] \[ParOldGen: [0-9.BKMG]+->[0-9.BKMG]+\([0-9.MKBG]+\)\] ([0-9.]+)([MKBG])->([0-9.]+)([MKBG])\([0-9.MKBG]+\),'
-  heapCMSPattern = '.*\[ParNew: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\), [.0-9]+ secs\] ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\).*'
-  rootScanStartPattern = '[0-9T\-\:\.\+]* ([0-9.]*): \[GC concurrent-root-region-scan-start\]'
-  rootScanMarkEndPattern = '[0-9T\-\:\.\+]* ([0-9.]*): \[GC concurrent-mark-end, .*'
-  rootScanEndPattern = '[0-9T\-\:\.\+]* ([0-9.]*): \[GC concurrent-cleanup-end, .*'
-  mixedStartPattern = '\s*([0-9.]*): \[G1Ergonomics \(Mixed GCs\) start mixed GCs, .*'
-  mixedContinuePattern = '\s*([0-9.]*): \[G1Ergonomics \(Mixed GCs\) continue mixed GCs, .*'
-  mixedEndPattern = '\s*([0-9.]*): \[G1Ergonomics \(Mixed GCs\) do not continue mixed GCs, .*'
-  exhaustionPattern = '.*\(to-space exhausted\).*'
-  humongousObjectPattern = '.*request concurrent cycle initiation, .*, allocation request: ([0-9]*) .*, source: concurrent humongous allocation]'
-  occupancyThresholdPattern = '.*threshold: ([0-9]*) bytes .*, source: end of GC\]'
-  reclaimablePattern = '.*reclaimable: ([0-9]*) bytes \(([0-9.]*) %\), threshold: ([0-9]*).00 %]'
+  heapG1GCPattern = re.compile('\s*\[Eden: ([0-9.]+)([BKMG])\(([0-9.]+)([BKMG])\)->[0-9.BKMG()]+ Survivors: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG]) Heap: ([0-9.]+)([BKMG])\([0-9.BKMG]+\)->([0-9.]+)([BKMG])\([0-9.BKMG]+\)')
+  parallelPattern = re.compile('\s*\[PSYoungGen: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.MKBG]+\)\] ([0-9.]+)([MKBG])->([0-9.]+)([MKBG])\([0-9.MKBG]+\),')
+  parallelFullPattern = re.compile('\s*\[PSYoungGen: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.MKBG]+\)\] \[ParOldGen: [0-9.BKMG]+->[0-9.BKMG]+\([0-9.MKBG]+\)\] ([0-9.]+)([MKBG])->([0-9.]+)([MKBG])\([0-9.MKBG]+\),')
+  # the total of a G1 full gc, the [Eden: line after it has the rest
+  g1FullPattern = re.compile('.*\[Full GC \(.*\)\s+([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\)')
+  # the old gen and total of a CMS full gc, after a concurrent mode failure
+  # or not
+  cmsFullPattern = re.compile('.*\[Full GC.*\[CMS(?:: |.*\(concurrent mode failure\): )([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\), [.0-9]+ secs\] ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\)')
+  heapCMSPattern = re.compile('.*\[ParNew: ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\), [.0-9]+ secs\] ([0-9.]+)([BKMG])->([0-9.]+)([BKMG])\([0-9.BKMG]+\).*')
+  rootScanStartPattern = re.compile('[0-9T\-\:\.\+]* ([0-9.]*): \[GC concurrent-root-region-scan-start\]')
+  rootScanMarkEndPattern = re.compile('[0-9T\-\:\.\+]* ([0-9.]*): \[GC concurrent-mark-end, .*')
+  rootScanEndPattern = re.compile('[0-9T\-\:\.\+]* ([0-9.]*): \[GC concurrent-cleanup-end, .*')
+  mixedStartPattern = re.compile('\s*([0-9.]*): \[G1Ergonomics \(Mixed GCs\) start mixed GCs, .*')
+  mixedContinuePattern = re.compile('\s*([0-9.]*): \[G1Ergonomics \(Mixed GCs\) continue mixed GCs, .*')
+  mixedEndPattern = re.compile('\s*([0-9.]*): \[G1Ergonomics \(Mixed GCs\) do not continue mixed GCs, .*')
+  exhaustionPattern = re.compile('.*\(to-space exhausted\).*')
+  humongousObjectPattern = re.compile('.*request concurrent cycle initiation, .*, allocation request: ([0-9]*) .*, source: concurrent humongous allocation]')
+  occupancyThresholdPattern = re.compile('.*threshold: ([0-9]*) bytes .*, source: end of GC\]')
+  reclaimablePattern = re.compile('.*reclaimable: ([0-9]*) bytes \(([0-9.]*) %\), threshold: ([0-9]*).00 %]')
+  stwSubTimingPattern = re.compile('^[ ]+\[(Ext Root Scanning|Update RS|Scan RS|Object Copy|Termination) .* Max: ([0-9]+)\.[0-9],.*')
+  stwOtherPattern = re.compile('^[ ]+\[Other: ([0-9.]+).*')
+  cmsMarkPattern = re.compile('.*\[CMS-concurrent-mark: .*, real=([.0-9]+) secs.*')
+  cmsRescanPattern = re.compile('.*\[Rescan .*, real=([.0-9]+) secs.*')
+  # stop-the-world phases of a collection that have no heap sizes of their
+  # own: G1's remark and cleanup, CMS's initial mark and final remark, and
+  # full collections
+  gcPhasePattern = re.compile('.*(?:\[GC remark|\[GC cleanup|CMS-initial-mark: |CMS-remark: |\[Full GC)')
+  pauseTimePattern = re.compile('[0-9-]*T[0-9]+:[0-9]+:.* threads were stopped: ([0-9.]+) seconds(?:, Stopping threads took: ([0-9.]+) seconds)?')
+  # -XX:+PrintSafepointStatistics, the spin, block, sync, cleanup and vmop
+  # millis of each safepoint
+  safepointStatisticsPattern = re.compile('\s*[0-9.]+: [A-Za-z0-9_]+\s+\[[ 0-9]+\]\s+\[\s*[0-9]+\s+[0-9]+\s+([0-9]+)\s+[0-9]+\s+[0-9]+\s*\]')
+
+  # a line determine_gc_alg acts on holds one of these
+  gcAlgHintPattern = re.compile('CommandLine flags: |\[Eden: |\[PSYoungGen: |\[ParNew: ')
+
+  # StwSubTimings attribute for each term captured by stwSubTimingPattern
+  stwSubTimingFields = {
+    'Ext Root Scanning': 'ext_root_scan',
+    'Update RS': 'update_rs',
+    'Scan RS': 'scan_rs',
+    'Object Copy': 'object_copy',
+    'Termination': 'termination',
+  }
+
+  # State transitions made by the line handlers. In parallel mode the
+  # workers record these calls instead of making them, and the parent
+  # replays them in file order.
+  transitions = ('gc_event', 'full_gc_start', 'root_scan_start', 'root_scan_mark_end', 'root_scan_end',
+                 'mixed_start', 'mixed_continue', 'mixed_end', 'to_space_exhausted',
+                 'humongous_object', 'found_occupancy_threshold', 'reclaimable',
+                 'stw_sub_timing', 'cms_mark', 'cms_rescan', 'gc_phase', 'safepoint_synced', 'application_stopped')
+
+  # bounds on the size of the byte ranges handed to parallel workers
+  minChunkSize = 1 << 20
+  maxChunkSize = 64 << 20
+
+  # parsing for a time window starts this far ahead of it, so mixed and
+  # concurrent mark cycles under way when the window opens are complete
+  windowLeadIn = 10 * 60 * 1000
+
+  # what parse_line hands lines to, see Profiler
+  handlers = ('parse_line', 'line_has_timestamp', 'line_has_gc', 'collect_stw_sub_timings', 'collect_mixed_duration_times',
+              'collect_root_scan_times', 'collect_to_space_exhaustion', 'collect_reclaimable', 'collect_humongous_objects',
+              'collect_occupancy_threshold_pattern', 'write_cms_data', 'collect_gc_phase', 'collect_safepoint_statistics',
+              'line_has_pause_time')
+
+  # handlers of the series --summary doesn't report on, see ignore()
+  summaryIgnored = ('collect_stw_sub_timings', 'collect_root_scan_times', 'collect_reclaimable', 'collect_humongous_objects',
+                    'write_cms_data', 'collect_safepoint_statistics')
+
+  # state carried from one line to the next, see checkpoint()
+  checkpointFields = ('timestamp', 'gc_alg_g1gc', 'gc_alg_cms', 'gc_alg_parallel', 'pre_gc_total', 'post_gc_total',
+                      'pre_gc_young', 'pre_gc_young_target', 'post_gc_young', 'pre_gc_survivor', 'post_gc_survivor',
+                      'tenured_delta', 'full_gc', 'gc', 'full_gc_started', 'gc_phase_stop', 'root_scan_start_time', 'root_scan_end_timestamp',
+                      'root_scan_mark_end_time', 'mixed_duration_start_time', 'mixed_duration_count',
+                      'percentile_window', 'percentile_window_start', 'occupancy_threshold',
+                      'time_to_safepoint', 'safepoint_window_start', 'safepoint_window', 'max_heap')
 
   def __init__(self, input_file):
     self.timestamp = None
+    self.timestamp_parser = TimestampParser()
     self.input_file = input_file
-    self.pause_file = open('pause.dat', "w+b")
-    self.young_pause_file = open('young-pause.dat', "w+b")
-    self.mixed_pause_file = open('mixed-pause.dat', "w+b")
-    self.pause_count_file = open('pause_count.dat', "w+b")
-    self.full_gc_file = open('full_gc.dat', "w+b")
-    self.gc_file = open('gc.dat', "w+b")
-    self.young_file = open('young.dat', "w+b")
-    self.root_scan_file = open('rootscan.dat', "w+b")
-    self.cms_mark_file = open('cms_mark.dat', "w+b")
-    self.cms_rescan_file = open('cms_rescan.dat', "w+b")
-    self.mixed_duration_file = open('mixed_duration.dat', "w+b")
-    self.exhaustion_file = open('exhaustion.dat', "w+b")
-    self.humongous_objects_file = open('humongous_objects.dat', "w+b")
-    self.reclaimable_file = open('reclaimable.dat', "w+b")
+    self.log = None
+    self.store = EventStore()
+    self.dat_dir = None
+    self.dat_rows = {}
+    self.parsed_bytes = 0
     self.gc_alg_g1gc = False
     self.gc_alg_cms = False
     self.gc_alg_parallel = False
@@ -70,52 +1498,83 @@ class LogParser:
     self.tenured_delta = 0
     self.full_gc = False
     self.gc = False
+    # a G1 full gc whose [Eden: line may be to come
+    self.full_gc_started = False
+    # a gc phase other than a young or full gc is stopping the world
+    self.gc_phase_stop = False
     self.root_scan_start_time = 0
     self.root_scan_end_timestamp = 0
     self.root_scan_mark_end_time = 0
     self.mixed_duration_start_time = 0
     self.mixed_duration_count = 0
-    self.total_pause_time = 0
     self.size = '1024,768'
-    self.last_minute = -1
-    self.reset_pause_counts()
+    self.max_points = 20000
+    self.percentile_window = 60 * 1000
+    self.percentile_window_start = None
+    self.window_histogram = PauseHistogram()
+    self.pause_histogram = PauseHistogram()
     self.occupancy_threshold = None
+    # MB, from -XX:MaxHeapSize when the command line is logged
+    self.max_heap = None
     self.stw = StwSubTimings()
+    # from the safepoint statistics, for the stop logged next
+    self.time_to_safepoint = 0
+    self.safepoint_window_start = None
+    # stops, gc stops, secs stopped, secs stopped for gc, max time to safepoint
+    self.safepoint_window = [0, 0, 0.0, 0.0, 0.0]
+    self.ignored = ()
+
+  def ignore(self, handlers):
+    """Stops lines being handed to the given handlers, here and in the
+    workers of a parallel parse."""
+    self.ignored = tuple(handlers)
+    for name in self.ignored:
+      setattr(self, name, ignore_line)
+
+  def dat_file(self, series):
+    """Writes a series out for gnuplot the first time it is needed, into a
+    directory of this run's own, decimated to about max_points rows. Rows
+    parsed since are appended when the series is needed again."""
+    if self.dat_dir is None:
+      self.dat_dir = tempfile.mkdtemp(prefix='gc_log_visualizer.')
+    path = os.path.join(self.dat_dir, series.filename)
+    written = self.dat_rows.get(series.filename)
+    if written is None or written < len(series):
+      rows = series.decimate(self.max_points, int(self.size.split(',')[0]))
+      if rows is None:
+        series.write_dat(path, written or 0)
+      else:
+        # the rows kept change as the series grows, so rewrite it all
+        series.write_dat(path, rows=rows)
+      self.dat_rows[series.filename] = len(series)
+    return path
+
+  def mapped_log(self):
+    """The mapping of the log that detection, the window search and
+    parsing share, made the first time it is needed."""
+    if self.log is None:
+      self.log = MappedLog(self.input_file)
+    return self.log
+
+  def close_log(self):
+    if self.log is not None:
+      self.log.close()
+      self.log = None
 
   def cleanup(self):
-    os.unlink(self.pause_file.name)
-    os.unlink(self.young_pause_file.name)
-    os.unlink(self.mixed_pause_file.name)
-    os.unlink(self.pause_count_file.name)
-    os.unlink(self.full_gc_file.name)
-    os.unlink(self.gc_file.name)
-    os.unlink(self.young_file.name)
-    os.unlink(self.root_scan_file.name)
-    os.unlink(self.cms_mark_file.name)
-    os.unlink(self.cms_rescan_file.name)
-    os.unlink(self.mixed_duration_file.name)
-    os.unlink(self.exhaustion_file.name)
-    os.unlink(self.humongous_objects_file.name)
-    os.unlink(self.reclaimable_file.name)
-    return
+    self.close_log()
+    if self.dat_dir is not None:
+      shutil.rmtree(self.dat_dir)
+      self.dat_dir = None
+
+  def gnuplot(self, name, start, end, jobs=1, verbose=True, discard_series=False):
+    """Charts the parsed series once the parse is done. Each chart goes to
+    gnuplot as soon as the data files it reads are written out, so the data
+    of the later charts is written while the earlier ones render. With
+    discard_series, the parser lets go of its series once the data files of
+    every chart are written, rather than after the charts are rendered."""
+    charts = ChartRenderer(jobs, verbose)
 
-  def close_files(self):
-    self.pause_file.close()
-    self.young_pause_file.close()
-    self.mixed_pause_file.close()
-    self.pause_count_file.close()
-    self.gc_file.close()
-    self.full_gc_file.close()
-    self.young_file.close()
-    self.root_scan_file.close()
-    self.cms_mark_file.close()
-    self.cms_rescan_file.close()
-    self.mixed_duration_file.close()
-    self.exhaustion_file.close()
-    self.humongous_objects_file.close()
-    self.reclaimable_file.close()
-
-  def gnuplot(self, name, start, end):
     if start is None:
       xrange = ""
     else:
@@ -128,97 +1587,112 @@ class LogParser:
       occupancy_threshold_arrow += "set label \"%s\" at graph 0,first %d offset 1,1; " % ('IOF' if self.gc_alg_cms else 'IHOP', self.occupancy_threshold)
 
     # example of how to cap the y-range of the graph at .2
-    #gnuplot_cmd = "gnuplot -e 'set term png size %s; set yrange [0:0.2]; set output \"%s-stw-200ms-cap.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2'" % (self.size, name, xrange, self.pause_file.name)
-    #os.system(gnuplot_cmd)
+    #gnuplot_cmd = "set term png size %s; set yrange [0:0.2]; set output \"%s-stw-200ms-cap.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2" % (self.size, name, xrange, self.dat_file(self.store.pause))
+    #charts.append(gnuplot_cmd)
 
     if self.gc_alg_parallel:
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"all stw\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"all stw\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
 
     # Separate young and mixed stw events
     if self.gc_alg_g1gc:
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw-young.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"young\"'" % (self.size, name, xrange, self.young_pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw-mixed.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"mixed\"'" % (self.size, name, xrange, self.mixed_pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw-all.png\"; set xdata time; " \
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw-young.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"young\"" % (self.size, name, xrange, self.dat_file(self.store.young_pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw-mixed.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"mixed\"" % (self.size, name, xrange, self.dat_file(self.store.mixed_pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw-all.png\"; set xdata time; " \
           "set ylabel \"Secs\"; " \
           "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
           "%s " \
           "plot \"%s\" using 1:2 title \"young\"" \
-          ", \"%s\" using 1:2 title \"mixed\"'" % (self.size, name, xrange, self.young_pause_file.name, self.mixed_pause_file.name)
-      os.system(gnuplot_cmd)
+          ", \"%s\" using 1:2 title \"mixed\"" % (self.size, name, xrange, self.dat_file(self.store.young_pause), self.dat_file(self.store.mixed_pause))
+      if len(self.store.full_pause):
+        gnuplot_cmd += ", \"%s\" using 1:2 title \"full\"" % self.dat_file(self.store.full_pause)
+      charts.append(gnuplot_cmd)
 
     # Separate young and mixed stw events
     if self.gc_alg_cms:
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw-young.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"young\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw-all.png\"; set xdata time; " \
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw-young.png\"; set xdata time; set ylabel \"Secs\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"young\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw-all.png\"; set xdata time; " \
           "set ylabel \"Secs\"; " \
           "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
           "%s " \
           "plot \"%s\" using 1:2 title \"young\"" \
           ", \"%s\" using 1:2 title \"mark\"" \
-          ", \"%s\" using 1:2 title \"rescan\"'" % (self.size, name, xrange, self.pause_file.name, self.cms_mark_file.name, self.cms_rescan_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-stw-old.png\"; set xdata time; " \
+          ", \"%s\" using 1:2 title \"rescan\"" % (self.size, name, xrange, self.dat_file(self.store.pause), self.dat_file(self.store.cms_mark), self.dat_file(self.store.cms_rescan))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-stw-old.png\"; set xdata time; " \
           "set ylabel \"Secs\"; " \
           "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
           "%s " \
           "plot \"%s\" using 1:2 title \"mark\"" \
-          ", \"%s\" using 1:2 title \"rescan\"'" % (self.size, name, xrange, self.cms_mark_file.name, self.cms_rescan_file.name)
-      os.system(gnuplot_cmd)
+          ", \"%s\" using 1:2 title \"rescan\"" % (self.size, name, xrange, self.dat_file(self.store.cms_mark), self.dat_file(self.store.cms_rescan))
+      charts.append(gnuplot_cmd)
 
     # Stw sub-timings
     if self.gc_alg_g1gc:
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-ext-root-scan.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:3 title \"ext-root-scan\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-update-rs.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:4 title \"update-rs\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-scan-rs.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:5 title \"scan-rs\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-object-copy.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:6 title \"object-copy\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-termination.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:7 title \"termination\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-other.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:8 title \"other\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-substw-unknown.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:9 title \"unknown\"'" % (self.size, name, xrange, self.pause_file.name)
-      os.system(gnuplot_cmd)
-
-    # total pause time
-    gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-total-pause.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:8 title \"%% of time in gc\"'" % (self.size, name, xrange, self.pause_count_file.name)
-    os.system(gnuplot_cmd)
-
-    # Note: This seems to have marginal utility as compared to the plot of wall time vs. pause time
-    gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-pause-count.png\"; set xdata time; " \
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-ext-root-scan.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:3 title \"ext-root-scan\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-update-rs.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:4 title \"update-rs\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-scan-rs.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:5 title \"scan-rs\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-object-copy.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:6 title \"object-copy\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-termination.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:7 title \"termination\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-other.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:8 title \"other\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-substw-unknown.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:9 title \"unknown\"" % (self.size, name, xrange, self.dat_file(self.store.pause))
+      charts.append(gnuplot_cmd)
+
+    # total pause time, gc and other safepoints
+    gnuplot_cmd = "set term png size %s; set output \"%s-total-pause.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
+        "%s " \
+        "plot \"%s\" using 1:4 title \"%% of time stopped\"" \
+        ", \"%s\" using 1:5 title \"%% of time in gc\"" \
+        ", \"%s\" using 1:6 title \"%% of time in other safepoints\"" % (self.size, name, xrange, self.dat_file(self.store.safepoint_windows), self.dat_file(self.store.safepoint_windows), self.dat_file(self.store.safepoint_windows))
+    charts.append(gnuplot_cmd)
+
+    # every stop of the application threads, and the time taken to stop them
+    gnuplot_cmd = "set term png size %s; set output \"%s-safepoints.png\"; set xdata time; set ylabel \"Secs\"; " \
+        "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
+        "%s " \
+        "plot \"%s\" using 1:($4 == 1 ? $2 : 1/0) title \"gc\"" \
+        ", \"%s\" using 1:($4 == 0 ? $2 : 1/0) title \"other safepoints\"" % (self.size, name, xrange, self.dat_file(self.store.safepoints), self.dat_file(self.store.safepoints))
+    charts.append(gnuplot_cmd)
+    gnuplot_cmd = "set term png size %s; set output \"%s-time-to-safepoint.png\"; set xdata time; set ylabel \"millis\"; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:($3 * 1000) title \"time-to-safepoint\"" % (self.size, name, xrange, self.dat_file(self.store.safepoints))
+    charts.append(gnuplot_cmd)
+
+    # pause percentiles per wall-clock window
+    gnuplot_cmd = "set term png size %s; set output \"%s-pause-percentiles.png\"; set xdata time; set ylabel \"millis\"; " \
         "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
         "%s " \
-        "plot \"%s\" using 1:2 title \"under-50\" with lines" \
-        ", \"%s\" using 1:3 title \"50-90\" with lines" \
-        ", \"%s\" using 1:4 title \"90-120\" with lines" \
-        ", \"%s\" using 1:5 title \"120-150\" with lines" \
-        ", \"%s\" using 1:6 title \"150-200\" with lines" \
-        ", \"%s\" using 1:7 title \"200+\" with lines'" % (self.size, name, xrange, self.pause_count_file.name, self.pause_count_file.name, self.pause_count_file.name, self.pause_count_file.name, self.pause_count_file.name, self.pause_count_file.name)
-    os.system(gnuplot_cmd)
-
-    gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-heap.png\"; set xdata time; " \
+        "plot \"%s\" using 1:3 title \"p50\" with lines" \
+        ", \"%s\" using 1:4 title \"p90\" with lines" \
+        ", \"%s\" using 1:5 title \"p99\" with lines" \
+        ", \"%s\" using 1:6 title \"p99.9\" with lines" \
+        ", \"%s\" using 1:7 title \"max\" with lines" % (self.size, name, xrange, self.dat_file(self.store.pause_percentiles), self.dat_file(self.store.pause_percentiles), self.dat_file(self.store.pause_percentiles), self.dat_file(self.store.pause_percentiles), self.dat_file(self.store.pause_percentiles))
+    charts.append(gnuplot_cmd)
+
+    gnuplot_cmd = "set term png size %s; set output \"%s-heap.png\"; set xdata time; " \
         "set ylabel \"MB\"; " \
         "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
         "%s " \
         "%s " \
         "plot \"%s\" using 1:2 title \"pre-gc-amount\"" \
-        ", \"%s\" using 1:3 title \"post-gc-amount\"'" % (self.size, name, occupancy_threshold_arrow, xrange, self.gc_file.name, self.gc_file.name)
-    os.system(gnuplot_cmd)
+        ", \"%s\" using 1:3 title \"post-gc-amount\"" % (self.size, name, occupancy_threshold_arrow, xrange, self.dat_file(self.store.gc), self.dat_file(self.store.gc))
+    charts.append(gnuplot_cmd)
 
     # Add to-space exhaustion events if any are found
-    if self.gc_alg_g1gc and os.stat(self.exhaustion_file.name).st_size > 0:
-      to_space_exhaustion = ", \"%s\" using 1:2 title \"to-space-exhaustion\" pt 7 ps 3" % (self.exhaustion_file.name)
+    if self.gc_alg_g1gc and len(self.store.exhaustion) > 0:
+      to_space_exhaustion = ", \"%s\" using 1:2 title \"to-space-exhaustion\" pt 7 ps 3" % (self.dat_file(self.store.exhaustion))
     else:
       to_space_exhaustion = ""
 
     # line graph of Eden, Tenured and the Total
-    gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-totals.png\"; set xdata time; " \
+    gnuplot_cmd = "set term png size %s; set output \"%s-totals.png\"; set xdata time; " \
         "set ylabel \"MB\"; " \
         "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
         "%s " \
@@ -227,89 +1701,163 @@ class LogParser:
         ", \"%s\" using 1:4 title \"Tenured\" with lines" \
         "%s" \
         ", \"%s\" using 1:5 title \"Total\" with lines" \
-        ", \"%s\" using 1:2 title \"Reclaimable\"'" % (self.size, name, xrange, occupancy_threshold_arrow, self.young_file.name, self.young_file.name, to_space_exhaustion, self.young_file.name, self.reclaimable_file.name)
-    os.system(gnuplot_cmd)
+        ", \"%s\" using 1:2 title \"Reclaimable\"" % (self.size, name, xrange, occupancy_threshold_arrow, self.dat_file(self.store.young), self.dat_file(self.store.young), to_space_exhaustion, self.dat_file(self.store.young), self.dat_file(self.store.reclaimable))
+    charts.append(gnuplot_cmd)
 
 
-    gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-young.png\"; set xdata time; " \
+    gnuplot_cmd = "set term png size %s; set output \"%s-young.png\"; set xdata time; " \
         "set ylabel \"MB\"; " \
         "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
         "%s " \
         "plot \"%s\" using 1:2 title \"current\"" \
-        ", \"%s\" using 1:3 title \"max\"'" % (self.size, name, xrange, self.young_file.name, self.young_file.name)
-    os.system(gnuplot_cmd)
+        ", \"%s\" using 1:3 title \"max\"" % (self.size, name, xrange, self.dat_file(self.store.young), self.dat_file(self.store.young))
+    charts.append(gnuplot_cmd)
 
     if self.gc_alg_g1gc:
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-tenured-delta.png\"; set xdata time; " \
+      gnuplot_cmd = "set term png size %s; set output \"%s-tenured-delta.png\"; set xdata time; " \
           "set ylabel \"MB\"; " \
           "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
           "%s " \
-          "plot \"%s\" using 1:6 with lines title \"tenured-delta\"'" % (self.size, name, xrange, self.young_file.name)
-      os.system(gnuplot_cmd)
+          "plot \"%s\" using 1:6 with lines title \"tenured-delta\"" % (self.size, name, xrange, self.dat_file(self.store.young))
+      charts.append(gnuplot_cmd)
+
+    # rates from the heap sizes, and how long until the old gen reaches the
+    # occupancy threshold or fills the heap at the rate it is filling
+    if numpy is not None and len(self.store.young) > 1:
+      derived = derived_series(derived_metrics(self.store, self.gc_alg_g1gc, self.occupancy_threshold, self.max_heap))
+      # the last rows change as gcs are parsed, so it is written afresh
+      self.dat_rows.pop(derived.filename, None)
+      derived_dat = self.dat_file(derived)
+      gnuplot_cmd = "set term png size %s; set output \"%s-rates.png\"; set xdata time; " \
+          "set ylabel \"MB/sec\"; " \
+          "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
+          "%s " \
+          "plot \"%s\" using 1:2 title \"allocation\"" \
+          ", \"%s\" using 1:3 title \"promotion\"" \
+          ", \"%s\" using 1:4 title \"old gen fill\" with lines" % (self.size, name, xrange, derived_dat, derived_dat, derived_dat)
+      charts.append(gnuplot_cmd)
+
+      plots = []
+      if self.occupancy_threshold:
+        threshold_name = 'IOF' if self.gc_alg_cms else 'IHOP'
+        plots.append("\"%s\" using 1:5 title \"headroom to %s (MB)\" with lines" % (derived_dat, threshold_name))
+        plots.append("\"%s\" using 1:($6 / 60) axes x1y2 title \"mins to %s\"" % (derived_dat, threshold_name))
+      if self.max_heap:
+        plots.append("\"%s\" using 1:($7 / 60) axes x1y2 title \"mins to full gc\"" % derived_dat)
+      if plots:
+        gnuplot_cmd = "set term png size %s; set output \"%s-headroom.png\"; set xdata time; " \
+            "set ylabel \"MB\"; set y2label \"Mins\"; set y2tics; set logscale y2; " \
+            "set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; " \
+            "%s " \
+            "plot %s" % (self.size, name, xrange, ', '.join(plots))
+        charts.append(gnuplot_cmd)
 
     if self.gc_alg_g1gc:
       # root-scan times
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-root-scan.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"root-scan-duration(ms)\"'" % (self.size, name, xrange, self.root_scan_file.name)
-      os.system(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-root-scan.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"root-scan-duration(ms)\"" % (self.size, name, xrange, self.dat_file(self.store.root_scan))
+      charts.append(gnuplot_cmd)
 
       # time from first mixed-gc to last
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-mixed-duration.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"mixed-gc-duration(ms)\"'" % (self.size, name, xrange, self.mixed_duration_file.name)
-      os.system(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-mixed-duration.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"mixed-gc-duration(ms)\"" % (self.size, name, xrange, self.dat_file(self.store.mixed_duration))
+      charts.append(gnuplot_cmd)
 
       # count of mixed-gc runs before stopping mixed gcs, max is 8 by default
-      gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-mixed-duration-count.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:3 title \"mixed-gc-count\"'" % (self.size, name, xrange, self.mixed_duration_file.name)
-      os.system(gnuplot_cmd)
+      gnuplot_cmd = "set term png size %s; set output \"%s-mixed-duration-count.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:3 title \"mixed-gc-count\"" % (self.size, name, xrange, self.dat_file(self.store.mixed_duration))
+      charts.append(gnuplot_cmd)
 
       # to-space exhaustion events
-      if os.stat(self.exhaustion_file.name).st_size > 0:
-        gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-exhaustion.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2'" % (self.size, name, xrange, self.exhaustion_file.name)
-        os.system(gnuplot_cmd)
+      if len(self.store.exhaustion) > 0:
+        gnuplot_cmd = "set term png size %s; set output \"%s-exhaustion.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2" % (self.size, name, xrange, self.dat_file(self.store.exhaustion))
+        charts.append(gnuplot_cmd)
 
       # humongous object sizes
-      if os.stat(self.humongous_objects_file.name).st_size > 0:
-        gnuplot_cmd = "gnuplot -e 'set term png size %s; set output \"%s-humongous.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"humongous-object-size(KB)\"'" % (self.size, name, xrange, self.humongous_objects_file.name)
-        os.system(gnuplot_cmd)
-
-    return
+      if len(self.store.humongous_objects) > 0:
+        gnuplot_cmd = "set term png size %s; set output \"%s-humongous.png\"; set xdata time; set timefmt \"%%Y-%%m-%%d:%%H:%%M:%%S\"; %s plot \"%s\" using 1:2 title \"humongous-object-size(KB)\"" % (self.size, name, xrange, self.dat_file(self.store.humongous_objects))
+        charts.append(gnuplot_cmd)
+
+    if discard_series:
+      # the charts only need the data files from here on
+      self.store = EventStore()
+    return charts.join()
+
+  def span(self):
+    """Secs from the first event of the log to the last, of any kind, so
+    the stops either side of the first and last gc are covered too."""
+    store = self.store
+    firsts, lasts = [], []
+    for series in store.all_series():
+      # the windowed series are stamped with their windows' starts
+      if series is not store.pause_percentiles and series is not store.safepoint_windows and len(series):
+        timestamps = series.column('timestamp')
+        firsts.append(timestamps[0])
+        lasts.append(timestamps[-1])
+    return (max(lasts) - min(firsts)) / 1000.0 if firsts else 0
+
+  def summary(self):
+    """Headline numbers for the parsed log, pause times in millis, and the
+    percent of the time stopped for any safepoint."""
+    span = self.span()
+    summary = summarize_pauses(self.pause_histogram, span, len(self.store.exhaustion), len(self.store.humongous_objects))
+    # every stop, gc or not
+    safepoints = self.store.safepoints
+    stopped = sum(safepoints.column('stopped'))
+    non_gc_stopped = sum(secs for secs, gc in izip(safepoints.column('stopped'), safepoints.column('gc')) if not gc)
+    summary['safepoints'] = len(safepoints)
+    summary['stopped_pct'] = stopped * 100.0 / span if span else 0
+    summary['non_gc_pct'] = non_gc_stopped * 100.0 / span if span else 0
+    return summary
 
   def determine_gc_alg(self):
-    with open(self.input_file) as f:
-      for line in f:
-        m = re.match('^CommandLine flags: .*', line, flags=0)
-        if m:
-          if re.match(".*-XX:\+UseG1GC.*", line, flags=0):
-            self.gc_alg_g1gc = True
-            pct = self.get_long_field(line, '-XX:InitiatingHeapOccupancyPercent', 45)
-            max = self.get_long_field(line, '-XX:MaxHeapSize')
-            if pct and max:
-              self.occupancy_threshold = int(max * (pct / 100.0) / 1048576.0)
-            return
-
-          elif re.match(".*-XX:\+UseConcMarkSweepGC.*", line, flags=0):
-            self.gc_alg_cms = True
-            pct = self.get_long_field(line, '-XX:CMSInitiatingOccupancyFraction')
-            max = self.get_long_field(line, '-XX:MaxHeapSize')
-            if pct and max:
-              self.occupancy_threshold = int(max * (pct / 100.0) / 1048576.0)
-            return
-          elif re.match(".*-XX:\+UseParallelGC.*", line, flags=0):
-            self.gc_alg_parallel = True
-            return
-
-        m = re.match(LogParser.heapG1GCPattern, line, flags=0)
-        if m:
-          self.gc_alg_g1gc = True
+    # jump between the lines that can settle it rather than reading every
+    # line up to the first of them
+    log = self.mapped_log()
+    line_end = 0
+    for hint in LogParser.gcAlgHintPattern.finditer(log.data):
+      if hint.start() >= line_end:
+        line_start = log.data.rfind(b'\n', 0, hint.start()) + 1
+        line_end = log.line_end(hint.start())
+        if self.detect_gc_alg(log.data[line_start:line_end]):
           return
 
-        m = re.match(LogParser.heapCMSPattern, line, flags=0)
-        if m:
-          self.gc_alg_cms = True
-          return
+  def detect_gc_alg(self, line):
+    """Sets the gc algorithm if line settles it, returning whether it did."""
+    m = re.match('^CommandLine flags: .*', line, flags=0)
+    if m:
+      max = self.get_long_field(line, '-XX:MaxHeapSize')
+      if max:
+        self.max_heap = int(max / 1048576.0)
+      if re.match(".*-XX:\+UseG1GC.*", line, flags=0):
+        self.gc_alg_g1gc = True
+        pct = self.get_long_field(line, '-XX:InitiatingHeapOccupancyPercent', 45)
+        if pct and max:
+          self.occupancy_threshold = int(max * (pct / 100.0) / 1048576.0)
+        return True
+
+      elif re.match(".*-XX:\+UseConcMarkSweepGC.*", line, flags=0):
+        self.gc_alg_cms = True
+        pct = self.get_long_field(line, '-XX:CMSInitiatingOccupancyFraction')
+        if pct and max:
+          self.occupancy_threshold = int(max * (pct / 100.0) / 1048576.0)
+        return True
+      elif re.match(".*-XX:\+UseParallelGC.*", line, flags=0):
+        self.gc_alg_parallel = True
+        return True
+
+    m = LogParser.heapG1GCPattern.match(line)
+    if m:
+      self.gc_alg_g1gc = True
+      return True
 
-        m = re.match(LogParser.parallelPattern, line, flags=0)
-        if m:
-          self.gc_alg_parallel = True
-          return
+    m = LogParser.heapCMSPattern.match(line)
+    if m:
+      self.gc_alg_cms = True
+      return True
+
+    m = LogParser.parallelPattern.match(line)
+    if m:
+      self.gc_alg_parallel = True
+      return True
+    return False
 
   def get_long_field(self, line, field, def_value=0):
     m = re.match(".*%s=([0-9]+).*" % field, line, flags=0)
@@ -318,237 +1866,482 @@ class LogParser:
     else:
       return long(def_value)
   
-  def parse_log(self):
-    with open(self.input_file) as f:
-      for line in f:
-        # This needs to be first
-        self.line_has_timestamp(line)
-
-        self.line_has_gc(line)
-
-        if self.gc_alg_g1gc:
-          self.collect_root_scan_times(line)
-          self.collect_mixed_duration_times(line)
-          self.collect_to_space_exhaustion(line)
-          self.collect_humongous_objects(line)
-          self.collect_reclaimable(line)
-          self.collect_stw_sub_timings(line)
-
-          # find the occupance threshold if CommandLine log line not present
-          if not self.occupancy_threshold:
-            self.collect_occupancy_threshold_pattern(line)
-
-        if self.gc_alg_cms:
-          self.write_cms_data(line)
-
-        # This needs to be last
-        if self.line_has_pause_time(line):
-          self.output_data()
-          self.stw.reset()
-    
-  def output_data(self):
-    if self.mixed_duration_count == 0:
-      self.young_pause_file.write("%s %.6f\n" % (self.timestamp_string(), self.pause_time))
-    else:
-      self.mixed_pause_file.write("%s %.6f\n" % (self.timestamp_string(), self.pause_time))
+  def parse_lines(self, lines):
+    for line in lines:
+      self.parse_line(line)
+
+  def parse_log(self, start=0, end=None):
+    log = self.mapped_log()
+    for line in log.lines(start, end):
+      self.parse_line(line)
+    self.parsed_bytes = log.range_end(start, end)
+
+  def parse_log_parallel(self, jobs, start=0, end=None, profiler=None):
+    gc_alg = (self.gc_alg_g1gc, self.gc_alg_cms, self.gc_alg_parallel)
+    profile = profiler is not None and profiler.enabled
+    chunks = [(self.input_file, chunk_start, chunk_end, gc_alg, self.occupancy_threshold, self.ignored, profile)
+              for chunk_start, chunk_end in self.find_chunks(jobs, start, end)]
+    pool = multiprocessing.Pool(jobs)
+    try:
+      # imap hands results back in file order, so chunks are replayed
+      # while later ones are still being parsed
+      for recorded, timestamp, stats in pool.imap(parse_chunk, chunks):
+        self.replay(recorded)
+        if timestamp is not None:
+          self.timestamp = timestamp
+        if stats:
+          profiler.merge(stats)
+    finally:
+      pool.terminate()
+    self.parsed_bytes = chunks[-1][2] if chunks else start
+
+  def find_chunks(self, jobs, start=0, end=None):
+    log = self.mapped_log()
+    size = log.size if end is None else end
+    chunk_size = max(LogParser.minChunkSize, min(LogParser.maxChunkSize, (size - start) // (jobs * 4)))
+    chunks = []
+    while start < size:
+      end = start + chunk_size
+      if end >= size:
+        end = size
+      else:
+        # move the boundary forward to the next event, a line starting
+        # with its date or uptime stamp
+        end = log.line_end(end)
+        while end < log.size and not log.data[end:end + 1].isdigit():
+          end = log.line_end(end)
+      chunks.append((start, end))
+      start = end
+    return chunks
+
+  def complete_size(self):
+    """The size of the log up to the end of its last complete line."""
+    # find and rfind on a mapping start from its position unless told
+    return self.mapped_log().data.rfind(b'\n', 0) + 1
+
+  def find_window(self, start, end):
+    """The byte range to parse for the events stamped from start up to
+    but excluding end millis, lead-in included, or (0, None) for a log
+    without dates. The range covers the whole of the pause percentile
+    windows start and end fall in, see close_percentile_window()."""
+    if self.dated_line_from(0) is None:
+      return 0, None
+    start = min(start - LogParser.windowLeadIn, start - start % self.percentile_window)
+    end += -end % self.percentile_window
+    return self.find_offset(start), self.find_offset(end)
+
+  def trim_window(self, start, end):
+    """Drops the events stamped outside start up to but excluding end
+    millis, such as the lead-in of a windowed parse or the rest of a cached
+    one, and counts the whole run's pause histogram again from the pauses
+    left. The percentile and safepoint windows that overlap it are kept."""
+    store = self.store
+    for series in store.all_series():
+      if series is store.pause_percentiles or series is store.safepoint_windows:
+        series.trim(start - self.percentile_window + 1, end)
+      else:
+        series.trim(start, end)
+    self.pause_histogram = PauseHistogram()
+    for pause in store.pause.column('pause'):
+      self.pause_histogram.record(pause)
+
+  def find_offset(self, millis):
+    """Binary searches the log for the first line stamped at or after
+    millis, returning its byte offset or the file size when there is none."""
+    size = self.mapped_log().size
+    lo, hi = 0, size
+    while lo < hi:
+      mid = (lo + hi) // 2
+      found = self.dated_line_from(mid)
+      if found is None or found[1] >= millis:
+        hi = mid
+      else:
+        lo = mid + 1
+    found = self.dated_line_from(lo)
+    return size if found is None else found[0]
+
+  def dated_line_from(self, offset):
+    """(offset, millis) of the first dated line starting at or after offset."""
+    if offset > 0:
+      # the first line starting at or after offset is the one after the
+      # line holding the byte before it
+      offset = self.mapped_log().line_end(offset - 1)
+    for line in self.mapped_log().lines(offset):
+      timestamp = self.leading_timestamp(line)
+      if timestamp:
+        return offset, timestamp
+      offset += len(line)
+    return None
+
+  def checkpoint(self):
+    """The in-flight parser state, enough to carry on parsing from where
+    this parser stopped."""
+    state = dict((field, getattr(self, field)) for field in LogParser.checkpointFields)
+    state['stw'] = self.stw.__dict__.copy()
+    state['window_histogram'] = self.window_histogram.state()
+    state['pause_histogram'] = self.pause_histogram.state()
+    return state
+
+  def restore(self, state):
+    for field in LogParser.checkpointFields:
+      setattr(self, field, state[field])
+    self.stw.__dict__.update(state['stw'])
+    self.window_histogram = histogram_from_state(state['window_histogram'])
+    self.pause_histogram = histogram_from_state(state['pause_histogram'])
+
+  def replay(self, recorded):
+    for timestamp, name, args in recorded:
+      # None until the worker saw the first timestamp of its chunk, the
+      # last one of the previous chunk still applies
+      if timestamp is not None:
+        self.timestamp = timestamp
+      getattr(self, name)(*args)
+
+  def parse_line(self, line):
+    # This needs to be first
+    self.line_has_timestamp(line)
+
+    # Every pattern requires a literal that is far cheaper to look for than
+    # running the pattern itself, so classify the line with substring tests
+    # and only run the precompiled pattern that can match.
+    if '[Eden:' in line or '[PSYoungGen:' in line or '[ParNew:' in line or '[Full GC' in line:
+      self.line_has_gc(line)
 
-    self.pause_file.write("%s %.6f %d %d %d %d %d %d %d\n" % (self.timestamp_string(), self.pause_time, self.stw.ext_root_scan, self.stw.update_rs, self.stw.scan_rs, self.stw.object_copy, self.stw.termination, self.stw.other, self.stw.unknown_time(self.pause_time)))
-    self.young_file.write("%s %s %s %s %s %s\n" % (self.timestamp_string(), self.pre_gc_young, self.pre_gc_young_target, self.pre_gc_total - self.pre_gc_young, self.pre_gc_total, self.tenured_delta))
+    if self.gc_alg_g1gc:
+      if line[:1] == ' ' and ('Max:' in line or '[Other:' in line):
+        self.collect_stw_sub_timings(line)
+      if 'G1Ergonomics (Mixed GCs)' in line:
+        self.collect_mixed_duration_times(line)
+      if '[GC concurrent-' in line:
+        self.collect_root_scan_times(line)
+      if '(to-space exhausted)' in line:
+        self.collect_to_space_exhaustion(line)
+      if 'reclaimable: ' in line:
+        self.collect_reclaimable(line)
+      if 'humongous allocation]' in line:
+        self.collect_humongous_objects(line)
+
+      # find the occupance threshold if CommandLine log line not present
+      if not self.occupancy_threshold and 'end of GC]' in line:
+        self.collect_occupancy_threshold_pattern(line)
+
+    if self.gc_alg_cms and ('[CMS-concurrent-mark: ' in line or '[Rescan ' in line):
+      self.write_cms_data(line)
+
+    if '[GC remark' in line or '[GC cleanup' in line or 'CMS-initial-mark: ' in line or 'CMS-remark: ' in line or '[Full GC' in line:
+      self.collect_gc_phase(line)
+
+    if '  [' in line and ']  ' in line:
+      self.collect_safepoint_statistics(line)
+
+    # This needs to be last
+    if 'threads were stopped' in line:
+      self.line_has_pause_time(line)
+    
+  def emit(self, event):
+    """Hands a parsed event on, to the store unless iter_events() is
+    taking them."""
+    self.store.record(event)
 
-    # clean this up, full_gc's should probably graph
-    # in the same chart as regular gc events if possible
+  def output_data(self):
+    self.emit(PauseEvent(self.timestamp, self.pause_time, self.mixed_duration_count != 0, self.stw.ext_root_scan, self.stw.update_rs,
+                         self.stw.scan_rs, self.stw.object_copy, self.stw.termination, self.stw.other, self.stw.unknown_time(self.pause_time),
+                         self.full_gc))
+    self.emit(HeapSnapshot(self.timestamp, self.full_gc, self.pre_gc_young, self.pre_gc_young_target, self.pre_gc_total, self.post_gc_total, self.tenured_delta))
     if self.full_gc:
-      self.full_gc_file.write("%s %s %s\n" % (self.timestamp_string(), self.pre_gc_total, self.post_gc_total))
       self.full_gc = False
-    elif self.gc:
-      self.gc_file.write("%s %s %s\n" % (self.timestamp_string(), self.pre_gc_total, self.post_gc_total))
+    else:
       self.gc = False
-
-  def output_pause_counts(self):
-    self.pause_count_file.write("%s %s %s %s %s %s %s %s\n" % (self.timestamp_string(), self.under_50, self.under_90, self.under_120, self.under_150, self.under_200, self.over_200, self.total_pause_time * 100 / 60))
+    self.full_gc_started = False
+
+  def output_pause_percentiles(self):
+    histogram = self.window_histogram
+    p50, p90, p99, p999, max_pause = histogram.percentiles([50, 90, 99, 99.9, 100])
+    # micros to millis, and the pct of the window spent paused
+    self.emit(PausePercentiles(self.percentile_window_start, histogram.count, p50 / 1000.0, p90 / 1000.0, p99 / 1000.0,
+                               p999 / 1000.0, max_pause / 1000.0, histogram.total / (self.percentile_window * 10.0)))
+
+  def output_safepoint_window(self):
+    count, gc_count, stopped, gc_stopped, max_time_to_safepoint = self.safepoint_window
+    # secs to the pct of the window
+    scale = 100000.0 / self.percentile_window
+    self.emit(SafepointWindow(self.safepoint_window_start, count, gc_count, stopped * scale, gc_stopped * scale,
+                              (stopped - gc_stopped) * scale, max_time_to_safepoint * 1000.0))
+
+  def close_percentile_window(self):
+    """Writes out the percentiles and safepoint totals of the window in
+    progress, for a parse that stopped at the end of it."""
+    if self.window_histogram.count:
+      self.output_pause_percentiles()
+      self.window_histogram = PauseHistogram()
+    if self.safepoint_window[0]:
+      self.output_safepoint_window()
+      self.safepoint_window = [0, 0, 0.0, 0.0, 0.0]
 
   def line_has_pause_time(self, line):
-    m = re.match("[0-9-]*T[0-9]+:([0-9]+):.* threads were stopped: ([0-9.]+) seconds", line, flags=0)
-    if not m or not (self.gc or self.full_gc):
-      return False
+    m = LogParser.pauseTimePattern.match(line)
+    if m:
+      self.application_stopped(float(m.group(1)), m.group(2) and float(m.group(2)))
 
-    cur_minute = int(m.group(1))
-    self.pause_time = float(m.group(2))
-    self.increment_pause_counts(self.pause_time)
+  def collect_safepoint_statistics(self, line):
+    m = LogParser.safepointStatisticsPattern.match(line)
+    if m:
+      self.safepoint_synced(int(m.group(1)) / 1000.0)
 
-    if cur_minute != self.last_minute:
-      self.last_minute = cur_minute
-      self.output_pause_counts()
-      self.reset_pause_counts()
+  def safepoint_synced(self, secs):
+    self.time_to_safepoint = secs
 
-    return True
+  def collect_gc_phase(self, line):
+    m = LogParser.gcPhasePattern.match(line)
+    if m:
+      self.gc_phase()
+
+  def gc_phase(self):
+    self.gc_phase_stop = True
+
+  def application_stopped(self, pause_time, time_to_safepoint=None):
+    """Accounts for every stop of the application threads, gc ones
+    including remarks and cleanups, and records the ones for a GC event as
+    its pause."""
+    if time_to_safepoint is None:
+      time_to_safepoint = self.time_to_safepoint
+    self.time_to_safepoint = 0
+    self.record_safepoint(pause_time, time_to_safepoint, self.gc or self.full_gc or self.gc_phase_stop)
+    self.gc_phase_stop = False
+    if not (self.gc or self.full_gc):
+      return
 
-  def line_has_timestamp(self, line):
-    t = line.split()
-    if t and len(t) > 0:
-      t = t[0]
-      if t:
-        t = t[:-1]
-   
-    if t and len(t) > 15:  # 15 is mildly arbitrary
-      try:
-        self.timestamp = dateutil.parser.parse(t)
-      except (ValueError, AttributeError), e:
-        return
-    return
+    self.pause_time = pause_time
+    self.record_pause(pause_time)
+    self.output_data()
+    self.stw.reset()
 
-  def timestamp_string(self):
-    return self.any_timestamp_string(self.timestamp)
+  def line_has_timestamp(self, line):
+    timestamp = self.leading_timestamp(line)
+    if timestamp:
+      self.timestamp = timestamp
+      return True
+    return False
+
+  def leading_timestamp(self, line):
+    # only the first token can be the timestamp
+    t = line.split(None, 1)
+    if t:
+      t = t[0][:-1]
 
-  def any_timestamp_string(self, ts):
-    return ts.strftime("%Y-%m-%d:%H:%M:%S")
+    if t and len(t) > 15:  # 15 is mildly arbitrary
+      return self.timestamp_parser.parse(t)
+    return None
 
   def collect_root_scan_times(self, line):
-    m = re.match(LogParser.rootScanStartPattern, line, flags=0)
+    m = 'root-region-scan-start' in line and LogParser.rootScanStartPattern.match(line)
     if m:
-      if self.root_scan_mark_end_time > 0:
-        elapsed_time = self.root_scan_mark_end_time - self.root_scan_start_time
-        self.root_scan_file.write("%s %s\n" % (self.any_timestamp_string(self.root_scan_end_timestamp), elapsed_time))
-        self.root_scan_mark_end_time = 0
+      self.root_scan_start(int(float(m.group(1)) * 1000))
+      return
 
-      self.root_scan_start_time = int(float(m.group(1)) * 1000)
+    m = 'concurrent-mark-end' in line and LogParser.rootScanMarkEndPattern.match(line)
+    if m:
+      self.root_scan_mark_end(int(float(m.group(1)) * 1000))
       return
-        
 
-    m = re.match(LogParser.rootScanMarkEndPattern, line, flags=0)
-    if m and self.root_scan_start_time > 0:
-      self.root_scan_mark_end_time = int(float(m.group(1)) * 1000)
+    m = 'concurrent-cleanup-end' in line and LogParser.rootScanEndPattern.match(line)
+    if m:
+      self.root_scan_end(int(float(m.group(1)) * 1000))
+
+  def root_scan_start(self, uptime_ms):
+    if self.root_scan_mark_end_time > 0:
+      elapsed_time = self.root_scan_mark_end_time - self.root_scan_start_time
+      self.emit(ConcurrentMarkCycle(self.root_scan_end_timestamp, elapsed_time))
+      self.root_scan_mark_end_time = 0
+
+    self.root_scan_start_time = uptime_ms
+
+  def root_scan_mark_end(self, uptime_ms):
+    if self.root_scan_start_time > 0:
+      self.root_scan_mark_end_time = uptime_ms
       self.root_scan_end_timestamp = self.timestamp
-      return
 
-    m = re.match(LogParser.rootScanEndPattern, line, flags=0)
-    if m and self.root_scan_start_time > 0:
+  def root_scan_end(self, uptime_ms):
+    if self.root_scan_start_time > 0:
       self.root_scan_end_timestamp = self.timestamp
-      elapsed_time = int(float(m.group(1)) * 1000) - self.root_scan_start_time
-      self.root_scan_file.write("%s %s\n" % (self.any_timestamp_string(self.root_scan_end_timestamp), elapsed_time))
+      elapsed_time = uptime_ms - self.root_scan_start_time
+      self.emit(ConcurrentMarkCycle(self.root_scan_end_timestamp, elapsed_time))
       self.root_scan_start_time = 0
       self.root_scan_mark_end_time = 0
 
   def collect_mixed_duration_times(self, line):
-    m = re.match(LogParser.mixedStartPattern, line, flags=0)
+    m = ') start mixed' in line and LogParser.mixedStartPattern.match(line)
     if m:
-      self.mixed_duration_start_time = int(float(m.group(1)) * 1000)
-      self.mixed_duration_count += 1
+      self.mixed_start(int(float(m.group(1)) * 1000))
       return
 
-    m = re.match(LogParser.mixedContinuePattern, line, flags=0)
+    m = ') continue mixed' in line and LogParser.mixedContinuePattern.match(line)
     if m:
-      self.mixed_duration_count += 1
+      self.mixed_continue()
       return
 
-    m = re.match(LogParser.mixedEndPattern, line, flags=0)
-    if m and self.mixed_duration_start_time > 0:
-      elapsed_time = int(float(m.group(1)) * 1000) - self.mixed_duration_start_time
+    m = ') do not continue mixed' in line and LogParser.mixedEndPattern.match(line)
+    if m:
+      self.mixed_end(int(float(m.group(1)) * 1000))
+
+  def mixed_start(self, uptime_ms):
+    self.mixed_duration_start_time = uptime_ms
+    self.mixed_duration_count += 1
+
+  def mixed_continue(self):
+    self.mixed_duration_count += 1
+
+  def mixed_end(self, uptime_ms):
+    if self.mixed_duration_start_time > 0:
+      elapsed_time = uptime_ms - self.mixed_duration_start_time
       self.mixed_duration_count += 1
-      self.mixed_duration_file.write("%s %s %s\n" % (self.timestamp_string(), elapsed_time, self.mixed_duration_count))
+      self.emit(MixedCycle(self.timestamp, elapsed_time, self.mixed_duration_count))
       self.mixed_duration_start_time = 0
       self.mixed_duration_count = 0
 
   def collect_to_space_exhaustion(self, line):
-    m = re.match(LogParser.exhaustionPattern, line, flags=0)
-    if m and self.timestamp:
-      self.exhaustion_file.write("%s %s\n" % (self.timestamp_string(), 100))
+    m = LogParser.exhaustionPattern.match(line)
+    if m:
+      self.to_space_exhausted()
+
+  def to_space_exhausted(self):
+    if self.timestamp:
+      self.emit(ToSpaceExhaustion(self.timestamp))
 
   def collect_humongous_objects(self, line):
-    m = re.match(LogParser.humongousObjectPattern, line, flags=0)
-    if m and self.timestamp:
-      self.humongous_objects_file.write("%s %s\n" % (self.timestamp_string(), int(m.group(1)) / 1024))
+    m = LogParser.humongousObjectPattern.match(line)
+    if m:
+      self.humongous_object(int(m.group(1)))
+
+  def humongous_object(self, size):
+    if self.timestamp:
+      self.emit(HumongousAlloc(self.timestamp, size))
 
   def collect_occupancy_threshold_pattern(self, line):
-    m = re.match(LogParser.occupancyThresholdPattern, line, flags=0)
+    m = LogParser.occupancyThresholdPattern.match(line)
     if m:
-      self.occupancy_threshold = int(int(m.group(1)) / 1048576)
+      self.found_occupancy_threshold(int(int(m.group(1)) / 1048576))
+
+  def found_occupancy_threshold(self, threshold):
+    if not self.occupancy_threshold:
+      self.occupancy_threshold = threshold
 
   def collect_reclaimable(self, line):
-    m = re.match(LogParser.reclaimablePattern, line, flags=0)
-    if m and int(float(m.group(2))) >= int(m.group(3)) and self.timestamp:
-      self.reclaimable_file.write("%s %d\n" % (self.timestamp_string(), long(m.group(1)) / 1048576))
+    m = LogParser.reclaimablePattern.match(line)
+    if m and int(float(m.group(2))) >= int(m.group(3)):
+      self.reclaimable(long(m.group(1)))
+
+  def reclaimable(self, amount):
+    if self.timestamp:
+      self.emit(Reclaimable(self.timestamp, amount))
 
   def collect_stw_sub_timings(self, line):
-    if re.match('^[ ]+\[.*', line):
-      self.stw.ext_root_scan = self.parseMaxTiming('Ext Root Scanning', line, self.stw.ext_root_scan)
-      self.stw.update_rs = self.parseMaxTiming('Update RS', line, self.stw.update_rs)
-      self.stw.scan_rs = self.parseMaxTiming('Scan RS', line, self.stw.scan_rs)
-      self.stw.object_copy = self.parseMaxTiming('Object Copy', line, self.stw.object_copy)
-      self.stw.termination = self.parseMaxTiming('Termination', line, self.stw.termination)
-      m = re.match('^[ ]+\[Other: ([0-9.]+).*', line)
-      if m:
-        self.stw.other = int(float(m.group(1)))
+    m = LogParser.stwSubTimingPattern.match(line)
+    if m:
+      self.stw_sub_timing(LogParser.stwSubTimingFields[m.group(1)], int(float(m.group(2))))
+      return
 
-  def parseMaxTiming(self, term, line, current_value):
-    m = re.match("^[ ]+\[%s .* Max: ([0-9]+)\.[0-9],.*" % (term), line)
+    m = LogParser.stwOtherPattern.match(line)
     if m:
-      return int(float(m.group(1)))
-    else:
-      return current_value
+      self.stw_sub_timing('other', int(float(m.group(1))))
+
+  def stw_sub_timing(self, field, millis):
+    setattr(self.stw, field, millis)
 
   def write_cms_data(self, line):
     # collect stw times
     # 1) initial marking step, checks from roots
     # 2016-04-30T06:11:03.626+0000: 120634.808: [CMS-concurrent-mark: 0.922/0.922 secs] [Times: user=7.25 sys=0.59, real=0.93 secs] 
-    m = re.match(".*\[CMS-concurrent-mark: .*, real=([.0-9]+) secs.*", line, flags=0)
+    m = LogParser.cmsMarkPattern.match(line)
     if m:
-      self.cms_mark_file.write("%s %.6f\n" % (self.timestamp_string(), float(m.group(1))))
+      self.cms_mark(float(m.group(1)))
 
     # 2) rescan phase
     # 2016-04-30T06:11:09.341+0000: 120640.523: [GC (CMS Final Remark) [YG occupancy: 737574 K (996800 K)]2016-04-30T06:11:09.341+0000: 120640.523: [Rescan (parallel) , 0.0728015 secs]2016-04-30T06:11:09.414+0000: 120640.596: [weak refs processing, 0.0236183 secs]2016-04-30T06:11:09.437+0000: 120640.619: [class unloading, 0.0157037 secs]2016-04-30T06:11:09.453+0000: 120640.635: [scrub symbol table, 0.0069954 secs]2016-04-30T06:11:09.460+0000: 120640.642: [scrub string table, 0.0007916 secs][1 CMS-remark: 22933820K(30349760K)] 23671395K(31346560K), 0.1314855 secs] [Times: user=0.83 sys=0.17, real=0.13 secs] 
-    m = re.match(".*\[Rescan .*, real=([.0-9]+) secs.*", line, flags=0)
+    m = LogParser.cmsRescanPattern.match(line)
     if m:
-      self.cms_rescan_file.write("%s %.6f\n" % (self.timestamp_string(), float(m.group(1))))
-    
+      self.cms_rescan(float(m.group(1)))
+
+  def cms_mark(self, secs):
+    self.emit(CmsPhase(self.timestamp, 'mark', secs))
+
+  def cms_rescan(self, secs):
+    self.emit(CmsPhase(self.timestamp, 'rescan', secs))
 
   def line_has_gc(self, line):
-    m = re.match(LogParser.heapG1GCPattern, line, flags=0)
+    if '[Full GC' in line:
+      m = self.gc_alg_g1gc and LogParser.g1FullPattern.match(line)
+      if m:
+        # the young sizes come with the [Eden: line that follows with
+        # -XX:+PrintGCDetails, which is then part of the same full gc
+        self.gc_event(('0', 'M') * 4 + m.groups(), True)
+        self.full_gc_start()
+        return
+      m = self.gc_alg_cms and LogParser.cmsFullPattern.match(line)
+      if m:
+        self.cms_full_gc(m.groups())
+        return
+
+    m = '[Eden:' in line and LogParser.heapG1GCPattern.match(line)
     if m:
-      self.store_gc_amount(m)
-      self.gc = True
+      self.gc_event(m.groups(), False)
       return
 
-    m = re.match(LogParser.parallelPattern, line, flags=0)
+    m = '[PSYoungGen:' in line and LogParser.parallelPattern.match(line)
     if m:
-      self.store_gc_amount(m)
-      self.gc = True
+      self.gc_event(m.groups(), False)
       return
 
-    m = re.match(LogParser.parallelFullPattern, line, flags=0)
+    m = '[PSYoungGen:' in line and LogParser.parallelFullPattern.match(line)
     if m:
-      self.store_gc_amount(m)
-      self.full_gc = True
+      self.gc_event(m.groups(), True)
 
-    m = re.match(LogParser.heapCMSPattern, line, flags=0)
+    m = '[ParNew:' in line and LogParser.heapCMSPattern.match(line)
     if m:
-      self.store_gc_amount(m)
-      self.gc = True
+      self.gc_event(m.groups(), False)
 
     return
 
-  def store_gc_amount(self, matcher):
-      i = 1
-      self.pre_gc_young = self.scale(matcher.group(i), matcher.group(i+1))
+  def cms_full_gc(self, groups):
+    """A CMS full gc, which logs the old gen and the total, the young gen
+    being what the total has over the old gen."""
+    pre_old, post_old = self.scale(groups[0], groups[1]), self.scale(groups[2], groups[3])
+    pre_total, post_total = self.scale(groups[4], groups[5]), self.scale(groups[6], groups[7])
+    self.gc_event((str(pre_total - pre_old), 'M', str(post_total - post_old), 'M', str(pre_total), 'M', str(post_total), 'M'), True)
+
+  def full_gc_start(self):
+    self.full_gc_started = True
+
+  def gc_event(self, groups, full_gc):
+    self.store_gc_amount(groups)
+    if full_gc or self.full_gc_started:
+      self.full_gc = True
+    else:
+      self.gc = True
+    self.full_gc_started = False
+
+  def store_gc_amount(self, groups):
+      i = 0
+      self.pre_gc_young = self.scale(groups[i], groups[i+1])
 
       if self.gc_alg_g1gc or self.gc_alg_parallel:
         i += 2
-        self.pre_gc_young_target = self.scale(matcher.group(i), matcher.group(i+1))
+        self.pre_gc_young_target = self.scale(groups[i], groups[i+1])
 
       if self.gc_alg_cms:
         i += 2
-        self.post_gc_young = self.scale(matcher.group(i), matcher.group(i+1))
+        self.post_gc_young = self.scale(groups[i], groups[i+1])
 
       if self.gc_alg_g1gc:
         i += 2
-        self.pre_gc_survivor = self.scale(matcher.group(i), matcher.group(i+1))
+        self.pre_gc_survivor = self.scale(groups[i], groups[i+1])
         i += 2
-        self.post_gc_survivor = self.scale(matcher.group(i), matcher.group(i+1))
+        self.post_gc_survivor = self.scale(groups[i], groups[i+1])
 
       i += 2
-      self.pre_gc_total = self.scale(matcher.group(i), matcher.group(i+1))
+      self.pre_gc_total = self.scale(groups[i], groups[i+1])
       i += 2
-      self.post_gc_total = self.scale(matcher.group(i), matcher.group(i+1))
+      self.post_gc_total = self.scale(groups[i], groups[i+1])
 
       if self.gc_alg_g1gc:
         self.tenured_delta = (self.post_gc_total - self.post_gc_survivor) - (self.pre_gc_total - self.pre_gc_young - self.pre_gc_survivor)
@@ -565,49 +2358,1461 @@ class LogParser:
       return int(rawValue * 1024.0)
     return rawValue
 
-  def increment_pause_counts(self, pause_time):
-    self.total_pause_time = self.total_pause_time + pause_time
-
-    if pause_time < 0.050:
-      self.under_50 = self.under_50 + 1
-    elif pause_time < 0.090:
-      self.under_90 = self.under_90 + 1
-    elif pause_time < 0.120:
-      self.under_120 = self.under_120 + 1
-    elif pause_time < 0.150:
-      self.under_150 = self.under_150 + 1
-    elif pause_time < 0.200:
-      self.under_200 = self.under_200 + 1
+  def record_safepoint(self, stopped, time_to_safepoint, gc):
+    """Adds a stop to the totals of its wall-clock window, the same
+    windows as the pause percentiles, writing out the totals of the
+    previous window when this stop starts a new one."""
+    if self.timestamp is None:
+      return
+    self.emit(SafepointStop(self.timestamp, stopped, time_to_safepoint, gc))
+    window_start = self.timestamp - self.timestamp % self.percentile_window
+    if window_start != self.safepoint_window_start:
+      if self.safepoint_window[0]:
+        self.output_safepoint_window()
+      self.safepoint_window_start = window_start
+      self.safepoint_window = [0, 0, 0.0, 0.0, 0.0]
+    window = self.safepoint_window
+    window[0] += 1
+    window[2] += stopped
+    window[4] = max(window[4], time_to_safepoint)
+    if gc:
+      window[1] += 1
+      window[3] += stopped
+
+  def record_pause(self, pause_time):
+    """Adds the pause to the whole run's histogram and to the histogram of
+    its wall-clock window, writing out the percentiles of the previous
+    window when this pause starts a new one."""
+    self.pause_histogram.record(pause_time)
+    if self.timestamp is None:
+      return
+    window_start = self.timestamp - self.timestamp % self.percentile_window
+    if window_start != self.percentile_window_start:
+      if self.window_histogram.count:
+        self.output_pause_percentiles()
+      self.percentile_window_start = window_start
+      self.window_histogram = PauseHistogram()
+    self.window_histogram.record(pause_time)
+
+class LogFollower:
+  """Parses the lines appended to the log a LogParser has parsed so far,
+  following it through rotation and truncation."""
+
+  def __init__(self, logParser):
+    self.logParser = logParser
+    self.offset = logParser.parsed_bytes
+    self.f = open(logParser.input_file)
+    self.f.seek(self.offset)
+
+  def close(self):
+    self.f.close()
+
+  def poll(self):
+    """Parses the complete lines written since the last poll, returning
+    the number of bytes parsed."""
+    parsed = self.read_lines()
+    try:
+      stat = os.stat(self.logParser.input_file)
+    except OSError:
+      # rotated away and not yet replaced
+      return parsed
+    current = os.fstat(self.f.fileno())
+    if (stat.st_dev, stat.st_ino) != (current.st_dev, current.st_ino):
+      # the rest of the rotated file has been read above, carry on with
+      # the new one, the parser state and series go on across the two
+      self.f.close()
+      self.f = open(self.logParser.input_file)
+      self.offset = 0
+      parsed += self.read_lines()
+    elif stat.st_size < self.offset:
+      self.f.seek(0)
+      self.offset = 0
+      parsed += self.read_lines()
+    self.logParser.parsed_bytes = self.offset
+    return parsed
+
+  def read_lines(self):
+    start = self.offset
+    while True:
+      line = self.f.readline()
+      if not line.endswith('\n'):
+        # a partial line is parsed once the rest of it has been written
+        self.f.seek(self.offset)
+        return self.offset - start
+      self.logParser.parse_line(line)
+      self.offset += len(line)
+
+def compression(path):
+  """'gzip' or 'zstd' for a compressed log, going by its magic number."""
+  with open(path, 'rb') as f:
+    magic = f.read(4)
+  if magic[:2] == b'\x1f\x8b':
+    return 'gzip'
+  if magic == b'\x28\xb5\x2f\xfd':
+    return 'zstd'
+  return None
+
+def open_log(path):
+  """A file object over the contents of a log, gzip and zstd compressed
+  logs decompressed as they are read."""
+  kind = compression(path)
+  if kind == 'gzip':
+    return gzip.open(path, 'rb')
+  if kind == 'zstd':
+    return ZstdReader(path)
+  return open(path, 'rb')
+
+class ZstdReader:
+  """The decompressed contents of a zstd compressed log, from the zstd
+  command."""
+
+  def __init__(self, path):
+    self.path = path
+    try:
+      self.process = subprocess.Popen(['zstd', '-dcq', path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError, e:
+      raise IOError("reading %s needs the zstd command: %s" % (path, e))
+
+  def read(self, size):
+    data = self.process.stdout.read(size)
+    if not data and self.process.wait() != 0:
+      raise IOError("zstd could not decompress %s: %s" % (self.path, self.process.stderr.read().strip()))
+    return data
+
+  def readline(self):
+    return self.process.stdout.readline()
+
+  def close(self):
+    # zstd fails on the closed pipe when the log wasn't read through,
+    # which is of no interest
+    self.process.stdout.close()
+    self.process.stderr.close()
+    self.process.wait()
+
+def log_set(paths):
+  """The LogSet to read several logs, or a compressed one, through, None
+  for a single plain log that can be mapped."""
+  if len(paths) > 1 or compression(paths[0]):
+    return LogSet(paths)
+  return None
+
+class LogSet:
+  """Several logs parsed as one, such as the rotation set gc.log.0,
+  gc.log.1 ... gc.log.N.current, in the order of their first timestamps.
+  The logs are read and decompressed in a background thread that keeps
+  the parser fed with blocks of lines."""
+
+  # bytes read at a time, and how many blocks the reader thread can get
+  # ahead of the parser by
+  blockSize = 1 << 20
+  readAhead = 8
+
+  # lines searched for a log's first timestamp
+  headLines = 1000
+
+  def __init__(self, paths):
+    self.paths = paths
+    self.first_timestamps = [None] * len(paths)
+
+  def order(self, logParser):
+    """Sorts the logs by their first timestamps. Logs without one, such as
+    those with only uptime stamps, go by their names, gc.log.2 before
+    gc.log.10."""
+    def name_key(path):
+      return [int(part) if part.isdigit() else part for part in re.split('([0-9]+)', path)]
+    firsts = [(self.first_timestamp(path, logParser), path) for path in self.paths]
+    firsts.sort(key=lambda first: (first[0] is None, first[0], name_key(first[1])))
+    self.first_timestamps = [timestamp for timestamp, path in firsts]
+    self.paths = [path for timestamp, path in firsts]
+
+  def first_timestamp(self, path, logParser):
+    f = open_log(path)
+    try:
+      for line in islice(iter(f.readline, b''), LogSet.headLines):
+        timestamp = logParser.leading_timestamp(line)
+        if timestamp:
+          return timestamp
+    finally:
+      f.close()
+    return None
+
+  def select(self, start, end):
+    """Drops the logs that hold nothing from start up to end millis, the
+    lead-in ahead of start included, going by when the next log starts."""
+    start -= LogParser.windowLeadIn
+    following = self.first_timestamps[1:] + [None]
+    kept = [(path, first) for path, first, next in izip(self.paths, self.first_timestamps, following)
+            if (next is None or next > start) and (first is None or first < end)]
+    self.paths = [path for path, first in kept]
+    self.first_timestamps = [first for path, first in kept]
+
+  def determine_gc_alg(self, logParser):
+    for path in self.paths:
+      f = open_log(path)
+      try:
+        for line in iter(f.readline, b''):
+          if logParser.detect_gc_alg(line):
+            return
+      finally:
+        f.close()
+
+  def lines(self):
+    """Every line of the logs in turn."""
+    blocks = Queue.Queue(LogSet.readAhead)
+
+    def reader():
+      try:
+        for path in self.paths:
+          f = open_log(path)
+          try:
+            rest = b''
+            for block in iter(lambda: f.read(LogSet.blockSize), b''):
+              # hand over whole lines only
+              block = rest + block
+              end = block.rfind(b'\n') + 1
+              rest = block[end:]
+              if end:
+                blocks.put(block[:end])
+            # a log cut off mid line ends there, it doesn't run on into the
+            # first line of the next
+            if rest:
+              blocks.put(rest)
+          finally:
+            f.close()
+        blocks.put(None)
+      except Exception, e:
+        blocks.put(e)
+
+    thread = threading.Thread(target=reader)
+    # abandoned part way through, the reader is left blocked on a full queue
+    thread.daemon = True
+    thread.start()
+    for block in iter(blocks.get, None):
+      if isinstance(block, Exception):
+        raise block
+      for line in cStringIO.StringIO(block):
+        yield line
+
+  def parse(self, logParser):
+    logParser.parse_lines(self.lines())
+    # nothing carries on from where a log set ends
+    logParser.close_percentile_window()
+
+class ChunkParser(LogParser):
+  """Parses one chunk of the log in a worker process, recording the state
+  transitions for the parent to replay."""
+
+  def __init__(self, input_file):
+    LogParser.__init__(self, input_file)
+    self.recorded = []
+
+def record_transition(name):
+  def record(self, *args):
+    self.recorded.append((self.timestamp, name, args))
+  return record
+
+for name in LogParser.transitions:
+  setattr(ChunkParser, name, record_transition(name))
+
+def ignore_line(line):
+  pass
+
+def parse_chunk(args):
+  input_file, start, end, gc_alg, occupancy_threshold, ignored, profile = args
+  chunkParser = ChunkParser(input_file)
+  chunkParser.gc_alg_g1gc, chunkParser.gc_alg_cms, chunkParser.gc_alg_parallel = gc_alg
+  chunkParser.occupancy_threshold = occupancy_threshold
+  chunkParser.ignore(ignored)
+  profiler = Profiler(profile)
+  profiler.instrument(chunkParser)
+  try:
+    chunkParser.parse_log(start, end)
+  finally:
+    chunkParser.close_log()
+  return chunkParser.recorded, chunkParser.timestamp, profile and profiler.stats() or None
+
+def iter_events(path):
+  """Yields the events of a gc log, a path or a quoted glob of a rotation
+  set as on the command line, as the log is parsed. Nothing is kept once
+  it has been yielded and no series or charts are made, so a log of any
+  length can be consumed."""
+  paths = [path] if os.path.isfile(path) else log_paths(path)
+  if not paths:
+    raise IOError("no gc log found at %s" % path)
+  logParser = LogParser(paths[0])
+  events = []
+  logParser.emit = events.append
+  try:
+    logs = log_set(paths)
+    if logs is not None:
+      logs.order(logParser)
+      logs.determine_gc_alg(logParser)
+      lines = logs.lines()
     else:
-      self.over_200 = self.over_200 + 1
+      logParser.determine_gc_alg()
+      lines = logParser.mapped_log().lines()
+    for line in lines:
+      logParser.parse_line(line)
+      if events:
+        for event in events:
+          yield event
+        del events[:]
+    logParser.close_percentile_window()
+    for event in events:
+      yield event
+  finally:
+    logParser.cleanup()
+
+def parse_cached(logParser, cache):
+  """Parses the log, carrying on from its cache entry when there is one."""
+  start = cache.load(logParser) if cache else None
+  if start is None:
+    start = 0
+    logParser.determine_gc_alg()
+  logParser.parse_log(start)
+  if cache and logParser.parsed_bytes > start:
+    cache.checkpoint(logParser)
+
+def log_paths(pattern):
+  if os.path.isdir(pattern):
+    paths = [os.path.join(pattern, name) for name in os.listdir(pattern) if not name.startswith('.')]
+  else:
+    paths = glob.glob(pattern)
+  return sorted(path for path in paths if os.path.isfile(path))
+
+def fleet_paths(pattern):
+  """The logs of a fleet, every file below a directory, such as the
+  logs/<app>/gc.log of each app, or below the directories a glob matches
+  as well as the files it matches. A directory with no logs in it is
+  warned about rather than silently left out."""
+  paths = []
+  for match in [pattern] if os.path.isdir(pattern) else sorted(glob.glob(pattern)):
+    if os.path.isfile(match):
+      paths.append(match)
+    elif os.path.isdir(match):
+      found = []
+      for dirpath, dirnames, filenames in os.walk(match):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        found.extend(os.path.join(dirpath, name) for name in filenames if not name.startswith('.'))
+      if not found:
+        sys.stderr.write("no gc logs found in %s\n" % match)
+      paths.extend(found)
+  return sorted(set(path for path in paths if os.path.isfile(path)))
+
+def fleet_names(paths):
+  """Output names for the logs, their paths below the directory they share
+  so that e.g. */gc.log don't collide."""
+  common = os.path.dirname(os.path.commonprefix([os.path.dirname(os.path.abspath(path)) + os.sep for path in paths]))
+  names = []
+  for path in paths:
+    name = os.path.relpath(os.path.abspath(path), common).replace(os.sep, '-')
+    if name.endswith('.log'):
+      name = name[:-len('.log')]
+    names.append(name)
+  return names
+
+def analyze_fleet_log(args):
+  path, basefilename, use_cache, charts = args
+  try:
+    logParser = LogParser(path)
+    try:
+      logs = log_set([path])
+      if logs is not None:
+        logs.determine_gc_alg(logParser)
+        logs.parse(logParser)
+      else:
+        parse_cached(logParser, ParseCache() if use_cache else None)
+      if not (logParser.gc_alg_g1gc or logParser.gc_alg_cms or logParser.gc_alg_parallel):
+        raise ValueError('no gc algorithm detected, not a gc log?')
+      if not len(logParser.store.pause) and not len(logParser.store.safepoints):
+        raise ValueError('no gc events found')
+      summary = logParser.summary()
+      # merged into the fleet's, without the parent seeing the pauses
+      summary['histogram'] = logParser.pause_histogram.state()
+      if charts:
+        logParser.gnuplot(basefilename, None, None, verbose=False, discard_series=True)
+    finally:
+      logParser.cleanup()
+  except Exception, e:
+    # one unreadable log shouldn't take the rest of the fleet down with it
+    return path, None, str(e)
+  return path, summary, None
+
+fleetSortKeys = {'p99': 'p99_ms', 'p999': 'p999_ms', 'max': 'max_ms', 'gc': 'gc_pct', 'exhaustion': 'exhaustion', 'humongous': 'humongous'}
+
+def fleet_main(argv):
+  parser = argparse.ArgumentParser(prog='gc_log_visualizer.py fleet', description='Chart and summarize the gc logs of many JVMs')
+  parser.add_argument('logs', help='directory of gc logs, or a quoted glob of them')
+  parser.add_argument('outdir', nargs='?', default='.', help='directory for the charts and fleet-summary.txt')
+  parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='logs parsed at once')
+  parser.add_argument('--sort', choices=sorted(fleetSortKeys), default='p99', help='worst offenders by this come first')
+  parser.add_argument('--summary-only', action='store_true', help='skip the per-JVM charts')
+  parser.add_argument('--no-cache', action='store_true', help='neither read nor write the parse cache')
+  args = parser.parse_args(argv)
+
+  paths = fleet_paths(args.logs)
+  if not paths:
+    parser.error('no gc logs found at %s' % args.logs)
+  if not os.path.isdir(args.outdir):
+    os.makedirs(args.outdir)
+  tasks = [(path, os.path.join(args.outdir, name), not args.no_cache, not args.summary_only)
+           for path, name in izip(paths, fleet_names(paths))]
+
+  # a fresh worker per log, so one large log doesn't leave its memory
+  # held for the rest of the run
+  pool = multiprocessing.Pool(max(1, args.jobs), maxtasksperchild=1)
+  try:
+    results = []
+    for path, summary, error in pool.imap_unordered(analyze_fleet_log, tasks):
+      results.append((path, summary, error))
+      sys.stderr.write("%d/%d %s\n" % (len(results), len(tasks), path))
+  finally:
+    pool.terminate()
+
+  key = fleetSortKeys[args.sort]
+  summaries = sorted([(summary, path) for path, summary, error in results if summary],
+                     key=lambda result: result[0][key], reverse=True)
+  names = dict(izip(paths, fleet_names(paths)))
+
+  # the whole fleet's pauses, from the per-JVM histograms
+  fleet = PauseHistogram()
+  for summary, path in summaries:
+    fleet.merge(histogram_from_state(summary['histogram']))
+  fleet_summary = summarize_pauses(fleet, sum(summary['span_secs'] for summary, path in summaries),
+                                   sum(summary['exhaustion'] for summary, path in summaries),
+                                   sum(summary['humongous'] for summary, path in summaries))
+
+  width = max([len(name) for name in names.values()] + [5])
+  row = "%-*s %8d %9.1f %9.1f %9.1f %9.1f %9.1f %7.2f %10d %9d"
+  lines = ["%-*s %8s %9s %9s %9s %9s %9s %7s %10s %9s" % (width, 'jvm', 'pauses', 'p50(ms)', 'p90(ms)', 'p99(ms)', 'p99.9(ms)', 'max(ms)', 'gc%', 'exhaustion', 'humongous')]
+  for summary, path in summaries + [(fleet_summary, None)]:
+    lines.append(row % (width, names.get(path, 'fleet'), summary['pauses'], summary['p50_ms'], summary['p90_ms'], summary['p99_ms'],
+                        summary['p999_ms'], summary['max_ms'], summary['gc_pct'], summary['exhaustion'], summary['humongous']))
+  for path, summary, error in results:
+    if error:
+      lines.append("%-*s failed: %s" % (width, names[path], error))
+  table = '\n'.join(lines) + '\n'
+  sys.stdout.write(table)
+  with open(os.path.join(args.outdir, 'fleet-summary.txt'), 'w') as f:
+    f.write(table)
+
+class HumongousParser(LogParser):
+  """Reads only the timestamps and humongous allocation requests of a log,
+  keeping the full size of each request, for the humongous subcommand."""
+
+  # G1 region sizes, an object of half a region or more is humongous
+  regionSizes = [1 << shift for shift in range(20, 26)]
 
-  def reset_pause_counts(self):
-    self.under_50 = 0
-    self.under_90 = 0
-    self.under_120 = 0
-    self.under_150 = 0
-    self.under_200 = 0
-    self.over_200 = 0
-    self.total_pause_time = 0
+  def __init__(self, input_file):
+    LogParser.__init__(self, input_file)
+    self.request_times = array.array('d')
+    self.request_sizes = array.array('l')
+
+  def parse_line(self, line):
+    self.line_has_timestamp(line)
+    if 'humongous allocation]' in line:
+      self.collect_humongous_objects(line)
+
+  def parse_log(self, start=0, end=None):
+    # jump from request to request, looking back from each for the dated
+    # line ahead of it no further than the request before, rather than
+    # splitting every line for its timestamp
+    log = self.mapped_log()
+    data = log.data
+    stop = log.range_end(start, end)
+    searched = start
+    found = data.find(b'humongous allocation]', start, stop)
+    while found >= 0:
+      line_start = data.rfind(b'\n', 0, found) + 1
+      line_end = log.line_end(found)
+      offset = line_end
+      while offset > searched:
+        previous = max(data.rfind(b'\n', searched, offset - 1) + 1, searched)
+        timestamp = self.leading_timestamp(data[previous:offset])
+        if timestamp:
+          self.timestamp = timestamp
+          break
+        offset = previous
+      self.collect_humongous_objects(data[line_start:line_end])
+      searched = line_end
+      found = data.find(b'humongous allocation]', line_end, stop)
+    self.parsed_bytes = stop
+
+  def humongous_object(self, size):
+    # a log with only uptime stamps still has its requests counted
+    self.request_times.append(self.timestamp or 0)
+    self.request_sizes.append(size)
+
+  def report(self, name, interval):
+    """The humongous subcommand's output, the avoided allocation rates
+    broken down by interval millis."""
+    sizes = self.request_sizes
+    total = len(sizes)
+    lines = ["%d humongous objects referenced in %s" % (total, name)]
+    if not total:
+      return '\n'.join(lines) + '\n'
+
+    for region in HumongousParser.regionSizes:
+      fit = sum(1 for size in sizes if size < region // 2)
+      lines.append("%2.0f%% would not be humongous with a %dmb g1 region size" % (100.0 * fit / total, region >> 20))
+
+    # request sizes by power of two
+    counts = {}
+    for size in sizes:
+      bits = max(size, 1).bit_length() - 1
+      counts[bits] = counts.get(bits, 0) + 1
+    lines.append('')
+    lines.append("%-16s %9s %7s" % ('request size', 'requests', 'pct'))
+    for bits in range(min(counts), max(counts) + 1):
+      label = "%s-%s" % (byte_size_string(1 << bits), byte_size_string(1 << (bits + 1)))
+      lines.append("%-16s %9d %6.1f%%" % (label, counts.get(bits, 0), 100.0 * counts.get(bits, 0) / total))
+
+    # the bytes each region size would have allocated normally instead
+    dated = [(timestamp, size) for timestamp, size in izip(self.request_times, sizes) if timestamp]
+    span = (dated[-1][0] - dated[0][0]) / 1000.0 if len(dated) > 1 else 0
+    lines.append('')
+    lines.append("%-12s %12s %10s" % ('region size', 'avoided MB', 'MB/sec'))
+    for region in HumongousParser.regionSizes:
+      avoided = sum(size for size in sizes if size < region // 2) / 1048576.0
+      lines.append("%-12s %12.1f %10.3f" % ("%dmb" % (region >> 20), avoided, avoided / span if span else 0))
+
+    if dated:
+      windows = {}
+      for timestamp, size in dated:
+        window = windows.setdefault(timestamp - timestamp % interval, [0] * (len(HumongousParser.regionSizes) + 1))
+        window[0] += 1
+        for i, region in enumerate(HumongousParser.regionSizes):
+          if size < region // 2:
+            window[i + 1] += size
+      lines.append('')
+      lines.append("avoided MB/sec per %g minutes" % (interval / 60000.0))
+      lines.append("%-19s %9s" % ('time', 'requests') + ''.join("%8s" % ("%dmb" % (region >> 20)) for region in HumongousParser.regionSizes))
+      for start in sorted(windows):
+        window = windows[start]
+        lines.append("%-19s %9d" % (timestamp_string(start), window[0]) +
+                     ''.join("%8.3f" % (avoided / 1048576.0 / (interval / 1000.0)) for avoided in window[1:]))
+    return '\n'.join(lines) + '\n'
+
+def byte_size_string(size):
+  if size >= 1 << 20:
+    return "%dM" % (size >> 20)
+  if size >= 1 << 10:
+    return "%dK" % (size >> 10)
+  return "%dB" % size
+
+def humongous_main(argv):
+  parser = argparse.ArgumentParser(prog='gc_log_visualizer.py humongous', description='How many humongous allocations each G1 region size would avoid')
+  parser.add_argument('gc_log', help='the gc log, or a quoted glob of a rotation set, gzip or zstd compressed or not')
+  parser.add_argument('--interval', type=float, default=60, help='minutes each row of the avoided allocation rate table covers')
+  args = parser.parse_args(argv)
+
+  paths = [args.gc_log] if os.path.isfile(args.gc_log) else log_paths(args.gc_log)
+  if not paths:
+    parser.error('no gc log found at %s' % args.gc_log)
+  humongousParser = HumongousParser(paths[0])
+  logs = log_set(paths)
+  try:
+    if logs is not None:
+      logs.order(humongousParser)
+      humongousParser.parse_lines(logs.lines())
+    else:
+      humongousParser.parse_log()
+  finally:
+    humongousParser.cleanup()
+  sys.stdout.write(humongousParser.report(args.gc_log, int(args.interval * 60000)))
+
+def mann_whitney(a, b):
+  """The one sided p-value of a Mann-Whitney U test that the values
+  counted in b tend to be larger than those counted in a, both dicts of
+  value -> count. Tied values share their average rank, so the buckets of
+  two pause histograms can be compared without the pauses themselves. The
+  normal approximation is used, sound from a few dozen values each."""
+  count_a, count_b = sum(a.values()), sum(b.values())
+  count = count_a + count_b
+  if not count_a or not count_b:
+    return 1.0
+  rank_sum, ties, seen = 0.0, 0.0, 0
+  for value in sorted(set(a) | set(b)):
+    tied = a.get(value, 0) + b.get(value, 0)
+    rank_sum += b.get(value, 0) * (seen + (tied + 1) / 2.0)
+    ties += float(tied) ** 3 - tied
+    seen += tied
+  u = rank_sum - count_b * (count_b + 1) / 2.0
+  variance = count_a * count_b / 12.0 * ((count + 1) - ties / (count * (count - 1)))
+  if variance <= 0:
+    return 1.0
+  z = (u - count_a * count_b / 2.0 - 0.5) / math.sqrt(variance)
+  return 0.5 * math.erfc(z / math.sqrt(2))
+
+def false_discovery_cutoff(p_values, alpha):
+  """The largest p-value still significant when testing them all at once,
+  by the Benjamini-Hochberg procedure, so that about alpha of the windows
+  flagged are flagged by chance. -1 when none are."""
+  cutoff = -1
+  for rank, p in enumerate(sorted(p_values), 1):
+    if p <= alpha * rank / len(p_values):
+      cutoff = p
+  return cutoff
+
+def value_counts(values):
+  counts = {}
+  for value in values:
+    counts[value] = counts.get(value, 0) + 1
+  return counts
+
+def compare_windows(logParser, align, window):
+  """The pauses and heap after gc of a parsed log in each window millis
+  long of the comparison, by window index. Windows count from the log's
+  first event when aligned by elapsed time, or from the midnight before
+  it by the clock. Only the windows the log covers all of are kept, as a
+  part window would show less time in gc than there was."""
+  store = logParser.store
+  heap = [series for series in (store.gc, store.full_gc) if len(series)]
+  timestamps = [series.column('timestamp') for series in [store.pause] + heap if len(series)]
+  if not timestamps:
+    raise ValueError('no gc events found')
+  first = min(column[0] for column in timestamps)
+  last = max(column[-1] for column in timestamps)
+  origin = first if align == 'elapsed' else first - first % (24 * 3600 * 1000)
+  lo = int(math.ceil((first - origin) / float(window)))
+  hi = int((last - origin) // window)
+
+  histograms = dict((index, PauseHistogram()) for index in range(lo, hi))
+  # total MB after gc and gcs
+  heaps = dict((index, [0, 0]) for index in range(lo, hi))
+  for timestamp, pause in izip(store.pause.column('timestamp'), store.pause.column('pause')):
+    histogram = histograms.get(int((timestamp - origin) // window))
+    if histogram is not None:
+      histogram.record(pause)
+  for series in heap:
+    for timestamp, post_gc_total in izip(series.column('timestamp'), series.column('post_gc_total')):
+      totals = heaps.get(int((timestamp - origin) // window))
+      if totals is not None:
+        totals[0] += post_gc_total
+        totals[1] += 1
+  return {
+    'path': logParser.input_file,
+    'windows': dict((index, (histograms[index].state(), heaps[index])) for index in range(lo, hi)),
+  }
+
+def compare_log(args):
+  """Parses one log of a comparison, or loads it from a cache entry, in a
+  worker process, returning its compare_windows."""
+  source, use_cache, align, window = args
+  try:
+    if source.endswith('.cache') and os.path.isfile(source):
+      logParser = ParseCache().load_entry(source)
+    else:
+      paths = [source] if os.path.isfile(source) else log_paths(source)
+      if not paths:
+        raise IOError("no gc log found at %s" % source)
+      logParser = LogParser(paths[0])
+      logs = log_set(paths)
+      if logs is not None:
+        logs.order(logParser)
+        logs.determine_gc_alg(logParser)
+        logs.parse(logParser)
+      else:
+        parse_cached(logParser, ParseCache() if use_cache else None)
+    try:
+      result = compare_windows(logParser, align, window)
+    finally:
+      logParser.cleanup()
+    if not os.path.isfile(source):
+      # a rotation set goes by its glob
+      result['path'] = source
+  except Exception, e:
+    return source, None, str(e)
+  return source, result, None
+
+def window_metrics(histogram_state, heap, window):
+  """p50 and p99 pause in millis, percent of the window in gc and mean MB
+  after gc, None without a gc, of one log's window."""
+  histogram = histogram_from_state(histogram_state)
+  p50, p99 = histogram.percentiles([50, 99])
+  return {
+    'p50_ms': p50 / 1000.0,
+    'p99_ms': p99 / 1000.0,
+    'gc_pct': histogram.total / (window * 10.0),
+    'heap_mb': heap[0] / float(heap[1]) if heap[1] else None,
+  }
+
+# regressed windows listed in compare.txt
+compareListed = 20
+
+# the numbers compared and their column headings, a rise in any is worse
+compareMetrics = (('p50_ms', 'p50(ms)'), ('p99_ms', 'p99(ms)'), ('gc_pct', 'gc%'), ('heap_mb', 'heap(MB)'))
+
+def compare_runs(baseline, candidate, window, alpha, min_change):
+  """Compares the windows two logs have in common. Each metric over the
+  common windows is tested for a rise across the per-window values, and
+  each window's pauses for a rise against the same window of the
+  baseline, at a false discovery rate of alpha over all the windows. A
+  rise is flagged when it is significant and at least min_change percent."""
+  common = sorted(set(baseline['windows']) & set(candidate['windows']))
+  base_metrics = [window_metrics(*baseline['windows'][index] + (window,)) for index in common]
+  metrics = [window_metrics(*candidate['windows'][index] + (window,)) for index in common]
+
+  def change(before, after):
+    return (after - before) * 100.0 / before if before else 0
+
+  overall = []
+  for key, heading in compareMetrics:
+    before = [row[key] for row in base_metrics if row[key] is not None]
+    after = [row[key] for row in metrics if row[key] is not None]
+    mean_before = sum(before) / len(before) if before else 0
+    mean_after = sum(after) / len(after) if after else 0
+    p = mann_whitney(value_counts(before), value_counts(after))
+    overall.append({'metric': key, 'heading': heading, 'baseline': mean_before, 'candidate': mean_after,
+                    'change_pct': change(mean_before, mean_after), 'p': p,
+                    'regression': p < alpha and change(mean_before, mean_after) >= min_change})
+
+  p_values = [mann_whitney(dict(baseline['windows'][index][0]['counts']), dict(candidate['windows'][index][0]['counts']))
+              for index in common]
+  cutoff = false_discovery_cutoff(p_values, alpha)
+  windows = []
+  for index, before, after, p in izip(common, base_metrics, metrics, p_values):
+    windows.append({'window': index, 'baseline': before, 'candidate': after, 'p': p,
+                    'regression': p <= cutoff and change(before['p99_ms'], after['p99_ms']) >= min_change})
+  return overall, windows
+
+def window_label(index, window):
+  """A window's start as hours:minutes from the alignment origin."""
+  minutes = index * window // 60000
+  return "+%d:%02d" % (minutes // 60, minutes % 60)
+
+def compare_main(argv):
+  parser = argparse.ArgumentParser(prog='gc_log_visualizer.py compare', description='Compare the gc logs of runs against the first, such as before and after a flag change')
+  parser.add_argument('logs', nargs='+', help='gc logs, quoted globs of rotation sets or parse cache entries, the first being the baseline')
+  parser.add_argument('-o', '--outdir', default='.', help='directory for the overlaid charts and compare.txt')
+  parser.add_argument('--align', choices=('elapsed', 'clock'), default='elapsed', help='line the runs up by time since their first event, or by time of day')
+  parser.add_argument('--window', type=float, default=10, help='minutes compared at a time')
+  parser.add_argument('--alpha', type=float, default=0.05, help='significance level of the regression tests')
+  parser.add_argument('--min-change', type=float, default=5, help='smallest rise in percent flagged as a regression')
+  parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='logs parsed at once')
+  parser.add_argument('--no-charts', action='store_true', help='only write the comparison tables')
+  parser.add_argument('--no-cache', action='store_true', help='neither read nor write the parse cache')
+  args = parser.parse_args(argv)
+  if len(args.logs) < 2:
+    parser.error('at least two logs are needed to compare')
+  window = int(args.window * 60000)
+  if window <= 0:
+    parser.error('--window must be more than 0')
+  if not os.path.isdir(args.outdir):
+    os.makedirs(args.outdir)
+
+  tasks = [(source, not args.no_cache, args.align, window) for source in args.logs]
+  pool = multiprocessing.Pool(max(1, min(args.jobs, len(tasks))), maxtasksperchild=1)
+  try:
+    results = []
+    for source, result, error in pool.imap(compare_log, tasks):
+      if error:
+        parser.error("could not read %s: %s" % (source, error))
+      results.append(result)
+      sys.stderr.write("%d/%d %s\n" % (len(results), len(tasks), source))
+  finally:
+    pool.terminate()
+
+  names = fleet_names([result['path'] for result in results])
+  for i, name in enumerate(names):
+    if names.index(name) < i:
+      names[i] = "%s#%d" % (name, i + 1)
+
+  baseline = results[0]
+  width = max(len(name) for name in names + ['metric'])
+  lines = ["%s is the baseline, aligned by %s time in %g minute windows" % (names[0], args.align, args.window)]
+  window_lines = ["%-8s %-*s %9s %9s %9s %9s %7s %7s %9s %9s %9s" % ('window', width, 'run', 'p50(ms)', 'was', 'p99(ms)', 'was', 'gc%', 'was', 'heap(MB)', 'was', 'p-value')]
+  regressions = 0
+  for name, candidate in izip(names[1:], results[1:]):
+    overall, windows = compare_runs(baseline, candidate, window, args.alpha, args.min_change)
+    lines.append('')
+    if not windows:
+      lines.append("%s has no windows in common with %s" % (name, names[0]))
+      continue
+    lines.append("%s against %s over %d windows" % (name, names[0], len(windows)))
+    lines.append("%-9s %12s %12s %9s %9s" % ('metric', names[0][:12], name[:12], 'change', 'p-value'))
+    for row in overall:
+      lines.append("%-9s %12.3f %12.3f %+8.1f%% %9.2g%s" % (row['heading'], row['baseline'], row['candidate'], row['change_pct'], row['p'],
+                                                           '  REGRESSION' if row['regression'] else ''))
+      regressions += row['regression']
+    flagged = [row for row in windows if row['regression']]
+    if flagged:
+      lines.append("pauses regressed in %d of the windows:" % len(flagged))
+    # the rest are in compare-windows.txt
+    for row in flagged[:compareListed]:
+      lines.append("  %-8s p99 %.1fms -> %.1fms, p50 %.1fms -> %.1fms, p-value %.2g" % (
+          window_label(row['window'], window), row['baseline']['p99_ms'], row['candidate']['p99_ms'],
+          row['baseline']['p50_ms'], row['candidate']['p50_ms'], row['p']))
+    if len(flagged) > compareListed:
+      lines.append("  and %d more, see compare-windows.txt" % (len(flagged) - compareListed))
+    for row in windows:
+      before, after = row['baseline'], row['candidate']
+      window_lines.append("%-8s %-*s %9.1f %9.1f %9.1f %9.1f %7.2f %7.2f %9s %9s %9.2g%s" % (
+          window_label(row['window'], window), width, name, after['p50_ms'], before['p50_ms'], after['p99_ms'], before['p99_ms'],
+          after['gc_pct'], before['gc_pct'], '-' if after['heap_mb'] is None else "%.0f" % after['heap_mb'],
+          '-' if before['heap_mb'] is None else "%.0f" % before['heap_mb'], row['p'], '  REGRESSION' if row['regression'] else ''))
+
+  report = '\n'.join(lines) + '\n'
+  sys.stdout.write(report)
+  with open(os.path.join(args.outdir, 'compare.txt'), 'w') as f:
+    f.write(report)
+  with open(os.path.join(args.outdir, 'compare-windows.txt'), 'w') as f:
+    f.write('\n'.join(window_lines) + '\n')
+  if not args.no_charts:
+    compare_charts(results, names, window, args.align, args.outdir)
+  return 1 if regressions else 0
+
+def compare_charts(results, names, window, align, outdir):
+  """Overlays the runs' per-window pause percentiles, time in gc and heap
+  after gc, a line per run."""
+  dat_dir = tempfile.mkdtemp(prefix='gc_log_visualizer.')
+  try:
+    dat_files = []
+    for i, result in enumerate(results):
+      path = os.path.join(dat_dir, 'compare-%d.dat' % i)
+      with open(path, 'w') as f:
+        for index in sorted(result['windows']):
+          metrics = window_metrics(*result['windows'][index] + (window,))
+          f.write("%.4f %.3f %.3f %.4f %s\n" % (index * window / 3600000.0, metrics['p50_ms'], metrics['p99_ms'], metrics['gc_pct'],
+                                               '?' if metrics['heap_mb'] is None else "%.1f" % metrics['heap_mb']))
+      dat_files.append(path)
+
+    xlabel = 'hours since the first event' if align == 'elapsed' else 'hours since midnight of the first day'
+    charts = ChartRenderer()
+    for chart, column, ylabel in (('p50', 2, 'millis'), ('p99', 3, 'millis'), ('gc', 4, '% of time in gc'), ('heap', 5, 'MB after gc')):
+      plots = ', '.join("\"%s\" using 1:%d title \"%s\" with lines" % (path, column, name) for path, name in izip(dat_files, names))
+      charts.append("set term png size 1024,768; set output \"%s\"; set xlabel \"%s\"; set ylabel \"%s\"; plot %s" % (
+          os.path.join(outdir, 'compare-%s.png' % chart), xlabel, ylabel, plots))
+    charts.join()
+  finally:
+    shutil.rmtree(dat_dir)
+
+def run_service_job(args):
+  """Parses a log in a worker process, writing its summary.json, the report
+  of --export html and, with charts, the pngs into the job's directory,
+  which the worker works in. Returns the error if it failed and the secs
+  it took."""
+  log, job_dir, charts = args
+  start = time.time()
+  try:
+    os.chdir(job_dir)
+    logParser = LogParser(log)
+    try:
+      logs = log_set([log])
+      if logs is not None:
+        logs.determine_gc_alg(logParser)
+        logs.parse(logParser)
+      else:
+        logParser.determine_gc_alg()
+        logParser.parse_log()
+      # the whole log is parsed, so its last window is complete
+      logParser.close_percentile_window()
+      with open('summary.json', 'w') as f:
+        json.dump(summary_document(logParser, log, {}), f, indent=2, sort_keys=True)
+      export_html(logParser.store, 'report')
+      if charts:
+        logParser.gnuplot('gc', None, None, verbose=False, discard_series=True)
+    finally:
+      logParser.cleanup()
+  except Exception, e:
+    return str(e), time.time() - start
+  return None, time.time() - start
+
+def service_worker(connection, args):
+  """A job's worker process, sending run_service_job's result back. ^C and
+  a service manager's SIGTERM are the service's to handle, which stops its
+  workers itself."""
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  signal.signal(signal.SIGTERM, signal.SIG_DFL)
+  connection.send(run_service_job(args))
+  connection.close()
+
+def file_digest(f):
+  digest = hashlib.sha1()
+  for block in iter(lambda: f.read(1 << 20), b''):
+    digest.update(block)
+  return digest.hexdigest()
+
+class AnalysisService:
+  """The jobs of the serve subcommand, up to jobs of them run at once, each
+  in a worker process of its own. A job is named by the sha1 of its log, so
+  the same log submitted again is the same job, and works in a directory of
+  its own. Finished jobs are kept until their directories pass max_bytes,
+  least recently used going first, and are picked up again when the service
+  restarts, which runs the jobs it cut short again."""
+
+  uploadName = 'gc.log'
+  stateName = 'job.json'
+
+  def __init__(self, root, jobs=1, queue=64, max_bytes=2 << 30, charts=True):
+    # the workers work in their jobs' directories
+    root = os.path.abspath(root)
+    self.jobs_dir = os.path.join(root, 'jobs')
+    self.uploads_dir = os.path.join(root, 'uploads')
+    self.queue = queue
+    self.max_bytes = max_bytes
+    self.charts = charts
+    self.lock = threading.Lock()
+    self.jobs = {}
+    self.pending = 0
+    self.slots = threading.Semaphore(max(1, jobs))
+    self.workers = set()
+    self.closed = False
+    if os.path.isdir(self.uploads_dir):
+      shutil.rmtree(self.uploads_dir)
+    for path in (self.jobs_dir, self.uploads_dir):
+      if not os.path.isdir(path):
+        os.makedirs(path)
+    self.load()
+
+  def load(self):
+    """Picks up the jobs from before a restart, queueing the ones still
+    pending when it stopped again, and dropping any without a state."""
+    for job_id in os.listdir(self.jobs_dir):
+      job_dir = os.path.join(self.jobs_dir, job_id)
+      state = os.path.join(job_dir, AnalysisService.stateName)
+      try:
+        with open(state) as f:
+          job = json.load(f)
+        job['used'] = os.path.getmtime(state)
+      except (IOError, OSError, ValueError), e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        continue
+      self.jobs[job_id] = job
+      if job['status'] == 'pending':
+        # what the worker wrote before it was stopped, all but the upload
+        for name in os.listdir(job_dir):
+          if name not in (AnalysisService.uploadName, AnalysisService.stateName):
+            path = os.path.join(job_dir, name)
+            if os.path.isdir(path):
+              shutil.rmtree(path, ignore_errors=True)
+            else:
+              os.remove(path)
+        log = os.path.join(job_dir, AnalysisService.uploadName) if job['log'] == 'upload' else job['log']
+        self.start(job_id, log, job_dir)
+
+  def close(self):
+    with self.lock:
+      self.closed = True
+      workers = list(self.workers)
+    for worker in workers:
+      if worker.is_alive():
+        worker.terminate()
+
+  def submit_upload(self, stream, length):
+    """Queues a job for the length bytes of log read from stream."""
+    fd, upload = tempfile.mkstemp(dir=self.uploads_dir)
+    digest = hashlib.sha1()
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        while length > 0:
+          block = stream.read(min(length, 1 << 20))
+          if not block:
+            raise IOError('the upload ended early')
+          digest.update(block)
+          f.write(block)
+          length -= len(block)
+      return self.submit(digest.hexdigest(), upload, None)
+    finally:
+      if os.path.exists(upload):
+        os.remove(upload)
+
+  def submit_path(self, path):
+    """Queues a job for a log on this machine, read where it is."""
+    with open(path, 'rb') as f:
+      job_id = file_digest(f)
+    return self.submit(job_id, None, path)
+
+  def submit(self, job_id, upload, path):
+    """The job for a log and whether it was already submitted, queueing it
+    unless it is pending or done. The job is None when the queue is full."""
+    with self.lock:
+      job = self.jobs.get(job_id)
+      if job is not None and job['status'] != 'failed':
+        job['used'] = time.time()
+        return dict(job), True
+      if self.pending >= self.queue:
+        return None, False
+      job_dir = os.path.join(self.jobs_dir, job_id)
+      # a failed job is run again
+      shutil.rmtree(job_dir, ignore_errors=True)
+      os.makedirs(job_dir)
+      if upload:
+        path = os.path.join(job_dir, AnalysisService.uploadName)
+        os.rename(upload, path)
+      job = {'id': job_id, 'status': 'pending', 'log': upload and 'upload' or path, 'error': None, 'secs': None,
+             'files': [], 'bytes': 0, 'used': time.time()}
+      self.jobs[job_id] = job
+      # so a restart knows to run it
+      self.save(job)
+      self.start(job_id, path, job_dir)
+      return dict(job), False
+
+  def start(self, job_id, log, job_dir):
+    """Queues a pending job, called with the lock held or before serving."""
+    self.pending += 1
+    runner = threading.Thread(target=self.run, args=(job_id, log, job_dir))
+    runner.daemon = True
+    runner.start()
+
+  def run(self, job_id, log, job_dir):
+    """Runs a job once a slot is free, on a thread of its own. A fresh
+    worker per job, so one large log doesn't leave its memory held for the
+    jobs after it, and a worker that dies, killed for running out of
+    memory say, fails its job and frees its slot."""
+    start = time.time()
+    result = None
+    try:
+      with self.slots:
+        result = self.run_worker(log, job_dir)
+    except EnvironmentError, e:
+      result = str(e), time.time() - start
+    finally:
+      if result is None:
+        result = 'the worker died', time.time() - start
+      with self.lock:
+        closed = self.closed
+      # a job cut short by the service stopping is left pending, for load()
+      # to run again after a restart
+      if not closed:
+        self.finished(job_id, result)
+
+  def run_worker(self, log, job_dir):
+    """run_service_job's result from a worker process, or the worker's exit
+    status as the error when it died without one."""
+    start = time.time()
+    receiver, sender = multiprocessing.Pipe(False)
+    worker = multiprocessing.Process(target=service_worker, args=(sender, (log, job_dir, self.charts)))
+    with self.lock:
+      if self.closed:
+        return None
+      self.workers.add(worker)
+    try:
+      worker.start()
+      # so the receiver sees the end of the pipe when the worker dies
+      sender.close()
+      try:
+        result = receiver.recv()
+      except EOFError:
+        result = None
+      worker.join()
+    finally:
+      sender.close()
+      receiver.close()
+      with self.lock:
+        self.workers.discard(worker)
+    if result is None:
+      result = 'the worker exited with status %s' % worker.exitcode, time.time() - start
+    return result
+
+  def finished(self, job_id, result):
+    """Records a job's outcome, on the job's thread."""
+    error, secs = result
+    job_dir = os.path.join(self.jobs_dir, job_id)
+    upload = os.path.join(job_dir, AnalysisService.uploadName)
+    # the report is all that is kept of an upload
+    if os.path.exists(upload):
+      os.remove(upload)
+    files = sorted(name for name in os.listdir(job_dir) if name != AnalysisService.stateName)
+    with self.lock:
+      job = self.jobs[job_id]
+      job.update({'status': 'failed' if error else 'done', 'error': error, 'secs': secs, 'files': files,
+                  'bytes': sum(os.path.getsize(os.path.join(job_dir, name)) for name in files)})
+      self.pending -= 1
+      self.save(job)
+      self.evict(job_id)
+
+  def save(self, job):
+    """Writes the job's state into its directory, called with the lock held."""
+    with open(os.path.join(self.jobs_dir, job['id'], AnalysisService.stateName), 'w') as f:
+      json.dump(dict((key, value) for key, value in job.items() if key != 'used'), f)
+
+  def evict(self, keep):
+    """Drops the least recently used finished jobs until those left fit in
+    max_bytes, called with the lock held."""
+    finished = [job for job in self.jobs.values() if job['status'] != 'pending']
+    total = sum(job['bytes'] for job in finished)
+    for job in sorted(finished, key=lambda job: job['used']):
+      if total <= self.max_bytes:
+        break
+      if job['id'] != keep:
+        del self.jobs[job['id']]
+        shutil.rmtree(os.path.join(self.jobs_dir, job['id']), ignore_errors=True)
+        total -= job['bytes']
+
+  def job(self, job_id):
+    """A copy of the job, marked as used, or None for an unknown or
+    evicted one."""
+    with self.lock:
+      job = self.jobs.get(job_id)
+      if job is None:
+        return None
+      job['used'] = time.time()
+      if job['status'] != 'pending':
+        # so the order survives a restart
+        try:
+          os.utime(os.path.join(self.jobs_dir, job_id, AnalysisService.stateName), None)
+        except OSError, e:
+          pass
+      return dict(job)
+
+  def listing(self):
+    with self.lock:
+      return sorted((dict(job) for job in self.jobs.values()), key=lambda job: job['used'], reverse=True)
+
+  def file_path(self, job_id, name):
+    return os.path.join(self.jobs_dir, job_id, name)
+
+class ServiceServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+  # bursts of submissions wait to be accepted rather than being refused
+  request_queue_size = 128
+
+class ServiceHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """The serve subcommand's http interface:
+
+    POST /jobs              queues the log in the request body
+    POST /jobs?path=<log>   queues a log on this machine
+    GET  /jobs              every job, most recently used first
+    GET  /jobs/<id>         a job's status and the files it wrote
+    GET  /jobs/<id>/<file>  one of those, with range requests supported
+  """
+
+  server_version = 'gc_log_visualizer'
+  jobIdPattern = re.compile('^[0-9a-f]{40}$')
+  rangePattern = re.compile('^bytes=([0-9]*)-([0-9]*)$')
+
+  def do_POST(self):
+    service = self.server.service
+    url = urlparse.urlparse(self.path)
+    if url.path.rstrip('/') != '/jobs':
+      return self.send_json(404, {'error': 'not found'})
+    query = urlparse.parse_qs(url.query)
+    try:
+      if 'path' in query:
+        path = os.path.abspath(query['path'][0])
+        if not os.path.isfile(path):
+          return self.send_json(400, {'error': 'no log at %s' % path})
+        job, duplicate = service.submit_path(path)
+      else:
+        length = self.headers.getheader('content-length')
+        if not length:
+          return self.send_json(411, {'error': 'the log is uploaded as the request body, with a content-length'})
+        job, duplicate = service.submit_upload(self.rfile, int(length))
+    except (IOError, OSError, ValueError), e:
+      return self.send_json(400, {'error': str(e)})
+    if job is None:
+      return self.send_json(503, {'error': 'too many jobs queued, try again later'}, {'Retry-After': '5'})
+    self.send_json(200 if job['status'] == 'done' else 202, self.job_document(job, duplicate))
+
+  def do_GET(self):
+    service = self.server.service
+    parts = urlparse.urlparse(self.path).path.strip('/').split('/')
+    if parts[0] != 'jobs':
+      return self.send_json(404, {'error': 'not found'})
+    if len(parts) == 1:
+      return self.send_json(200, {'jobs': [self.job_document(job) for job in service.listing()]})
+    job = service.job(parts[1]) if ServiceHandler.jobIdPattern.match(parts[1]) else None
+    if job is None:
+      return self.send_json(404, {'error': 'no such job, it may have been evicted'})
+    if len(parts) == 2:
+      return self.send_json(200, self.job_document(job))
+    if len(parts) == 3 and parts[2] in job['files'] and parts[2] != AnalysisService.stateName:
+      return self.send_file(service.file_path(job['id'], parts[2]))
+    self.send_json(404, {'error': 'not found'})
+
+  def job_document(self, job, duplicate=None):
+    document = dict((key, job[key]) for key in ('id', 'status', 'log', 'error', 'secs'))
+    document['url'] = '/jobs/%s' % job['id']
+    document['files'] = ['/jobs/%s/%s' % (job['id'], name) for name in job['files'] if name != AnalysisService.stateName]
+    if duplicate is not None:
+      document['duplicate'] = duplicate
+    return document
+
+  def send_json(self, status, document, headers={}):
+    body = json.dumps(document, indent=2, sort_keys=True) + '\n'
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    for name, value in headers.items():
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(body)
+
+  def send_file(self, path):
+    try:
+      f = open(path, 'rb')
+    except IOError, e:
+      # evicted since
+      return self.send_json(404, {'error': 'not found'})
+    with f:
+      size = os.fstat(f.fileno()).st_size
+      start, end, status = 0, size - 1, 200
+      m = ServiceHandler.rangePattern.match(self.headers.getheader('range') or '')
+      if m and (m.group(1) or m.group(2)):
+        if m.group(1):
+          start = int(m.group(1))
+          end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+        else:
+          # the last n bytes
+          start = max(size - int(m.group(2)), 0)
+        if start > end:
+          return self.send_json(416, {'error': 'range not satisfiable'}, {'Content-Range': 'bytes */%d' % size})
+        status = 206
+      self.send_response(status)
+      self.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+      self.send_header('Content-Length', str(end - start + 1))
+      self.send_header('Accept-Ranges', 'bytes')
+      if status == 206:
+        self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, end, size))
+      self.end_headers()
+      f.seek(start)
+      remaining = end - start + 1
+      while remaining > 0:
+        block = f.read(min(remaining, 1 << 20))
+        if not block:
+          break
+        self.wfile.write(block)
+        remaining -= len(block)
+
+  def log_message(self, format, *args):
+    if self.server.verbose:
+      BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+def serve_main(argv):
+  parser = argparse.ArgumentParser(prog='gc_log_visualizer.py serve', description='Analyze uploaded or local gc logs over http, on localhost only')
+  parser.add_argument('-p', '--port', type=int, default=8421, help='port on 127.0.0.1 to listen on, 0 for any free one')
+  parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='logs parsed at once')
+  parser.add_argument('--queue', type=int, default=64, help='jobs pending at once before submissions are turned away')
+  parser.add_argument('--root', default=os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'gc_log_visualizer', 'service'),
+                      help='directory the jobs work and keep their reports in')
+  parser.add_argument('--cache-mb', type=int, default=2048, help='finished reports kept, least recently used dropped first')
+  parser.add_argument('--no-charts', action='store_true', help='only write the summary and html report of each log, no pngs')
+  parser.add_argument('-v', '--verbose', action='store_true', help='log every request to stderr')
+  args = parser.parse_args(argv)
+
+  service = AnalysisService(args.root, args.jobs, args.queue, args.cache_mb << 20, not args.no_charts)
+  try:
+    server = ServiceServer(('127.0.0.1', args.port), ServiceHandler)
+  except socket.error, e:
+    service.close()
+    parser.error('cannot listen on port %d: %s' % (args.port, e))
+  server.service = service
+  server.verbose = args.verbose
+  # stopped by a service manager as by ^C
+  signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+  sys.stderr.write("serving on http://127.0.0.1:%d/jobs\n" % server.server_address[1])
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    service.close()
+
+# --summary threshold flags and the summary numbers they are upper limits of
+summaryLimits = {'max-pause': 'max_ms', 'max-p99': 'p99_ms', 'max-gc-pct': 'gc_pct', 'max-full-gcs': 'full_gcs',
+                 'max-exhaustion': 'exhaustion', 'max-mixed-cycles': 'mixed_cycles', 'max-stopped-pct': 'stopped_pct'}
+
+def derived_summary(logParser):
+  """The median allocation and promotion rates in MB/sec and the shortest
+  predicted time to the occupancy threshold and to a full gc, None when
+  there is no value or numpy to work it out with."""
+  keys = ('allocation_rate', 'promotion_rate', 'min_secs_to_threshold', 'min_secs_to_full')
+  summary = dict.fromkeys(keys)
+  if numpy is None or len(logParser.store.young) < 2:
+    return summary
+  metrics = derived_metrics(logParser.store, logParser.gc_alg_g1gc, logParser.occupancy_threshold, logParser.max_heap)
+  for key, field, reduce in zip(keys, ('allocation_rate', 'promotion_rate', 'secs_to_threshold', 'secs_to_full'),
+                                (numpy.median, numpy.median, numpy.min, numpy.min)):
+    values = metrics[field][numpy.isfinite(metrics[field])]
+    if len(values):
+      summary[key] = round(float(reduce(values)), 3)
+  return summary
+
+def summary_document(logParser, name, limits):
+  """The --summary json for a parsed log, checked against the limits given
+  for its numbers. The numbers of handlers the parse ignored, such as the
+  summaryIgnored ones, are left out."""
+  store = logParser.store
+  summary = logParser.summary()
+  if 'collect_humongous_objects' in logParser.ignored:
+    del summary['humongous']
+  summary.update({
+    'log': name,
+    'gc_alg': logParser.gc_alg_g1gc and 'g1gc' or logParser.gc_alg_cms and 'cms' or logParser.gc_alg_parallel and 'parallel' or None,
+    'full_gcs': len(store.full_gc),
+    'mixed_cycles': len(store.mixed_duration),
+    'mixed_pauses': len(store.mixed_pause),
+  })
+  summary.update(derived_summary(logParser))
+  checks = {}
+  for key, limit in limits.items():
+    checks[key] = {'limit': limit, 'value': summary[key], 'ok': summary[key] <= limit}
+  summary['checks'] = checks
+  summary['ok'] = all(check['ok'] for check in checks.values())
+  return summary
+
+subcommands = {'fleet': fleet_main, 'humongous': humongous_main, 'compare': compare_main, 'serve': serve_main}
 
 def main():
-    logParser = LogParser(sys.argv[1])
+    # subcommands ahead of the original single log arguments
+    if len(sys.argv) > 1 and sys.argv[1] in subcommands and not os.path.isfile(sys.argv[1]):
+      return subcommands[sys.argv[1]](sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description='Generate multiple gnuplot graphs from java gc log data')
+    parser.add_argument('gc_log', help='the gc log, or a quoted glob of a rotation set like "gc.log*", gzip or zstd compressed or not')
+    parser.add_argument('basefilename', nargs='?', default='default', help='base name for the created png files')
+    parser.add_argument('start', nargs='?', help='optional start date/time, fmt: 2015-08-12:19:36:00')
+    parser.add_argument('end', nargs='?', help='optional end date/time, fmt: 2015-08-12:19:39:00')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='parse the log with this many processes')
+    parser.add_argument('--render-jobs', type=int, default=1, help='render the charts with this many gnuplot processes')
+    parser.add_argument('--no-cache', action='store_true', help='parse the whole log, neither reading nor writing the parse cache')
+    parser.add_argument('-f', '--follow', action='store_true', help='keep parsing the log as it is written, re-rendering the charts')
+    parser.add_argument('--interval', type=float, default=60, help='seconds between re-renders with --follow')
+    parser.add_argument('--percentile-window', type=float, default=60, help='secs of wall-clock time each point of the pause percentile charts covers')
+    parser.add_argument('--max-points', type=int, default=20000, help='decimate each series to about this many rows before charting, 0 keeps them all')
+    parser.add_argument('--profile', action='store_true', help='time the parse handlers and each phase, written to <basefilename>-profile.json')
+    parser.add_argument('--export', choices=sorted(exporters), help='write the parsed columns to <basefilename>.npz, <basefilename>-<series>.parquet files or a zoomable <basefilename>.html report instead of charting them')
+    parser.add_argument('--summary', action='store_true', help='print the headline numbers as json instead of charting, exiting 1 when over a --max-* limit')
+    for flag, key in sorted(summaryLimits.items()):
+      parser.add_argument('--' + flag, type=float, metavar='LIMIT', help='with --summary, fail when %s is over this' % key)
+    args = parser.parse_args()
+    if args.summary and (args.export or args.follow):
+      parser.error('--summary cannot be used with --export or --follow')
+    limits = dict((key, getattr(args, flag.replace('-', '_'))) for flag, key in summaryLimits.items()
+                  if getattr(args, flag.replace('-', '_')) is not None)
+    if limits and not args.summary:
+      parser.error('the --max-* limits need --summary')
+    if args.export and args.follow:
+      parser.error('--export cannot be used with --follow')
+    if args.export == 'parquet':
+      try:
+        import pyarrow.parquet
+      except ImportError:
+        parser.error('--export parquet needs pyarrow installed')
+    if args.start and not args.end:
+      parser.error('an end date/time is required with a start date/time')
+    if args.start and args.follow:
+      parser.error('a start/end date/time cannot be used with --follow')
+    if args.start:
+      try:
+        # the end date/time takes in the whole of its second
+        window_start, window_end = timestamp_millis(args.start), timestamp_millis(args.end) + 1000
+      except ValueError:
+        parser.error('start and end date/times must be formatted like 2015-08-12:19:36:00')
+
+    paths = [args.gc_log] if os.path.isfile(args.gc_log) else log_paths(args.gc_log)
+    if not paths:
+      parser.error('no gc log found at %s' % args.gc_log)
+    logs = log_set(paths)
+    if logs is not None and args.follow:
+      parser.error('--follow needs a single uncompressed log')
+
+    logParser = LogParser(paths[0])
+    logParser.percentile_window = int(args.percentile_window * 1000)
+    logParser.max_points = args.max_points
+    # the cache works on byte offsets into a single log
+    cache = None if args.no_cache or logs else ParseCache()
+    profiler = Profiler(args.profile)
+    # stdout is left to the json of --summary
+    status = sys.stderr if args.summary else sys.stdout
+    if args.summary:
+      logParser.ignore(LogParser.summaryIgnored)
+
     try:
-      logParser.determine_gc_alg()
-      print("gc alg: parallel=%s, g1gc=%s, cms=%s" % (logParser.gc_alg_parallel, logParser.gc_alg_g1gc, logParser.gc_alg_cms))
-      logParser.parse_log()
-      logParser.close_files()
-      basefilename = sys.argv[2] if len(sys.argv) > 2 else 'default'
-      start = None
-      end = None
-      if len(sys.argv) > 3:
-        start = sys.argv[3]
-        end = sys.argv[4]
-      logParser.gnuplot(basefilename, start, end)
+      with profiler.phase('cache load'):
+        cached = cache.load(logParser) if cache else None
+      start, end = 0, None
+      windowed = False
+      if cached is not None:
+        start = cached
+        status.write("using cached parse of the first %d bytes\n" % cached)
+      elif logs is not None:
+        with profiler.phase('order logs'):
+          logs.order(logParser)
+        with profiler.phase('determine_gc_alg'):
+          logs.determine_gc_alg(logParser)
+        if args.start:
+          logs.select(window_start, window_end)
+        status.write("parsing %s\n" % ', '.join(logs.paths))
+      else:
+        with profiler.phase('determine_gc_alg'):
+          logParser.determine_gc_alg()
+        if args.start:
+          with profiler.phase('find_window'):
+            start, end = logParser.find_window(window_start, window_end)
+          windowed = end is not None
+          if windowed:
+            status.write("parsing bytes %d to %d for the time window\n" % (start, end))
+      if args.follow:
+        # leave a partial last line for the follower
+        end = max(logParser.complete_size(), start)
+      status.write("gc alg: parallel=%s, g1gc=%s, cms=%s\n" % (logParser.gc_alg_parallel, logParser.gc_alg_g1gc, logParser.gc_alg_cms))
+      with profiler.phase('parse'):
+        if logs is not None:
+          # a log set is read as a stream, in one process
+          profiler.instrument(logParser)
+          logs.parse(logParser)
+        elif args.jobs > 1:
+          logParser.parse_log_parallel(args.jobs, start, end, profiler)
+        else:
+          profiler.instrument(logParser)
+          logParser.parse_log(start, end)
+      # the follower reads the log itself, and the mapping would hold on to
+      # the space of a log that gets rotated away
+      logParser.close_log()
+      # a windowed parse is only part of the log, and a summary parse leaves
+      # series out, neither is cached
+      if cache and not windowed and not args.summary and (cached is None or logParser.parsed_bytes > cached):
+        with profiler.phase('cache save'):
+          cache.checkpoint(logParser)
+      if args.start:
+        # the lead-in of a windowed parse, or all but the window of a cached
+        # one, isn't reported on
+        logParser.close_percentile_window()
+        logParser.trim_window(window_start, window_end)
+      summary = logParser.summary()
+      status.write("%d pauses: p50 %.1fms, p90 %.1fms, p99 %.1fms, p99.9 %.1fms, max %.1fms\n" %
+                   (summary['pauses'], summary['p50_ms'], summary['p90_ms'], summary['p99_ms'], summary['p999_ms'], summary['max_ms']))
+      status.write("%d safepoints: %.2f%% of the time stopped, %.2f%% outside gc\n" % (summary['safepoints'], summary['stopped_pct'], summary['non_gc_pct']))
+      if args.summary:
+        document = summary_document(logParser, args.gc_log, limits)
+        timings = []
+      elif args.export:
+        with profiler.phase('export'):
+          paths = exporters[args.export](logParser.store, args.basefilename)
+        print("exported to %s" % ', '.join(paths))
+        timings = []
+      else:
+        with profiler.phase('render'):
+          timings = logParser.gnuplot(args.basefilename, args.start, args.end, args.render_jobs, discard_series=not args.follow)
+      if profiler.enabled:
+        for chart_name, secs in timings:
+          profiler.phases.append(('chart %s' % chart_name, secs or 0))
+        status.write(profiler.report())
+        with open('%s-profile.json' % args.basefilename, 'w') as f:
+          json.dump(profiler.stats(), f, indent=2, sort_keys=True)
+      if args.follow:
+        follower = LogFollower(logParser)
+        try:
+          while True:
+            time.sleep(args.interval)
+            if follower.poll():
+              if cache:
+                cache.checkpoint(logParser)
+              logParser.gnuplot(args.basefilename, None, None, args.render_jobs)
+        except KeyboardInterrupt:
+          pass
+        finally:
+          follower.close()
     finally:
       logParser.cleanup()
+    if args.summary:
+      print(json.dumps(document, indent=2, sort_keys=True))
+      return 0 if document['ok'] else 1
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
 
@@ -0,0 +1,211 @@
+#!python
+
+# Checks that the ways of parsing a log build the same series, on logs from
+# benchmarks/generate_logs.py of each collector: the parallel parse against
+# the serial one, a parse carried on from the cache against a cold one, a
+# rotation set against the log it was cut from, and iter_events against the
+# parser's own store. Also checks that full gcs are recorded and that a
+# windowed parse reports the window only.
+#
+#   python -m unittest discover tests
+
+import sys
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from itertools import izip
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, '..'))
+sys.path.insert(0, os.path.join(tests_dir, '..', 'benchmarks'))
+from gc_log_visualizer import LogParser, LogSet, ParseCache, EventStore, iter_events, parse_cached
+from generate_logs import generators, generate
+
+# big enough for a few parallel chunks and full gcs of every collector
+logSize = 8 << 20
+collectors = sorted(generators)
+
+work_dir = None
+logs = {}
+
+def setUpModule():
+  global work_dir
+  work_dir = tempfile.mkdtemp(prefix='gc_log_visualizer_tests.')
+  for collector in collectors:
+    logs[collector] = os.path.join(work_dir, '%s.log' % collector)
+    generate(collector, logSize, logs[collector])
+
+def tearDownModule():
+  shutil.rmtree(work_dir)
+
+def parse(path, jobs=1, start=0, end=None, cache=None):
+  """A LogParser that has parsed path, its last percentile window closed."""
+  logParser = LogParser(path)
+  try:
+    if cache is not None:
+      parse_cached(logParser, cache)
+    else:
+      logParser.determine_gc_alg()
+      if jobs > 1:
+        logParser.parse_log_parallel(jobs, start, end)
+      else:
+        logParser.parse_log(start, end)
+    logParser.close_percentile_window()
+  finally:
+    logParser.close_log()
+  return logParser
+
+def line_start(data, offset):
+  """The offset of the line offset falls in."""
+  return data.rfind('\n', 0, offset) + 1
+
+class StoreTestCase(unittest.TestCase):
+
+  def assertStoresEqual(self, expected, actual):
+    for expected_series, actual_series in izip(expected.all_series(), actual.all_series()):
+      self.assertEqual(list(izip(*expected_series.columns)), list(izip(*actual_series.columns)),
+                       '%s differs' % expected_series.filename)
+
+  def assertParsersEqual(self, expected, actual):
+    self.assertStoresEqual(expected.store, actual.store)
+    self.assertEqual((expected.gc_alg_g1gc, expected.gc_alg_cms, expected.gc_alg_parallel, expected.occupancy_threshold),
+                     (actual.gc_alg_g1gc, actual.gc_alg_cms, actual.gc_alg_parallel, actual.occupancy_threshold))
+    self.assertEqual(expected.pause_histogram.state(), actual.pause_histogram.state())
+
+class ParallelTest(StoreTestCase):
+
+  def test_parallel_parse_is_the_serial_parse(self):
+    for collector in collectors:
+      serial = parse(logs[collector])
+      self.assertTrue(len(serial.store.pause) > 0, collector)
+      for jobs in (2, 3):
+        self.assertParsersEqual(serial, parse(logs[collector], jobs))
+
+class CacheTest(StoreTestCase):
+
+  def setUp(self):
+    self.cache_dir = tempfile.mkdtemp(dir=work_dir)
+    self.log = os.path.join(self.cache_dir, 'gc.log')
+
+  def tearDown(self):
+    shutil.rmtree(self.cache_dir)
+
+  def test_resumed_parse_is_the_cold_parse(self):
+    for collector in collectors:
+      with open(logs[collector], 'rb') as f:
+        data = f.read()
+      cold = parse(logs[collector])
+      # cut on a line, resumed, and mid line, parsed again from the start
+      for cut in (line_start(data, len(data) * 2 // 3), line_start(data, len(data) // 2) + 7):
+        cache = ParseCache(os.path.join(self.cache_dir, 'cache-%s-%d' % (collector, cut)))
+        with open(self.log, 'wb') as f:
+          f.write(data[:cut])
+        parse(self.log, cache=cache)
+        with open(self.log, 'ab') as f:
+          f.write(data[cut:])
+        self.assertParsersEqual(cold, parse(self.log, cache=cache))
+        # and unchanged since, used as is
+        self.assertEqual(len(data), cache.load(LogParser(self.log)))
+        self.assertParsersEqual(cold, parse(self.log, cache=cache))
+
+class RotationTest(StoreTestCase):
+
+  def setUp(self):
+    self.set_dir = tempfile.mkdtemp(dir=work_dir)
+
+  def tearDown(self):
+    shutil.rmtree(self.set_dir)
+
+  def rotation_set(self, path):
+    """Cuts the log into a rotation set that has wrapped around, the middle
+    part gzipped, returning the paths in glob order."""
+    with open(path, 'rb') as f:
+      data = f.read()
+    first, second = line_start(data, len(data) // 3), line_start(data, len(data) * 2 // 3)
+    parts = (('gc.log.2', data[:first]), ('gc.log.0.gz', data[first:second]), ('gc.log.1.current', data[second:]))
+    for name, part in parts:
+      f = (gzip.open if name.endswith('.gz') else open)(os.path.join(self.set_dir, name), 'wb')
+      try:
+        f.write(part)
+      finally:
+        f.close()
+    return sorted(os.path.join(self.set_dir, name) for name, part in parts)
+
+  def test_rotation_set_is_the_single_log(self):
+    for collector in collectors:
+      single = parse(logs[collector])
+      paths = self.rotation_set(logs[collector])
+      logParser = LogParser(paths[0])
+      logSet = LogSet(paths)
+      logSet.order(logParser)
+      logSet.determine_gc_alg(logParser)
+      logSet.parse(logParser)
+      self.assertParsersEqual(single, logParser)
+
+      # iter_events reads the set the same way
+      store = EventStore()
+      for event in iter_events(os.path.join(self.set_dir, 'gc.log*')):
+        store.record(event)
+      self.assertStoresEqual(single.store, store)
+
+class IterEventsTest(StoreTestCase):
+
+  def test_iter_events_builds_the_same_store(self):
+    for collector in collectors:
+      store = EventStore()
+      for event in iter_events(logs[collector]):
+        store.record(event)
+      self.assertStoresEqual(parse(logs[collector]).store, store)
+
+class FullGcTest(unittest.TestCase):
+
+  def test_every_full_gc_is_recorded(self):
+    for collector in collectors:
+      with open(logs[collector]) as f:
+        full_gcs = sum(1 for line in f if '[Full GC' in line)
+      self.assertTrue(full_gcs > 0, collector)
+      for jobs in (1, 2):
+        logParser = parse(logs[collector], jobs)
+        self.assertEqual(full_gcs, len(logParser.store.full_gc), collector)
+        self.assertEqual(full_gcs, len(logParser.store.full_pause), collector)
+        self.assertEqual(full_gcs, sum(logParser.store.young.column('full_gc')), collector)
+
+class WindowTest(StoreTestCase):
+
+  def test_window_is_reported_alone(self):
+    for collector in collectors:
+      whole = parse(logs[collector])
+      timestamps = whole.store.pause.column('timestamp')
+      start = timestamps[len(timestamps) // 2]
+      start -= start % 60000
+      end = start + 30 * 60000
+
+      windowed = LogParser(logs[collector])
+      try:
+        windowed.determine_gc_alg()
+        window_start, window_end = windowed.find_window(start, end)
+        self.assertTrue(window_start > 0, collector)
+        windowed.parse_log(window_start, window_end)
+        windowed.close_percentile_window()
+      finally:
+        windowed.close_log()
+      windowed.trim_window(start, end)
+
+      # nothing from the lead-in or after the end is left
+      store = windowed.store
+      for series in store.all_series():
+        if series is store.pause_percentiles or series is store.safepoint_windows:
+          continue
+        self.assertTrue(all(start <= timestamp < end for timestamp in series.column('timestamp')), series.filename)
+      self.assertTrue(len(store.pause) > 0, collector)
+      self.assertEqual(len(store.pause), windowed.pause_histogram.count)
+      self.assertTrue(windowed.summary()['span_secs'] <= (end - start) / 1000.0)
+
+      # the same as the whole log cut down to the window
+      whole.trim_window(start, end)
+      self.assertParsersEqual(whole, windowed)
+
+if __name__ == '__main__':
+  unittest.main()